@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import argparse
+import json
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from atlas.cli.anchor_scales import load_overrides, load_shard, merge_part
+from atlas.cli.run_pipeline import load_thresholds, make_validators
+from atlas.io.jsonl import read_jsonl
+from atlas.stages import anchor
+from atlas.utils.anchor_index import apply_overrides, load_or_build, metric_names
+from atlas.utils.logging import StageMeta, get_git_commit, sha256_of_file
+from atlas.utils.streaming import QuantileSketch
+
+
+def parse_args(argv: Iterable[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Nearest external anchor distance per state.")
+    parser.add_argument("thresholds", type=Path)
+    parser.add_argument("anchors_jsonl", type=Path)
+    parser.add_argument("input_jsonl", type=Path)
+    parser.add_argument("output_jsonl", type=Path)
+    parser.add_argument("--profile", default="default")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--index-cache", type=Path, default=None, help="Reuse/write the anchor KD-tree index (.npz)")
+    parser.add_argument("--block-size", type=int, default=4096)
+    parser.add_argument(
+        "--overrides",
+        type=Path,
+        default=None,
+        help="anchor_scales --overrides-out file or summary; its scales replace the profile's anchor_metric scales.",
+    )
+    parser.add_argument(
+        "--sketch",
+        type=Path,
+        nargs="+",
+        default=None,
+        help="anchor_scales --sketch-out shards for MAD scales when the profile has no explicit scales.",
+    )
+    parser.add_argument(
+        "--validate",
+        action="store_true",
+        help="Schema-check every state and row; by default only the first block is checked.",
+    )
+    return parser.parse_args(list(argv))
+
+
+def main(argv: Iterable[str] | None = None) -> None:
+    args = parse_args(argv or [])
+    thresholds_hash = sha256_of_file(str(args.thresholds))
+    thresholds = load_thresholds(args.thresholds, args.profile)
+    if args.overrides is not None:
+        thresholds = apply_overrides(thresholds, load_overrides(args.overrides))
+    validators = make_validators()
+    commit = get_git_commit(args.thresholds.parent)
+    meta = StageMeta(seed=args.seed, commit=commit, thresholds_sha256=thresholds_hash)
+
+    for path in (args.anchors_jsonl, args.input_jsonl):
+        if not path.exists():
+            raise FileNotFoundError(f"Input JSONL not found: {path}")
+    sketches: Optional[Dict[str, QuantileSketch]] = None
+    if args.sketch:
+        sketches = {}
+        for path in args.sketch:
+            merge_part(sketches, load_shard(path), metric_names(thresholds), path)
+    args.output_jsonl.parent.mkdir(parents=True, exist_ok=True)
+    index = load_or_build(args.anchors_jsonl, thresholds, cache_path=args.index_cache, sketches=sketches)
+
+    states = read_jsonl(str(args.input_jsonl))
+    check = True
+    with args.output_jsonl.open("w", encoding="utf-8") as out:
+        while True:
+            block = list(islice(states, max(args.block_size, 1)))
+            if not block:
+                break
+            if check:
+                for state in block:
+                    validators["state"].validate(state)
+            for result in anchor.evaluate_block(block, thresholds, meta, index):
+                if check:
+                    validators["stage"].validate(result)
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            check = args.validate
+
+
+if __name__ == "__main__":
+    import sys
+
+    main(sys.argv[1:])
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, Mapping, Sequence
+
+import codex
+from atlas.io.jsonl import read_jsonl
+from atlas.utils.anchor_index import DEFAULT_PARAMS, scales_overrides, sketch_params, sketch_scales
+from atlas.utils.rng import DEFAULT_SEED
+from atlas.utils.streaming import DEFAULT_SKETCH_K, QuantileSketch
+
+
+def parse_args(argv: Iterable[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Streaming median/MAD scales for anchor_metric.")
+    parser.add_argument("inputs", type=Path, nargs="+", help="SystemState JSONL files or sketch JSON shards.")
+    parser.add_argument("out_json", type=Path, help="Summary of per-parameter median/MAD and overrides.")
+    parser.add_argument("--params", nargs="+", default=list(DEFAULT_PARAMS))
+    parser.add_argument("--k", type=int, default=DEFAULT_SKETCH_K)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--sketch-out", type=Path, default=None)
+    parser.add_argument("--overrides-out", type=Path, default=None)
+    parser.add_argument(
+        "--profile-name",
+        default=None,
+        help="Register the scales as a dynamic codex profile; the summary records it for anchor_distance --overrides.",
+    )
+    return parser.parse_args(list(argv))
+
+
+def load_shard(path: Path) -> Dict[str, QuantileSketch]:
+    with path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {name: QuantileSketch.from_dict(state) for name, state in data["sketches"].items()}
+
+
+def merge_part(
+    sketches: Dict[str, QuantileSketch], part: Mapping[str, QuantileSketch], names: Sequence[str], path: Path
+) -> None:
+    for name in names:
+        if name not in part:
+            raise KeyError(f"{path} has no sketch for parameter '{name}'")
+        sketches[name] = sketches[name].merge(part[name]) if name in sketches else part[name]
+
+
+def collect(args: argparse.Namespace) -> Dict[str, QuantileSketch]:
+    sketches: Dict[str, QuantileSketch] = {}
+    for path in args.inputs:
+        if not path.exists():
+            raise FileNotFoundError(f"Input not found: {path}")
+        if path.suffix == ".json":
+            part = load_shard(path)
+        else:
+            part = sketch_params(read_jsonl(str(path)), args.params, k=args.k, seed=args.seed)
+        merge_part(sketches, part, args.params, path)
+    return sketches
+
+
+def load_overrides(path: Path) -> Dict[str, Any]:
+    """Read the scales overrides from an ``--overrides-out`` file or a summary written by :func:`main`.
+
+    When the summary records a ``--profile-name`` profile it is registered again in this process,
+    and a profile whose digest no longer matches the recorded one is rejected.
+    """
+    with path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    if "overrides" not in data:
+        return data
+    record = data.get("profile")
+    if record is None:
+        return data["overrides"]
+    try:
+        entry = codex.get("atlas.profile", record["name"])
+    except KeyError:
+        entry = codex.select_profile(record["name"], overrides=data["overrides"])
+    if entry["effective_sha256"] != record["effective_sha256"]:
+        raise ValueError(f"Profile '{record['name']}' in {path} does not match the registered codex profile")
+    return data["overrides"]
+
+
+def main(argv: Iterable[str] | None = None) -> None:
+    args = parse_args(argv or [])
+    sketches = collect(args)
+    scales = sketch_scales(sketches, args.params)
+    overrides = scales_overrides(args.params, scales)
+    summary: Dict[str, Any] = {"params": {}, "overrides": overrides}
+    for name in args.params:
+        median, mad = sketches[name].median_mad()
+        summary["params"][name] = {
+            "count": sketches[name].count,
+            "median": median,
+            "mad": mad,
+            "rank_error": sketches[name].rank_error(),
+        }
+    if args.sketch_out:
+        args.sketch_out.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"sketches": {name: sketches[name].to_dict() for name in args.params}}
+        args.sketch_out.write_text(json.dumps(payload), encoding="utf-8")
+    if args.overrides_out:
+        args.overrides_out.parent.mkdir(parents=True, exist_ok=True)
+        args.overrides_out.write_text(json.dumps(overrides, indent=2), encoding="utf-8")
+    if args.profile_name:
+        entry = codex.select_profile(args.profile_name, overrides=overrides)
+        summary["profile"] = {
+            "name": args.profile_name,
+            "id": entry["id"],
+            "effective_sha256": entry["effective_sha256"],
+        }
+    args.out_json.parent.mkdir(parents=True, exist_ok=True)
+    with args.out_json.open("w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    import sys
+
+    main(sys.argv[1:])
@@ -2,51 +2,354 @@ from __future__ import annotations
 
 import argparse
 import json
+import tempfile
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
 
 from atlas.io.jsonl import read_jsonl
+from atlas.utils.quantreg import DEFAULT_BOOTSTRAP, DEFAULT_SUBSAMPLE, DEFAULT_TAU, bootstrap_quantreg, quantile_regression
+from atlas.utils.rng import stable_hash64
+from atlas.utils.streaming import DEFAULT_BLOOM_BITS, DEFAULT_CHUNK, BloomFilter
+
+CALIBRATION_STAGES = ("delta", "nmod", "htop")
+DEFAULT_PARTITIONS = 64
+# Beyond this many revisited anchors the log is treated as unordered and spilled.
+MAX_DEFERRED = 1 << 16
+METHODS = ("quantreg", "max")
+
+StageValues = Tuple[Any, Any]
+Triplet = Tuple[float, float, float, float]
+
+
+def _stage_values(row: Dict[str, object]) -> StageValues:
+    aux = row.get("aux", {})
+    stage = row.get("stage")
+    if stage == "delta":
+        return aux.get("delta_chart"), None
+    if stage == "nmod":
+        return aux.get("abs_delta_N"), None
+    return aux.get("H_obs"), aux.get("H_lb")
+
+
+def _group_triplet(stages: Dict[str, StageValues]) -> Optional[Triplet]:
+    """(Δ, |δN|, H_obs, gap) from one anchor's last delta/nmod/htop values, or ``None``."""
+    d = stages.get("delta")
+    n = stages.get("nmod")
+    h = stages.get("htop")
+    if not (d and n and h):
+        return None
+    delta_val, abs_delta_n = d[0], n[0]
+    h_obs, h_lb = h
+    if delta_val is None or abs_delta_n is None or h_obs is None or h_lb is None:
+        return None
+    gap = max(0.0, float(h_obs) - float(h_lb))
+    return float(delta_val), float(abs_delta_n), float(h_obs), gap
 
 
 def extract_triplets(rows: Iterable[Dict[str, object]]) -> List[Tuple[float, float, float, float]]:
-    by_anchor: Dict[str, Dict[str, Dict[str, object]]] = {}
+    by_anchor: Dict[str, Dict[str, StageValues]] = {}
     for row in rows:
         anchor = row.get("anchor_id")
         by_anchor.setdefault(anchor, {})
-        by_anchor[anchor][row.get("stage")] = row
+        by_anchor[anchor][row.get("stage")] = _stage_values(row)
     triplets: List[Tuple[float, float, float, float]] = []
-    for anchor, stages in by_anchor.items():
-        d = stages.get("delta")
-        n = stages.get("nmod")
-        h = stages.get("htop")
-        if not (d and n and h):
-            continue
-        delta_val = d.get("aux", {}).get("delta_chart")
-        abs_delta_n = n.get("aux", {}).get("abs_delta_N")
-        h_obs = h.get("aux", {}).get("H_obs")
-        h_lb = h.get("aux", {}).get("H_lb")
-        if delta_val is None or abs_delta_n is None or h_obs is None or h_lb is None:
-            continue
-        gap = max(0.0, float(h_obs) - float(h_lb))
-        triplets.append((float(delta_val), float(abs_delta_n), float(h_obs), gap))
+    for stages in by_anchor.values():
+        triplet = _group_triplet(stages)
+        if triplet is not None:
+            triplets.append(triplet)
     return triplets
 
 
-def calibrate(rows: Iterable[Dict[str, object]]) -> Dict[str, float]:
-    triplets = extract_triplets(rows)
-    if not triplets:
+@dataclass
+class QuantileSettings:
+    """Lower-quantile fit ``gap ~ c_delta * Δ + c_n * |δN|`` and its bootstrap."""
+
+    tau: float = DEFAULT_TAU
+    bootstraps: int = DEFAULT_BOOTSTRAP
+    subsample: int = DEFAULT_SUBSAMPLE
+    seed: int = 0
+    workers: int = 1
+
+
+def fit_quantile(X: np.ndarray, gap: np.ndarray, settings: QuantileSettings) -> Dict[str, Any]:
+    if gap.size == 0:
         return {"c_delta": 0.0, "c_n": 0.0, "samples": 0}
-    ratios_delta = [gap / (delta if delta else 1e-9) for delta, _, _, gap in triplets if delta > 0]
-    ratios_n = [gap / (abs_n if abs_n else 1e-9) for _, abs_n, _, gap in triplets if abs_n > 0]
-    c_delta = max(ratios_delta) if ratios_delta else 0.0
-    c_n = max(ratios_n) if ratios_n else 0.0
-    return {"c_delta": c_delta, "c_n": c_n, "samples": len(triplets)}
+    fit = quantile_regression(X, gap, settings.tau, seed=settings.seed)
+    boot = bootstrap_quantreg(
+        X,
+        gap,
+        settings.tau,
+        bootstraps=settings.bootstraps,
+        subsample=settings.subsample,
+        seed=settings.seed,
+        workers=settings.workers,
+        coef=fit.coef,
+    )
+    return {
+        "c_delta": float(fit.coef[0]),
+        "c_n": float(fit.coef[1]),
+        "samples": int(gap.size),
+        "ci95": {"c_delta": boot["ci95"][0], "c_n": boot["ci95"][1]},
+        "converged": fit.converged,
+        "bootstrap": {"B": boot["B"], "subsample": boot["subsample"]},
+    }
+
+
+class TripletAccumulator:
+    """Preallocated ``(block, 4)`` triplet buffer folded into the coefficients whenever it fills.
+
+    With ``keep`` the ``(Δ, |δN|, gap)`` columns of every block are also
+    retained, with the ``system_class`` looked up in ``classes`` by anchor,
+    for :meth:`quantile_result`; memory then grows with the anchor count.
+    Without it the accumulator runs in constant memory.
+    """
+
+    def __init__(
+        self,
+        block: int = DEFAULT_CHUNK,
+        *,
+        keep: bool = False,
+        classes: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        self.buffer = np.empty((max(1, int(block)), 4), dtype=np.float64)
+        self.codes = np.empty(self.buffer.shape[0], dtype=np.int32)
+        self.fill = 0
+        self.samples = 0
+        self.c_delta = 0.0
+        self.c_n = 0.0
+        self.keep = keep
+        self.classes = classes
+        self.labels: Dict[str, int] = {}
+        self.kept: List[np.ndarray] = []
+        self.kept_codes: List[np.ndarray] = []
+
+    def add(self, triplet: Optional[Triplet], anchor: Any = None) -> None:
+        if triplet is None:
+            return
+        self.buffer[self.fill] = triplet
+        if self.classes is not None:
+            label = str(self.classes.get(anchor, "unknown"))
+            self.codes[self.fill] = self.labels.setdefault(label, len(self.labels))
+        self.fill += 1
+        if self.fill == self.buffer.shape[0]:
+            self.flush()
+
+    def flush(self) -> None:
+        block = self.buffer[: self.fill]
+        gap = block[:, 3]
+        if self.keep and self.fill:
+            self.kept.append(block[:, [0, 1, 3]].copy())
+            self.kept_codes.append(self.codes[: self.fill].copy())
+        for col, attr in ((0, "c_delta"), (1, "c_n")):
+            x = block[:, col]
+            pos = x > 0
+            if np.any(pos):
+                setattr(self, attr, max(getattr(self, attr), float(np.max(gap[pos] / x[pos]))))
+        self.samples += self.fill
+        self.fill = 0
+
+    def result(self) -> Dict[str, Any]:
+        self.flush()
+        if not self.samples:
+            return {"c_delta": 0.0, "c_n": 0.0, "samples": 0}
+        return {"c_delta": self.c_delta, "c_n": self.c_n, "samples": self.samples}
+
+    def quantile_result(self, settings: QuantileSettings) -> Dict[str, Any]:
+        """Pooled quantile-regression coefficients, plus ``by_class`` when ``classes`` was given."""
+        self.flush()
+        kept = np.concatenate(self.kept) if self.kept else np.empty((0, 3), dtype=np.float64)
+        out = fit_quantile(kept[:, :2], kept[:, 2], settings)
+        out["tau"] = settings.tau
+        if self.classes is not None:
+            codes = np.concatenate(self.kept_codes) if self.kept_codes else np.empty(0, dtype=np.int32)
+            out["by_class"] = {
+                label: fit_quantile(kept[codes == code, :2], kept[codes == code, 2], settings)
+                for label, code in sorted(self.labels.items())
+            }
+        return out
+
+    def finish(self, method: str, settings: Optional[QuantileSettings]) -> Dict[str, Any]:
+        if method == "max":
+            out = self.result()
+        else:
+            out = self.quantile_result(settings or QuantileSettings())
+        out["method"] = method
+        return out
+
+
+def calibrate(
+    rows: Iterable[Dict[str, object]],
+    *,
+    method: str = "quantreg",
+    settings: Optional[QuantileSettings] = None,
+    classes: Optional[Mapping[str, str]] = None,
+) -> Dict[str, Any]:
+    """Error-budget coefficients from in-memory rows.
+
+    ``quantreg`` (spec §3.1) fits the lower ``tau``-quantile of the
+    H gap on ``(Δ, |δN|)``; ``max`` is the legacy envelope of per-anchor
+    ratios ``gap / Δ`` and ``gap / |δN|``.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown calibration method: {method}")
+    acc = TripletAccumulator(keep=method == "quantreg", classes=classes)
+    by_anchor: Dict[Any, Dict[str, StageValues]] = {}
+    for row in rows:
+        by_anchor.setdefault(row.get("anchor_id"), {})[row.get("stage")] = _stage_values(row)
+    for anchor, stages in by_anchor.items():
+        acc.add(_group_triplet(stages), anchor)
+    return acc.finish(method, settings)
+
+
+def _anchor_key(anchor: Any) -> str:
+    return json.dumps(anchor)
+
+
+def _contiguous_pass(
+    path: Path,
+    acc: TripletAccumulator,
+    bloom: BloomFilter,
+) -> Optional[Dict[Any, int]]:
+    """Group contiguous anchor runs; returns deferred run counts, or ``None`` if the log looks unordered.
+
+    A run whose anchor may have been finished already (Bloom hit) is not
+    emitted but deferred for an exact recheck.
+    """
+    deferred: Dict[Any, int] = {}
+    current: Any = None
+    group: Dict[str, StageValues] = {}
+    hold = False
+    started = False
+    for row in read_jsonl(str(path), stages=CALIBRATION_STAGES):
+        anchor = row.get("anchor_id")
+        if not started or anchor != current:
+            if started and not hold:
+                acc.add(_group_triplet(group), current)
+            current, group, started = anchor, {}, True
+            hold = bloom.add(_anchor_key(anchor))
+            if hold:
+                deferred[anchor] = deferred.get(anchor, 0) + 1
+                if len(deferred) > MAX_DEFERRED:
+                    return None
+        group[row.get("stage")] = _stage_values(row)
+    if started and not hold:
+        acc.add(_group_triplet(group), current)
+    return deferred
+
+
+def _recheck_pass(path: Path, wanted: Dict[Any, int]) -> Optional[Dict[Any, Dict[str, StageValues]]]:
+    """Exact groups for deferred anchors, or ``None`` if any of their runs was already emitted."""
+    groups: Dict[Any, Dict[str, StageValues]] = {anchor: {} for anchor in wanted}
+    runs = {anchor: 0 for anchor in wanted}
+    previous: Any = object()
+    for row in read_jsonl(str(path), stages=CALIBRATION_STAGES):
+        anchor = row.get("anchor_id")
+        if anchor not in groups:
+            previous = anchor
+            continue
+        if anchor != previous:
+            runs[anchor] += 1
+            previous = anchor
+        groups[anchor][row.get("stage")] = _stage_values(row)
+    if any(runs[anchor] != count for anchor, count in wanted.items()):
+        return None
+    return groups
+
+
+def _spill_pass(path: Path, acc: TripletAccumulator, spill_dir: Optional[Path], partitions: int) -> None:
+    """Hash-partition compact stage values to disk, then group one partition at a time."""
+    with tempfile.TemporaryDirectory(dir=spill_dir) as tmp:
+        parts = [Path(tmp) / f"part-{i:04d}.jsonl" for i in range(partitions)]
+        handles = [p.open("w", encoding="utf-8") for p in parts]
+        try:
+            for row in read_jsonl(str(path), stages=CALIBRATION_STAGES):
+                anchor = row.get("anchor_id")
+                values = _stage_values(row)
+                record = json.dumps([anchor, row.get("stage"), values[0], values[1]])
+                handles[stable_hash64(_anchor_key(anchor)) % partitions].write(record + "\n")
+        finally:
+            for handle in handles:
+                handle.close()
+        for part in parts:
+            groups: Dict[str, Tuple[Any, Dict[str, StageValues]]] = {}
+            with part.open("r", encoding="utf-8") as f:
+                for line in f:
+                    anchor, stage, first, second = json.loads(line)
+                    groups.setdefault(_anchor_key(anchor), (anchor, {}))[1][stage] = (first, second)
+            for anchor, stages in groups.values():
+                acc.add(_group_triplet(stages), anchor)
+
+
+def calibrate_file(
+    path: Path,
+    *,
+    block: int = DEFAULT_CHUNK,
+    bloom_bits: int = DEFAULT_BLOOM_BITS,
+    spill_dir: Optional[Path] = None,
+    partitions: int = DEFAULT_PARTITIONS,
+    method: str = "quantreg",
+    settings: Optional[QuantileSettings] = None,
+    classes: Optional[Mapping[str, str]] = None,
+) -> Dict[str, Any]:
+    """Streaming :func:`calibrate` over a results log.
+
+    Rows of one anchor are expected to be contiguous (as ``run_pipeline``
+    writes them); each run is reduced as soon as the next anchor starts.
+    A fixed-size Bloom filter flags runs whose anchor may have appeared
+    before; those are deferred and rechecked exactly in a second scan
+    restricted to them.  If an anchor really is split across runs, the
+    log is re-read through hash-partitioned spill files instead.  Every
+    path gives the same result as :func:`calibrate` on the whole log.
+    Grouping memory is bounded; ``quantreg`` additionally keeps three
+    floats per anchor for the fit.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown calibration method: {method}")
+    keep = method == "quantreg"
+    acc = TripletAccumulator(block, keep=keep, classes=classes)
+    deferred = _contiguous_pass(path, acc, BloomFilter(bloom_bits))
+    grouping = "contiguous"
+    groups: Optional[Dict[Any, Dict[str, StageValues]]] = None
+    if deferred is not None:
+        groups = _recheck_pass(path, deferred) if deferred else {}
+    if groups is None:
+        acc = TripletAccumulator(block, keep=keep, classes=classes)
+        _spill_pass(path, acc, spill_dir, max(1, int(partitions)))
+        grouping = "spill"
+    else:
+        for anchor, stages in groups.items():
+            acc.add(_group_triplet(stages), anchor)
+        if groups:
+            grouping = "contiguous+recheck"
+    out = acc.finish(method, settings)
+    out["grouping"] = grouping
+    return out
 
 
 def parse_args(argv: Iterable[str]) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Calibrate error budget coefficients from StageResults.")
     parser.add_argument("results_jsonl", type=Path)
     parser.add_argument("out_json", type=Path)
+    parser.add_argument("--block-size", type=int, default=DEFAULT_CHUNK, help="Triplets buffered per reduction")
+    parser.add_argument("--bloom-bits", type=int, default=DEFAULT_BLOOM_BITS, help="Seen-anchor filter size")
+    parser.add_argument("--spill-dir", type=Path, default=None, help="Temp directory for unordered logs")
+    parser.add_argument("--partitions", type=int, default=DEFAULT_PARTITIONS, help="Spill partitions")
+    parser.add_argument(
+        "--method",
+        choices=METHODS,
+        default="quantreg",
+        help="quantreg (spec §3.1; keeps three floats per anchor in memory) "
+        "or the legacy max envelope (constant memory)",
+    )
+    parser.add_argument("--tau", type=float, default=DEFAULT_TAU, help="Quantile level for quantreg")
+    parser.add_argument("--bootstraps", type=int, default=DEFAULT_BOOTSTRAP, help="Bootstrap replicates for CIs")
+    parser.add_argument("--subsample", type=int, default=DEFAULT_SUBSAMPLE, help="Points per bootstrap replicate")
+    parser.add_argument("--workers", type=int, default=1, help="Processes for the bootstrap")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--states", type=Path, default=None, help="SystemState JSONL for per-system_class fits")
     return parser.parse_args(list(argv))
 
 
@@ -54,8 +357,26 @@ def main(argv: Iterable[str] | None = None) -> None:
     args = parse_args(argv or [])
     if not args.results_jsonl.exists():
         raise FileNotFoundError(f"results_jsonl not found: {args.results_jsonl}")
-    rows = list(read_jsonl(str(args.results_jsonl)))
-    metrics = calibrate(rows)
+    classes = None
+    if args.states is not None:
+        classes = {state.get("id"): state.get("system_class") for state in read_jsonl(str(args.states))}
+    settings = QuantileSettings(
+        tau=args.tau,
+        bootstraps=args.bootstraps,
+        subsample=args.subsample,
+        seed=args.seed,
+        workers=args.workers,
+    )
+    metrics = calibrate_file(
+        args.results_jsonl,
+        block=args.block_size,
+        bloom_bits=args.bloom_bits,
+        spill_dir=args.spill_dir,
+        partitions=args.partitions,
+        method=args.method,
+        settings=settings,
+        classes=classes,
+    )
     args.out_json.parent.mkdir(parents=True, exist_ok=True)
     with args.out_json.open("w", encoding="utf-8") as f:
         json.dump(metrics, f, indent=2, ensure_ascii=False)
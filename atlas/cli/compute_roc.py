@@ -3,15 +3,121 @@ from __future__ import annotations
 import argparse
 import json
 from pathlib import Path
-from typing import Iterable, Sequence
+from typing import Any, Dict, Iterable, Optional, Sequence
 
+from atlas.cli.run_pipeline import load_thresholds, make_validators
 from atlas.io.jsonl import read_jsonl
-from atlas.utils.stats import roc_curve
+from atlas.utils.logging import StageMeta, get_git_commit, sha256_of_file, stage_line
+from atlas.utils.stats import (
+    DEFAULT_ROC_BINS,
+    TRIAGE_CLASSES,
+    RocSketch,
+    kfold_roc,
+    roc_arrays,
+    roc_one_vs_rest,
+    triage_arrays,
+    triage_columns,
+)
 
+DEFAULT_MIN_AUC = 0.75
 
-def compute_roc(results_path: Path, positives: Sequence[str]) -> dict:
-    rows = [row for row in read_jsonl(str(results_path)) if row.get("stage") == "triage"]
-    return roc_curve(rows, positives)
+
+def _triage_rows(results_path: Path) -> Iterable[dict]:
+    return read_jsonl(str(results_path), stages=("triage",))
+
+
+def sketch_roc(
+    results_path: Path,
+    *,
+    bins: int = DEFAULT_ROC_BINS,
+    weight_key: Optional[str] = None,
+    sketch: Optional[RocSketch] = None,
+) -> RocSketch:
+    """Stream one results log into a (new or existing) :class:`RocSketch` in constant memory."""
+    target = sketch if sketch is not None else RocSketch(bins=bins)
+    return target.update_rows(_triage_rows(results_path), weight_key=weight_key)
+
+
+def load_sketch(path: Path) -> RocSketch:
+    return RocSketch.from_dict(json.loads(path.read_text(encoding="utf-8")))
+
+
+def binned_roc(sketch: RocSketch, positives: Sequence[str], *, one_vs_rest: bool = False) -> dict:
+    metrics = sketch.roc(positives)
+    if one_vs_rest:
+        metrics["one_vs_rest"] = sketch.roc_one_vs_rest()
+    metrics["sketch"] = {"bins": sketch.bins, "count": sketch.count}
+    return metrics
+
+
+def compute_roc(
+    results_path: Path,
+    positives: Sequence[str],
+    *,
+    one_vs_rest: bool = False,
+    weight_key: Optional[str] = None,
+) -> dict:
+    scores, classes, weights = triage_arrays(_triage_rows(results_path), weight_key)
+    metrics = roc_arrays(scores, classes, positives, weights)
+    if one_vs_rest:
+        metrics["one_vs_rest"] = roc_one_vs_rest(scores, classes, TRIAGE_CLASSES, weights)
+    return metrics
+
+
+def kfold_settings(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    """``triage.roc.kfold`` (falling back to the N_mod extrapolation guard's) and its AUC floor."""
+    guard = cfg.get("N_mod", {}).get("extrapolation_guard", {}).get("roc", {})
+    roc_cfg = cfg.get("triage", {}).get("roc", {})
+    return {
+        "kfold": int(roc_cfg.get("kfold", guard.get("kfold", 5))),
+        "min_auc": float(roc_cfg.get("min_auc", guard.get("min_auc", DEFAULT_MIN_AUC))),
+    }
+
+
+def compute_kfold_roc(
+    results_path: Path,
+    positives: Sequence[str],
+    kfold: int,
+    *,
+    weight_key: Optional[str] = None,
+) -> dict:
+    cols = triage_columns(_triage_rows(results_path), weight_key)
+    return kfold_roc(cols["confidence"], cols["class"], cols["anchor_id"], kfold, positives, cols["weight"])
+
+
+def kfold_record(meta: StageMeta, metrics: Dict[str, Any], min_auc: float, positives: Sequence[str]) -> dict:
+    """roc-stage StageResult carrying the ``triage.report.metrics`` fields for F6."""
+    auc = metrics["AUC"]
+    if metrics["folds_used"] < 2:
+        status = "INCONCLUSIVE"
+    else:
+        status = "PASS" if auc >= min_auc else "FAIL"
+    aux = {key: metrics[key] for key in ("TPR", "FPR", "AUC", "best_J", "ci95")}
+    aux.update(
+        {
+            "kfold": metrics["kfold"],
+            "folds_used": metrics["folds_used"],
+            "AUC_var": metrics["AUC_var"],
+            "threshold_at_best_J": metrics["threshold"],
+            "threshold_var": metrics["threshold_var"],
+            "best_J_var": metrics["best_J_var"],
+            "positives": list(positives),
+            "folds": metrics["folds"],
+        }
+    )
+    # JSON has no NaN; empty folds leave the pooled values undefined.
+    aux = {k: (None if isinstance(v, float) and v != v else v) for k, v in aux.items()}
+    return stage_line(
+        meta,
+        anchor_id="pooled",
+        stage="roc",
+        status=status,
+        metric="kfold_auc",
+        value=auc,
+        threshold=min_auc,
+        aux=aux,
+        notes=f"kfold={metrics['kfold']} split=hash(anchor_id)",
+    )
 
 
 def parse_args(argv: Iterable[str]) -> argparse.Namespace:
@@ -19,6 +125,17 @@ def parse_args(argv: Iterable[str]) -> argparse.Namespace:
     parser.add_argument("results_jsonl", type=Path)
     parser.add_argument("out_json", type=Path)
     parser.add_argument("--positives", nargs="*", default=["true_tear"])
+    parser.add_argument("--one-vs-rest", action="store_true", help="Also report per-class ROC for every triage class")
+    parser.add_argument("--weight-key", default=None, help="aux field holding per-row sample weights")
+    parser.add_argument("--binned", action="store_true", help="Stream into a fixed-memory ROC sketch instead of sorting all rows")
+    parser.add_argument("--bins", type=int, default=DEFAULT_ROC_BINS, help="Confidence bins for --binned")
+    parser.add_argument("--merge", nargs="*", type=Path, default=[], help="Sketch JSONs from other shards to merge (implies --binned)")
+    parser.add_argument("--sketch-out", type=Path, default=None, help="Write this shard's merged sketch JSON (implies --binned)")
+    parser.add_argument("--kfold", type=int, default=None, help="K-fold ROC calibration (default: triage.roc.kfold)")
+    parser.add_argument("--thresholds", type=Path, default=None, help="Thresholds JSON for --kfold/--record-out")
+    parser.add_argument("--profile", default="default")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--record-out", type=Path, default=None, help="Append the k-fold roc StageResult to this JSONL")
     return parser.parse_args(list(argv))
 
 
@@ -26,7 +143,37 @@ def main(argv: Iterable[str] | None = None) -> None:
     args = parse_args(argv or [])
     if not args.results_jsonl.exists():
         raise FileNotFoundError(f"results_jsonl not found: {args.results_jsonl}")
-    metrics = compute_roc(args.results_jsonl, args.positives)
+    if args.binned or args.merge or args.sketch_out:
+        sketch = sketch_roc(args.results_jsonl, bins=args.bins, weight_key=args.weight_key)
+        for shard in args.merge:
+            sketch.merge(load_sketch(shard))
+        if args.sketch_out:
+            args.sketch_out.parent.mkdir(parents=True, exist_ok=True)
+            args.sketch_out.write_text(json.dumps(sketch.to_dict()), encoding="utf-8")
+        metrics = binned_roc(sketch, args.positives, one_vs_rest=args.one_vs_rest)
+    else:
+        metrics = compute_roc(
+            args.results_jsonl,
+            args.positives,
+            one_vs_rest=args.one_vs_rest,
+            weight_key=args.weight_key,
+        )
+    if args.kfold is not None or args.record_out is not None:
+        cfg = load_thresholds(args.thresholds, args.profile) if args.thresholds else {}
+        settings = kfold_settings(cfg)
+        kfold = int(args.kfold) if args.kfold is not None else settings["kfold"]
+        metrics["kfold"] = compute_kfold_roc(args.results_jsonl, args.positives, kfold, weight_key=args.weight_key)
+        if args.record_out is not None:
+            meta = StageMeta(
+                seed=args.seed,
+                commit=get_git_commit(str(args.results_jsonl.parent)),
+                thresholds_sha256=sha256_of_file(str(args.thresholds)) if args.thresholds else "missing",
+            )
+            record = kfold_record(meta, metrics["kfold"], settings["min_auc"], args.positives)
+            make_validators()["stage"].validate(record)
+            args.record_out.parent.mkdir(parents=True, exist_ok=True)
+            with args.record_out.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
     args.out_json.parent.mkdir(parents=True, exist_ok=True)
     with args.out_json.open("w", encoding="utf-8") as f:
         json.dump(metrics, f, indent=2, ensure_ascii=False)
@@ -3,16 +3,25 @@ from __future__ import annotations
 import argparse
 import json
 from pathlib import Path
-from typing import Any, Dict, Iterable, List
+from typing import Any, Callable, Collection, Dict, Iterable, List, Optional, Sequence, Tuple
 
 import jsonschema
 
 from atlas.io.jsonl import read_jsonl, write_jsonl
-from atlas.stages import delta, htop, kms, nmod, sg, tg_ind, triage
+from atlas.stages import delta, htop, kms, nmod, sensitivity, sg, tg_ind, triage
 from atlas.utils.cost import CostTracker
+from atlas.utils.finite_diff import table_derivatives
 from atlas.utils.gpu import detect_accelerator
 from atlas.utils.logging import StageMeta, get_git_commit, sha256_of_file, stage_line
-from atlas.utils.rng import DEFAULT_DTYPE, DEFAULT_SEED, make_rng
+from atlas.utils.op_norm import OpNormProbe
+from atlas.utils.ragged import series_block
+from atlas.utils.rng import DEFAULT_DTYPE, DEFAULT_SEED, anchor_rng, determinism_settings, substream_key
+from atlas.utils.rules import compile_triage
+from atlas.utils.sampling import SAMPLE_WEIGHT_KEY, StratifiedSampler, Stratum, stratum_of
+from atlas.utils.sensitivity import sensitivity_settings
+
+# Anchors whose inline series are packed together for the segmented reductions.
+DEFAULT_BLOCK_SIZE = 256
 
 
 def load_json(path: Path) -> Dict[str, Any]:
@@ -39,8 +48,9 @@ def make_validators() -> Dict[str, jsonschema.Draft7Validator]:
     }
 
 
-def render_determinism(meta: StageMeta, anchor_id: str, rng) -> Dict[str, Any]:
+def render_determinism(meta: StageMeta, anchor_id: str, rng, thread_offset: int = 0) -> Dict[str, Any]:
     accel = detect_accelerator()
+    key, counter = substream_key(meta.seed, anchor_id, "determinism", thread_offset)
     aux = {
         "rng": "Philox",
         "seed": meta.seed,
@@ -48,6 +58,9 @@ def render_determinism(meta: StageMeta, anchor_id: str, rng) -> Dict[str, Any]:
         "accelerator": accel,
         "fma": "default",
         "bit_generator": type(rng.generator.bit_generator).__name__,
+        "parallel_mode": "counter",
+        "thread_offset": thread_offset,
+        "substream": {"key": list(key), "counter": list(counter)},
     }
     return stage_line(
         meta,
@@ -76,6 +89,111 @@ def render_cost(meta: StageMeta, anchor_id: str, tracker: CostTracker) -> Dict[s
     )
 
 
+def report_status(row: Dict[str, Any]) -> str:
+    """Row status for summaries, with gate-skipped placeholders counted as ``SKIPPED``."""
+    return "SKIPPED" if row.get("aux", {}).get("skipped") else row["status"]
+
+
+def render_gating_summary(
+    meta: StageMeta,
+    settings: Dict[str, Any],
+    anchors: int,
+    pruned: int,
+    by_stage: Dict[str, Dict[str, int]],
+) -> Dict[str, Any]:
+    """Pooled ``gating`` row: how many expensive-stage rows were computed vs skipped after SG-0."""
+    aux = {
+        "gate": "SG-0",
+        "stages": list(settings["stages"]),
+        "anchors": anchors,
+        "pruned_anchors": pruned,
+        "by_stage": by_stage,
+    }
+    return stage_line(
+        meta,
+        anchor_id="pooled",
+        stage="gating",
+        status="PASS",
+        metric="skipped_fraction",
+        value=pruned / anchors if anchors else 0.0,
+        threshold=None,
+        aux=aux,
+        notes="Skipped rows are INCONCLUSIVE with aux.skipped=true.",
+    )
+
+
+def render_sample_summary(
+    meta: StageMeta,
+    sampler: StratifiedSampler,
+    status_counts: Dict[str, Dict[Stratum, Dict[str, int]]],
+    class_counts: Dict[Stratum, Dict[str, int]],
+) -> Dict[str, Any]:
+    """Pooled ``sample`` row: stage statuses and triage classes scaled up to the full input."""
+    aux = sampler.summary()
+    aux["weight_key"] = SAMPLE_WEIGHT_KEY
+    aux["status_counts"] = {stage: sampler.scale_up(counts) for stage, counts in status_counts.items()}
+    aux["triage_classes"] = sampler.scale_up(class_counts)
+    return stage_line(
+        meta,
+        anchor_id="pooled",
+        stage="sample",
+        status="PASS",
+        metric="fraction",
+        value=sampler.fraction,
+        threshold=None,
+        aux=aux,
+        notes=f"Quick-look sample; triage rows carry aux.{SAMPLE_WEIGHT_KEY} for compute_roc --weight-key.",
+    )
+
+
+def block_inputs(
+    states: List[Dict[str, Any]],
+    cfg: Dict[str, Any],
+    meta: StageMeta,
+    skip: Optional[Sequence[Collection[str]]] = None,
+) -> List[Dict[str, Dict[str, Any]]]:
+    """Per-anchor stage keyword arguments computed for a whole block with the batched kernels.
+
+    Inline ``Delta_series``/``deltaN_series`` are packed into RaggedArrays and
+    reduced once per block; a ``Delta_series_file`` sidecar still wins and is
+    read by the delta stage itself.  ``deltaN_grid`` tables of anchors
+    without a deltaN series are differentiated together.  ``TG_protocol``
+    anchors run the TG-Ind protocol as a block, and the other gauge
+    matrices of the same shape share one stacked Gram product.  Stages in
+    ``skip[i]`` (pruned by SG-0) get no batched work for anchor ``i``.
+    """
+    skip = skip or [()] * len(states)
+    series = series_block(states, ("Delta_series", "deltaN_series"))
+    delta_stats = delta.series_stats_batch(series["Delta_series"])
+    guards = nmod.guard_metrics_batch(series["deltaN_series"])
+    n_lengths = series["deltaN_series"].lengths
+    gridded = [
+        i for i, state in enumerate(states)
+        if not n_lengths[i] and state.get("observables", {}).get("deltaN_grid") is not None
+    ]
+    derivatives = table_derivatives([states[i]["observables"]["deltaN_grid"] for i in gridded], cfg)
+    grid_results = dict(zip(gridded, derivatives))
+    gauged = [i for i in range(len(states)) if "tg_ind" not in skip[i]]
+    protocol = dict(zip(gauged, tg_ind.protocol_block([states[i] for i in gauged], cfg, meta)))
+    gauged = [i for i in gauged if protocol[i] is None]
+    residuals = dict(zip(gauged, tg_ind.gram_residuals_block([states[i] for i in gauged])))
+    inputs: List[Dict[str, Dict[str, Any]]] = []
+    for i, state in enumerate(states):
+        kwargs: Dict[str, Dict[str, Any]] = {"delta": {}, "nmod": {}, "tg_ind": {}, "tg_protocol": {}}
+        if not state.get("observables", {}).get("Delta_series_file"):
+            kwargs["delta"]["series_stats"] = delta_stats[i]
+        if n_lengths[i]:
+            kwargs["nmod"]["guard_metrics"] = guards[i]
+        elif grid_results.get(i) is not None:
+            kwargs["nmod"]["grid_derivative"] = grid_results[i]
+        if protocol.get(i) is not None:
+            kwargs["tg_protocol"] = protocol[i]
+        elif residuals.get(i) is not None:
+            kwargs["tg_ind"]["residuals"] = residuals[i]
+        inputs.append(kwargs)
+    return inputs
+
+
 def validate_stage(result: Dict[str, Any], validator: jsonschema.Draft7Validator) -> None:
     validator.validate(result)
 
@@ -87,13 +205,23 @@ def run_pipeline(
     *,
     profile: str = "default",
     seed: int = DEFAULT_SEED,
+    sample: Optional[float] = None,
+    block_size: int = DEFAULT_BLOCK_SIZE,
 ) -> List[Dict[str, Any]]:
+    """Evaluate every anchor of ``input_jsonl`` and write the StageResult log.
+
+    Anchors are evaluated ``block_size`` at a time so the series
+    reductions in :func:`block_inputs` run once per block.  With
+    ``sample`` only a :class:`StratifiedSampler` fraction of anchors is
+    evaluated, and a pooled ``sample`` row scales the counts back up.
+    """
     thresholds_hash = sha256_of_file(str(thresholds_path))
     thresholds = load_thresholds(thresholds_path, profile)
     validators = make_validators()
     commit = get_git_commit(str(thresholds_path.parent))
     meta = StageMeta(seed=seed, commit=commit, thresholds_sha256=thresholds_hash)
-    rng = make_rng(seed)
+    thread_offset = determinism_settings(thresholds)["thread_offset"]
+    probe = OpNormProbe(thresholds)
 
     if not input_jsonl.exists():
         fallback = Path("data/toy.jsonl")
@@ -101,38 +229,133 @@ def run_pipeline(
             input_jsonl = fallback
         else:
             raise FileNotFoundError(f"Input JSONL not found: {input_jsonl}")
+    # Relative sidecar paths in the states are relative to the input file.
+    series_dir = input_jsonl.parent
     output_jsonl.parent.mkdir(parents=True, exist_ok=True)
 
+    sensitivity_enabled = sensitivity_settings(thresholds)["enabled"]
+    pruning = sg.pruning_settings(thresholds)
+    compiled_triage = compile_triage(thresholds) if thresholds.get("triage", {}).get("rules") else None
+    gating_counts = {stage: {"computed": 0, "skipped": 0} for stage in pruning["stages"]}
+    gated = {"anchors": 0, "pruned": 0}
+    sensitivity_states: List[Dict[str, Any]] = []
+    rows_by_anchor: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    sampler = StratifiedSampler(sample, seed) if sample is not None else None
+    status_counts: Dict[str, Dict[Stratum, Dict[str, int]]] = {}
+    class_counts: Dict[Stratum, Dict[str, int]] = {}
+    sampled_triage: List[Tuple[Stratum, Dict[str, Any]]] = []
+
     all_rows: List[Dict[str, Any]] = []
-    for state in read_jsonl(str(input_jsonl)):
-        validators["state"].validate(state)
+
+    def pruned(sg0_row: Dict[str, Any]) -> bool:
+        return pruning["enabled"] and sg0_row["status"] == "FAIL"
+
+    def process(state: Dict[str, Any], sg0_row: Dict[str, Any], inputs: Dict[str, Dict[str, Any]]) -> None:
         anchor_id = state.get("id", "unknown")
         tracker = CostTracker()
 
         rows: List[Dict[str, Any]] = []
-        rows.append(render_determinism(meta, anchor_id, rng))
+        rng = anchor_rng(seed, anchor_id, "determinism", thread_offset)
+        rows.append(render_determinism(meta, anchor_id, rng, thread_offset))
+
+        prune = pruned(sg0_row)
+        gated["anchors"] += 1
+        gated["pruned"] += int(prune)
 
-        delta_row = delta.evaluate(state, thresholds, meta)
-        nmod_row = nmod.evaluate(state, thresholds, meta)
-        htop_row = htop.evaluate(state, thresholds, meta, delta_row, nmod_row)
+        def lazy(stage: str, compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+            if stage not in gating_counts:
+                return compute()
+            gating_counts[stage]["skipped" if prune else "computed"] += 1
+            return sg.skipped(state, meta, stage, sg0_row) if prune else compute()
+
+        delta_row = delta.evaluate(state, thresholds, meta, probe=probe, base_dir=series_dir, **inputs["delta"])
+        nmod_row = nmod.evaluate(state, thresholds, meta, **inputs["nmod"])
+        htop_row = lazy("htop", lambda: htop.evaluate(state, thresholds, meta, delta_row, nmod_row))
 
         rows.extend([delta_row, nmod_row, htop_row])
 
-        sg_rows = sg.evaluate(state, thresholds, meta, delta_row, nmod_row, htop_row)
+        sg_rows = sg.evaluate(state, thresholds, meta, delta_row, nmod_row, htop_row, sg0_row=sg0_row)
         rows.extend(sg_rows)
 
-        tg_row = tg_ind.evaluate(state, thresholds, meta)
-        kms_row = kms.evaluate(state, thresholds, meta)
+        tg_row = lazy(
+            "tg_ind",
+            lambda: inputs["tg_protocol"] or tg_ind.evaluate(state, thresholds, meta, **inputs["tg_ind"]),
+        )
+        kms_row = lazy("kms", lambda: kms.evaluate(state, thresholds, meta))
         rows.extend([tg_row, kms_row])
 
-        triage_row = triage.evaluate(state, thresholds, meta, delta_row, nmod_row, htop_row, tg_row, kms_row)
+        triage_row = triage.evaluate(
+            state,
+            thresholds,
+            meta,
+            delta_row,
+            nmod_row,
+            htop_row,
+            tg_row,
+            kms_row,
+            compiled=compiled_triage,
+        )
         rows.append(triage_row)
 
         rows.append(render_cost(meta, anchor_id, tracker))
 
+        if sampler is not None:
+            # Weights need the final stratum sizes, so they are filled in after the last anchor.
+            stratum = stratum_of(state)
+            sampled_triage.append((stratum, triage_row))
+            for r in rows:
+                per = status_counts.setdefault(r["stage"], {}).setdefault(stratum, {})
+                label = report_status(r)
+                per[label] = per.get(label, 0) + 1
+            per = class_counts.setdefault(stratum, {})
+            per[triage_row["aux"]["class"]] = per.get(triage_row["aux"]["class"], 0) + 1
+
         for r in rows:
             validate_stage(r, validators["stage"])
         all_rows.extend(rows)
+        if sensitivity_enabled and not triage_row["aux"].get("skipped"):
+            # Only the inputs of the cheap downstream decisions are kept for the Monte Carlo pass;
+            # anchors pruned before htop have no triage decision to perturb.
+            sensitivity_states.append({"id": anchor_id, "provenance": state.get("provenance", {})})
+            rows_by_anchor[anchor_id] = {r["stage"]: r for r in rows}
+
+    pending: List[Dict[str, Any]] = []
+
+    def flush() -> None:
+        for state in pending:
+            validators["state"].validate(state)
+        sanity = [sg.sanity(state, meta) for state in pending]
+        skip = [pruning["stages"] if pruned(row) else () for row in sanity]
+        for state, sg0_row, inputs in zip(pending, sanity, block_inputs(pending, thresholds, meta, skip)):
+            process(state, sg0_row, inputs)
+        pending.clear()
+
+    def submit(states: Iterable[Dict[str, Any]]) -> None:
+        for state in states:
+            pending.append(state)
+            if len(pending) >= block_size:
+                flush()
+        flush()
+
+    submit(state for state in read_jsonl(str(input_jsonl)) if sampler is None or sampler.offer(state))
+    if sampler is not None:
+        submit(sampler.backfill())
+        for stratum, triage_row in sampled_triage:
+            triage_row["aux"][SAMPLE_WEIGHT_KEY] = sampler.weight(stratum)
+
+    if sensitivity_states:
+        for r in sensitivity.evaluate_block(sensitivity_states, thresholds, meta, rows_by_anchor):
+            validate_stage(r, validators["stage"])
+            all_rows.append(r)
+    if pruning["enabled"]:
+        summary = render_gating_summary(meta, pruning, gated["anchors"], gated["pruned"], gating_counts)
+        validate_stage(summary, validators["stage"])
+        all_rows.append(summary)
+    if sampler is not None:
+        summary = render_sample_summary(meta, sampler, status_counts, class_counts)
+        validate_stage(summary, validators["stage"])
+        all_rows.append(summary)
     write_jsonl(str(output_jsonl), all_rows)
     return all_rows
 
@@ -144,12 +367,38 @@ def parse_args(argv: Iterable[str]) -> argparse.Namespace:
     parser.add_argument("output_jsonl", type=Path)
     parser.add_argument("--profile", default="default")
     parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
-    return parser.parse_args(list(argv))
+    parser.add_argument(
+        "--sample",
+        type=float,
+        default=None,
+        metavar="FRACTION",
+        help="Evaluate a hash-selected, stratified fraction of anchors and add a scaled-up summary row",
+    )
+    parser.add_argument(
+        "--block-size",
+        type=int,
+        default=DEFAULT_BLOCK_SIZE,
+        help="Anchors evaluated together by the batched series kernels",
+    )
+    args = parser.parse_args(list(argv))
+    if args.sample is not None and not 0.0 < args.sample <= 1.0:
+        parser.error("--sample must be in (0, 1]")
+    if args.block_size < 1:
+        parser.error("--block-size must be positive")
+    return args
 
 
 def main(argv: Iterable[str] | None = None) -> None:
     args = parse_args(argv or [])
-    run_pipeline(args.thresholds, args.input_jsonl, args.output_jsonl, profile=args.profile, seed=args.seed)
+    run_pipeline(
+        args.thresholds,
+        args.input_jsonl,
+        args.output_jsonl,
+        profile=args.profile,
+        seed=args.seed,
+        sample=args.sample,
+        block_size=args.block_size,
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from atlas.cli.run_pipeline import load_thresholds
+from atlas.io.jsonl import read_jsonl
+from atlas.utils.sweep import DEFAULT_SWEEP_BINS, SWEEP_STAGES, SWEPT, SweepCache, SweepResult, sweep_grid
+
+
+def grid_values(tokens: Optional[Sequence[str]]) -> Optional[np.ndarray]:
+    """Explicit values, or a single ``start:stop:num`` token expanded with ``linspace``."""
+    if not tokens:
+        return None
+    if len(tokens) == 1 and ":" in tokens[0]:
+        start, stop, num = tokens[0].split(":")
+        return np.linspace(float(start), float(stop), int(num))
+    return np.asarray([float(t) for t in tokens], dtype=np.float64)
+
+
+def load_cache(results_path: Path, cache_path: Optional[Path] = None) -> SweepCache:
+    """Extract the swept inputs from a results log once; reuse ``cache_path`` if it exists."""
+    if cache_path is not None and cache_path.exists():
+        return SweepCache.load(str(cache_path))
+    cache = SweepCache.from_stage_rows(read_jsonl(str(results_path), stages=SWEEP_STAGES))
+    if cache_path is not None:
+        cache.save(cache_path)
+    return cache
+
+
+def sweep_report(result: SweepResult, positives: Sequence[str], objectives: Sequence[str]) -> Dict[str, Any]:
+    return {
+        "anchors": result.anchors,
+        "positives": list(positives),
+        "bins": result.bins,
+        "grid": {name: axis.tolist() for name, axis in result.axes.items()},
+        "metrics": {name: value.tolist() for name, value in result.metrics.items()},
+        "pareto": {"objectives": list(objectives), "points": result.pareto(objectives)},
+    }
+
+
+def parse_args(argv: Iterable[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Sweep triage thresholds over a grid from one results log.")
+    parser.add_argument("thresholds", type=Path)
+    parser.add_argument("results_jsonl", type=Path)
+    parser.add_argument("out_json", type=Path)
+    parser.add_argument("--profile", default="default")
+    for name in SWEPT:
+        flag = "--" + name.replace("_", "-")
+        parser.add_argument(flag, dest=name, nargs="+", default=None, help=f"{name} values or start:stop:num")
+    parser.add_argument("--positives", nargs="*", default=["true_tear"])
+    parser.add_argument("--bins", type=int, default=DEFAULT_SWEEP_BINS, help="Confidence bins per ROC")
+    parser.add_argument(
+        "--objectives",
+        nargs="+",
+        default=["AUC", "best_J"],
+        choices=["AUC", "best_J", "pass_rate"],
+        help="Maximised metrics for the Pareto front",
+    )
+    parser.add_argument("--cache", type=Path, default=None, help="Reuse/write extracted stage values (.npz)")
+    return parser.parse_args(list(argv))
+
+
+def main(argv: Iterable[str] | None = None) -> None:
+    args = parse_args(argv or [])
+    if not args.results_jsonl.exists():
+        raise FileNotFoundError(f"results_jsonl not found: {args.results_jsonl}")
+    cfg = load_thresholds(args.thresholds, args.profile)
+    grid: Dict[str, List[float]] = {}
+    for name in SWEPT:
+        values = grid_values(getattr(args, name))
+        if values is not None:
+            grid[name] = values.tolist()
+    cache = load_cache(args.results_jsonl, args.cache)
+    result = sweep_grid(cache, cfg, grid, args.positives, bins=args.bins)
+    args.out_json.parent.mkdir(parents=True, exist_ok=True)
+    with args.out_json.open("w", encoding="utf-8") as f:
+        json.dump(sweep_report(result, args.positives, args.objectives), f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    import sys
+
+    main(sys.argv[1:])
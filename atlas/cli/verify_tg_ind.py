@@ -4,7 +4,7 @@ import argparse
 from pathlib import Path
 from typing import Iterable, List
 
-from atlas.cli.run_pipeline import load_thresholds, make_validators
+from atlas.cli.run_pipeline import DEFAULT_BLOCK_SIZE, load_thresholds, make_validators
 from atlas.io.jsonl import read_jsonl, write_jsonl
 from atlas.stages import tg_ind
 from atlas.utils.logging import StageMeta, get_git_commit, sha256_of_file
@@ -17,6 +17,7 @@ def parse_args(argv: Iterable[str]) -> argparse.Namespace:
     parser.add_argument("output_jsonl", type=Path)
     parser.add_argument("--profile", default="default")
     parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE, help="Anchors verified per batch")
     return parser.parse_args(list(argv))
 
 
@@ -33,11 +34,21 @@ def main(argv: Iterable[str] | None = None) -> None:
     args.output_jsonl.parent.mkdir(parents=True, exist_ok=True)
 
     rows: List[dict] = []
+    block: List[dict] = []
+
+    def flush() -> None:
+        # TG_protocol anchors run the full verify_TG_Ind protocol; others check TG_matrix.
+        for result in tg_ind.evaluate_block(block, thresholds, meta):
+            validators["stage"].validate(result)
+            rows.append(result)
+        block.clear()
+
     for state in read_jsonl(str(args.input_jsonl)):
         validators["state"].validate(state)
-        result = tg_ind.evaluate(state, thresholds, meta)
-        validators["stage"].validate(result)
-        rows.append(result)
+        block.append(state)
+        if len(block) >= max(1, args.block_size):
+            flush()
+    flush()
     write_jsonl(str(args.output_jsonl), rows)
 
 
@@ -2,11 +2,81 @@ from __future__ import annotations
 
 import json
 import os
-from typing import Any, Dict, Iterable, Iterator
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-def read_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+def stage_tokens(stages: Iterable[str]) -> Tuple[bytes, ...]:
+    """Byte forms a serialized ``"stage"`` value can take without JSON escapes."""
+    tokens = set()
+    for stage in stages:
+        tokens.add(json.dumps(stage, ensure_ascii=False).encode("utf-8"))
+        tokens.add(json.dumps(stage).encode("utf-8"))
+    return tuple(tokens)
+
+
+def _candidate_lines(block: bytes, needles: Sequence[bytes], lo: int = 0, hi: int = -1) -> List[bytes]:
+    """Lines of ``block[lo:hi]`` containing any needle, found with ``bytes.find`` (no per-line loop)."""
+    hi = len(block) if hi < 0 else hi
+    spans = set()
+    for needle in needles:
+        pos = block.find(needle, lo, hi)
+        while pos != -1:
+            start = max(block.rfind(b"\n", lo, pos) + 1, lo)
+            end = block.find(b"\n", pos, hi)
+            end = hi if end == -1 else end
+            spans.add((start, end))
+            pos = block.find(needle, end, hi)
+    return [block[start:end] for start, end in sorted(spans)]
+
+
+def _read_stage_rows(path: str, stages: Iterable[str], block_size: int) -> Iterator[Dict[str, Any]]:
+    wanted = set(stages)
+    # A row can only carry one of ``stages`` if its quoted value appears
+    # verbatim; lines with any escape are decoded too, which keeps this exact.
+    needles = stage_tokens(wanted) + (b"\\",)
+    tail = b""
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(block_size)
+            if not chunk:
+                lines = _candidate_lines(tail, needles)
+            else:
+                # Only the line straddling the previous block is copied.
+                first = chunk.find(b"\n")
+                if first == -1:
+                    tail += chunk
+                    continue
+                last = chunk.rfind(b"\n")
+                lines = _candidate_lines(tail + chunk[: first + 1], needles)
+                lines += _candidate_lines(chunk, needles, first + 1, last + 1)
+                tail = chunk[last + 1 :]
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                row = json.loads(line)
+                if row.get("stage") in wanted:
+                    yield row
+            if not chunk:
+                return
+
+
+def read_jsonl(
+    path: str,
+    stages: Optional[Iterable[str]] = None,
+    *,
+    block_size: int = 1 << 20,
+) -> Iterator[Dict[str, Any]]:
+    """Yield rows of a JSONL file; with ``stages`` only rows whose ``stage`` is listed.
+
+    The stage filter locates candidate lines on raw bytes, ``block_size`` at
+    a time, before decoding them, so scanning a results log for one stage
+    skips the per-line and JSON cost of the rest.
+    """
     if not os.path.exists(path):
         raise FileNotFoundError(f"JSONL not found: {path}")
+    if stages is not None:
+        yield from _read_stage_rows(path, stages, block_size)
+        return
     with open(path, 'r', encoding='utf-8') as f:
         for line in f:
             line=line.strip()
@@ -19,3 +89,4 @@ def write_jsonl(path: str, rows: Iterable[Dict[str, Any]]) -> None:
     with open(path, 'w', encoding='utf-8') as f:
         for r in rows:
             f.write(json.dumps(r, ensure_ascii=False) + "\n")
+
@@ -1,4 +1,4 @@
-from . import delta, htop, kms, nmod, sg, tg_ind, triage
+from . import anchor, delta, htop, kms, nmod, sensitivity, sg, tg_ind, triage
 
 __all__ = [
     "delta",
@@ -8,4 +8,6 @@ __all__ = [
     "tg_ind",
     "kms",
     "triage",
+    "anchor",
+    "sensitivity",
 ]
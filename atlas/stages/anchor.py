@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from atlas.utils.anchor_index import AnchorIndex, params_matrix
+from atlas.utils.logging import StageMeta, stage_line
+
+
+def distance_levels(distances: np.ndarray, warn: float, hard: float) -> np.ndarray:
+    """Map distances to ``OK``/``WARN``/``HARD`` (``NONE`` when no distance is available)."""
+    levels = np.full(distances.shape, "OK", dtype=object)
+    levels[distances >= warn] = "WARN"
+    levels[distances >= hard] = "HARD"
+    levels[~np.isfinite(distances)] = "NONE"
+    return levels
+
+
+def evaluate_block(
+    states: Sequence[Dict[str, Any]],
+    cfg: Dict[str, Any],
+    meta: StageMeta,
+    index: AnchorIndex,
+) -> List[Dict[str, Any]]:
+    """Nearest external anchor for every state in the block with one batched tree query."""
+    warn = float(cfg.get("anchor_distance_warn", 0.15))
+    hard = float(cfg.get("anchor_distance_hard", 0.3))
+    ids, distances = index.query(params_matrix(states, index.names))
+    levels = distance_levels(distances, warn, hard)
+    status_map = {"OK": "PASS", "WARN": "WARN", "HARD": "FAIL", "NONE": "INCONCLUSIVE"}
+    notes_map = {
+        "OK": "",
+        "WARN": "Nearest anchor beyond anchor_distance_warn.",
+        "HARD": "Nearest anchor beyond anchor_distance_hard.",
+        "NONE": "Params missing or non-finite.",
+    }
+    rows: List[Dict[str, Any]] = []
+    for state, anchor, dist, level in zip(states, ids, distances, levels):
+        aux = {
+            "nearest_anchor": anchor,
+            "distance": float(dist) if np.isfinite(dist) else None,
+            "level": level,
+            "metric": "relative_l2",
+            "params": list(index.names),
+            "scales": [float(s) for s in index.scales],
+            "scale_source": index.scale_source,
+            "index_digest": index.digest,
+            "anchor_distance_warn": warn,
+            "anchor_distance_hard": hard,
+        }
+        rows.append(
+            stage_line(
+                meta,
+                anchor_id=state.get("id", "unknown"),
+                stage="anchor_distance",
+                status=status_map[level],
+                metric="anchor_distance",
+                value=dist,
+                threshold=hard,
+                aux=aux,
+                notes=notes_map[level],
+            )
+        )
+    return rows
@@ -1,26 +1,80 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Iterable
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
 
 import numpy as np
 
 from atlas.utils.logging import StageMeta, stage_line
+from atlas.utils.op_norm import OpNormProbe
+from atlas.utils.ragged import RaggedArray
+from atlas.utils.streaming import RunningStats
 
 
 def _series_stats(series: Iterable[float]) -> Dict[str, Any]:
-    arr = np.asarray(list(series), dtype=np.float64)
-    if arr.size == 0:
-        return {"count": 0}
-    return {
-        "count": int(arr.size),
-        "min": float(np.min(arr)),
-        "max": float(np.max(arr)),
-        "mean": float(np.mean(arr)),
-        "std": float(np.std(arr, ddof=1)) if arr.size > 1 else 0.0,
-    }
-
-
-def evaluate(state: Dict[str, Any], cfg: Dict[str, Any], meta: StageMeta) -> Dict[str, Any]:
+    return RunningStats.from_values(series).as_series_stats()
+
+
+def _load_series(observables: Dict[str, Any], base_dir: Optional[Path] = None) -> Optional[Iterable[float]]:
+    """Inline series, or the ``Delta_series_file`` sidecar resolved against ``base_dir``.
+
+    ``.npy`` sidecars are memory-mapped.  An ``.npz`` sidecar must name its
+    array in ``Delta_series_key`` unless it holds exactly one.
+    """
+    sidecar = observables.get("Delta_series_file")
+    if sidecar:
+        path = Path(sidecar)
+        if base_dir is not None and not path.is_absolute():
+            path = Path(base_dir) / path
+        if path.suffix != ".npz":
+            return np.load(path, mmap_mode="r")
+        with np.load(path) as archive:
+            key = observables.get("Delta_series_key")
+            if key is None and len(archive.files) == 1:
+                key = archive.files[0]
+            if key not in archive.files:
+                raise KeyError(f"{path.name} has no array {key!r}; set Delta_series_key to one of {archive.files}")
+            return archive[key]
+    return (
+        observables.get("Delta_series")
+        or observables.get("Delta_samples")
+        or observables.get("delta_series")
+    )
+
+
+def series_stats_batch(series: RaggedArray) -> List[Dict[str, Any]]:
+    """``_series_stats`` for every segment of a RaggedArray using segmented reductions."""
+    counts = series.lengths
+    mins = series.segment_min()
+    maxs = series.segment_max()
+    means = series.segment_mean()
+    stds = series.segment_std(ddof=1)
+    out: List[Dict[str, Any]] = []
+    for i, count in enumerate(counts):
+        if count == 0:
+            out.append({"count": 0})
+            continue
+        out.append(
+            {
+                "count": int(count),
+                "min": float(mins[i]),
+                "max": float(maxs[i]),
+                "mean": float(means[i]),
+                "std": float(stds[i]),
+            }
+        )
+    return out
+
+
+def evaluate(
+    state: Dict[str, Any],
+    cfg: Dict[str, Any],
+    meta: StageMeta,
+    *,
+    probe: Optional[OpNormProbe] = None,
+    base_dir: Optional[Path] = None,
+    series_stats: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
     observables = state.get("observables", {})
     anchor_id = state.get("id", "unknown")
     tau = float(cfg.get("tau_delta", 0.15))
@@ -29,22 +83,61 @@ def evaluate(state: Dict[str, Any], cfg: Dict[str, Any], meta: StageMeta) -> Dic
         delta_value = float(value)
     except (TypeError, ValueError):
         delta_value = float("nan")
-    series = (
-        observables.get("Delta_series")
-        or observables.get("Delta_samples")
-        or observables.get("delta_series")
-    )
-    aux: Dict[str, Any] = {"tau_delta": tau, "series_available": bool(series)}
-    if series:
-        aux["series_stats"] = _series_stats(series)
+    series_error = None
+    # Block callers pass the inline series' stats from series_stats_batch.
+    if series_stats is None:
+        try:
+            series = _load_series(observables, base_dir)
+        except (KeyError, OSError, ValueError) as exc:
+            series = None
+            series_error = f"{type(exc).__name__}: {exc}"
+        if isinstance(series, np.ndarray):
+            available = series.size > 0
+        else:
+            available = bool(series)
+        if available:
+            series_stats = _series_stats(series)
+    else:
+        available = series_stats.get("count", 0) > 0
+    aux: Dict[str, Any] = {"tau_delta": tau, "series_available": available}
+    if available:
+        aux["series_stats"] = series_stats
+    if series_error is not None:
+        aux["series_error"] = series_error
+    operator = observables.get("Delta_operator")
+    probe_converged = True
+    from_probe = False
+    chart_cfg = cfg.get("delta_chart", {})
+    if probe is None:
+        probe = OpNormProbe(cfg)
+    if operator is not None and probe.enabled:
+        result = probe.run(np.asarray(operator, dtype=np.float64))
+        probe_converged = result.converged
+        aux["op_probe"] = result.as_aux()
+        aux["norm_bridge"] = chart_cfg.get("norm_bridge", "hs_to_op")
+        if chart_cfg.get("report_op_norm_proxy", True):
+            aux["op_norm_proxy"] = result.estimate
+        # Substituting the probe for a non-finite Delta is opt-in and flagged on the row.
+        if chart_cfg.get("op_norm_fallback", False) and not np.isfinite(delta_value) and result.converged:
+            delta_value = result.estimate
+            from_probe = True
+            aux["delta_source"] = "op_norm_proxy"
     status = "PASS"
     notes = ""
     if not np.isfinite(delta_value):
         status = "FAIL"
         notes = "Delta is not finite."
+    elif series_error is not None:
+        status = "INCONCLUSIVE"
+        notes = "Delta_series_file could not be read."
     elif delta_value > tau:
         status = "WARN"
         notes = "Delta exceeds tolerance."
+    elif not probe_converged and probe.on_nonconverge == "INCONCLUSIVE":
+        status = "INCONCLUSIVE"
+        notes = "Operator-norm probe did not converge."
+    if from_probe:
+        notes = (notes + " " if notes else "") + "Delta taken from the operator-norm probe."
     aux["delta_chart"] = delta_value
     return stage_line(
         meta,
@@ -4,6 +4,7 @@ from typing import Any, Dict, Iterable, Optional
 
 import numpy as np
 
+from atlas.utils.holonomy import HolonomyBatch, holonomy_from_observables
 from atlas.utils.logging import StageMeta, stage_line
 from atlas.utils.plateau import theil_sen_plateau
 from atlas.utils.richardson import richardson_error
@@ -21,8 +22,18 @@ def evaluate(
     meta: StageMeta,
     delta_row: Dict[str, Any],
     nmod_row: Dict[str, Any],
+    *,
+    holonomy: Optional[HolonomyBatch] = None,
 ) -> Dict[str, Any]:
     observables = state.get("observables", {})
+    holonomy_error = None
+    if holonomy is None and observables.get("holonomy_loops") is not None:
+        try:
+            holonomy = holonomy_from_observables(observables["holonomy_loops"], cfg)
+        except (KeyError, TypeError, ValueError) as exc:
+            holonomy_error = f"{type(exc).__name__}: {exc}"
+    if holonomy is not None:
+        observables = {**observables, **holonomy.observables()}
     anchor_id = state.get("id", "unknown")
     h_obs = observables.get("H_obs")
     try:
@@ -95,6 +106,14 @@ def evaluate(
         "H_lb": h_lb,
         "lower_bound_min": lb_floor,
     }
+    if holonomy is not None:
+        aux["holonomy"] = {
+            "loops": int(holonomy.holonomy.shape[0]),
+            "resolutions": [int(r) for r in holonomy.resolutions],
+            "generator_calls": holonomy.generator_calls,
+        }
+    if holonomy_error is not None:
+        aux["holonomy_error"] = holonomy_error
     if h_series.size:
         aux["series_tail"] = [float(x) for x in h_series[-5:]]
 
@@ -4,9 +4,16 @@ from typing import Any, Dict
 
 import numpy as np
 
+from atlas.utils.kms_compat import COMPAT_METHODS, kms_compat
 from atlas.utils.logging import StageMeta, stage_line
 
 
+def _operator(value: Any) -> np.ndarray:
+    """Dense operator observable; complex entries keep their imaginary part."""
+    arr = np.asarray(value)
+    return arr.astype(np.complex128 if np.iscomplexobj(arr) else np.float64)
+
+
 def evaluate(state: Dict[str, Any], cfg: Dict[str, Any], meta: StageMeta) -> Dict[str, Any]:
     anchor_id = state.get("id", "unknown")
     observables = state.get("observables", {})
@@ -16,6 +23,28 @@ def evaluate(state: Dict[str, Any], cfg: Dict[str, Any], meta: StageMeta) -> Dic
     commutator = observables.get("commutator_bound")
     pmax = observables.get("pmax")
     spectral = observables.get("spectral_radius")
+    compat = None
+    unsupported = None
+    malformed = False
+    modular = observables.get("modular_operator")
+    generator = observables.get("connection_generator")
+    method = kms_cfg.get("compat_test", {}).get("method", "commutator_bound")
+    if commutator is None and modular is not None and generator is not None and method not in COMPAT_METHODS:
+        unsupported = method
+    elif commutator is None and modular is not None and generator is not None:
+        try:
+            modular_op = _operator(modular)
+            generator_op = _operator(generator)
+        except (TypeError, ValueError):
+            malformed = True
+        else:
+            square = modular_op.ndim == 2 and modular_op.shape[0] == modular_op.shape[1]
+            malformed = not square or generator_op.shape != modular_op.shape
+        if not malformed:
+            compat = kms_compat(modular_op, generator_op, cfg, seed=int(meta.seed))
+            commutator = compat["commutator_bound"]
+            if spectral is None:
+                spectral = compat["spectral_radius"]
 
     status = "PASS"
     notes = ""
@@ -43,9 +72,17 @@ def evaluate(state: Dict[str, Any], cfg: Dict[str, Any], meta: StageMeta) -> Dic
     if comm_val is None:
         status = "INCONCLUSIVE"
         notes = "Commutator bound unavailable."
+        if unsupported is not None:
+            notes = f"Unsupported kms.compat_test.method: {unsupported}."
+        elif malformed:
+            notes = "Modular operator or connection generator malformed."
     elif comm_val > comm_max:
         status = "WARN"
         notes = "Commutator exceeds bound."
+    elif compat is not None and not compat["converged"]:
+        # The probe is a lower bound, so an unconverged value below the limit proves nothing.
+        status = "INCONCLUSIVE"
+        notes = "Commutator probe did not converge below the bound."
 
     if p_val is not None and p_val > pmax_tol:
         status = "WARN"
@@ -60,6 +97,8 @@ def evaluate(state: Dict[str, Any], cfg: Dict[str, Any], meta: StageMeta) -> Dic
         "policy": policy,
         "spectral_radius": spectral,
     }
+    if compat is not None:
+        aux["compat_test"] = compat["diagnostics"]
 
     return stage_line(
         meta,
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Iterable
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import numpy as np
 
+from atlas.utils.finite_diff import table_derivative
 from atlas.utils.logging import StageMeta, stage_line
+from atlas.utils.ragged import RaggedArray
 
 
 def _guard_metrics(series: Iterable[float]) -> Dict[str, Any]:
@@ -20,7 +22,35 @@ def _guard_metrics(series: Iterable[float]) -> Dict[str, Any]:
     return metrics
 
 
-def evaluate(state: Dict[str, Any], cfg: Dict[str, Any], meta: StageMeta) -> Dict[str, Any]:
+def guard_metrics_batch(series: RaggedArray) -> List[Dict[str, Any]]:
+    """``_guard_metrics`` for every segment of a RaggedArray using segmented reductions."""
+    counts = series.lengths
+    diffs = series.diff()
+    disagreement = np.abs(series.last(1) - series.last(2))
+    oscillations = diffs.sign_changes()
+    max_step = diffs.segment_max_abs()
+    max_abs = series.segment_max_abs()
+    out: List[Dict[str, Any]] = []
+    for i, count in enumerate(counts):
+        metrics: Dict[str, Any] = {"count": int(count)}
+        if count >= 2:
+            metrics["order_disagreement"] = float(disagreement[i])
+        if count >= 3:
+            metrics["oscillations"] = int(oscillations[i])
+            metrics["max_step"] = float(max_step[i])
+        metrics["max_abs"] = float(max_abs[i])
+        out.append(metrics)
+    return out
+
+
+def evaluate(
+    state: Dict[str, Any],
+    cfg: Dict[str, Any],
+    meta: StageMeta,
+    *,
+    guard_metrics: Optional[Dict[str, Any]] = None,
+    grid_derivative: Optional[Tuple[Dict[str, Any], float]] = None,
+) -> Dict[str, Any]:
     observables = state.get("observables", {})
     anchor_id = state.get("id", "unknown")
     tau = float(cfg.get("tau_n", 0.05))
@@ -48,9 +78,19 @@ def evaluate(state: Dict[str, Any], cfg: Dict[str, Any], meta: StageMeta) -> Dic
     status = "PASS"
     notes = ""
 
+    if guard_metrics is None and not series and observables.get("deltaN_grid") is not None:
+        # Block callers pass the result of finite_diff.table_derivatives.
+        if grid_derivative is None:
+            derivative = table_derivative(observables["deltaN_grid"], cfg)
+            if derivative is not None:
+                grid_derivative = (derivative.row_metrics(0), float(derivative.value[0]))
+        if grid_derivative is not None:
+            guard_metrics, aux["richardson_estimate"] = grid_derivative
+            aux["guard_source"] = "finite_diff"
+
     guard_pass = True
-    if series:
-        metrics = _guard_metrics(series)
+    if guard_metrics is not None or series:
+        metrics = guard_metrics if guard_metrics is not None else _guard_metrics(series)
         aux["guard_metrics"] = metrics
         if metrics.get("order_disagreement", 0.0) and metrics["order_disagreement"] > order_tol:
             guard_pass = False
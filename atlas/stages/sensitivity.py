@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Mapping, Sequence
+
+import numpy as np
+
+from atlas.utils.logging import StageMeta, stage_line
+from atlas.utils.rng import determinism_settings
+from atlas.utils.sensitivity import (
+    PERTURBED,
+    STATUS_NAMES,
+    CachedDecisions,
+    ci_sigmas,
+    run_sensitivity,
+    sensitivity_settings,
+    triage_labels,
+)
+
+
+def evaluate_block(
+    states: Sequence[Dict[str, Any]],
+    cfg: Dict[str, Any],
+    meta: StageMeta,
+    rows_by_anchor: Mapping[str, Mapping[str, Dict[str, Any]]],
+) -> List[Dict[str, Any]]:
+    """``provenance.sensitivity`` rows for a block, reusing the already computed stage rows."""
+    settings = sensitivity_settings(cfg)
+    ids = [state.get("id", "unknown") for state in states]
+    cached = CachedDecisions.from_rows({anchor_id: rows_by_anchor.get(anchor_id, {}) for anchor_id in ids})
+    sigmas = ci_sigmas(states, settings["z"])
+    result = run_sensitivity(
+        cached,
+        sigmas,
+        cfg,
+        samples=settings["samples"],
+        mode=settings["mode"],
+        seed=int(meta.seed),
+        thread_offset=determinism_settings(cfg)["thread_offset"],
+    )
+    classes = triage_labels(cfg)
+    threshold = settings["flip_rate_threshold"]
+    headline = result.max_flip_rate
+    rows: List[Dict[str, Any]] = []
+    for j, anchor_id in enumerate(ids):
+        varied = {name: float(sigmas[q, j]) for q, name in enumerate(PERTURBED) if sigmas[q, j] > 0.0}
+        aux: Dict[str, Any] = {
+            "method": "monte_carlo",
+            "samples": result.samples,
+            "joint_vs_marginal": result.mode,
+            "sigma": varied,
+            "baseline": {
+                key: classes[int(value[j])] if key == "triage" else str(STATUS_NAMES[int(value[j])])
+                for key, value in result.baseline.items()
+            },
+            "flip_rates": {key: float(value[j]) for key, value in result.flip_rates.items()},
+            "flip_rate_threshold": threshold,
+        }
+        if settings["report_effect_on_passfail"]:
+            aux["passfail_flip_rate"] = float(result.passfail_flip_rate[j])
+        if result.marginal:
+            aux["marginal_flip_rates"] = {
+                name: {key: float(value[j]) for key, value in rates.items()}
+                for name, rates in result.marginal.items()
+            }
+        if not varied:
+            status, notes = "INCONCLUSIVE", "No provenance.ci_95 for perturbed observables."
+        elif headline[j] > threshold:
+            status, notes = "WARN", "Decision flips exceed flip_rate_threshold within the anchor CI."
+        else:
+            status, notes = "PASS", ""
+        rows.append(
+            stage_line(
+                meta,
+                anchor_id=anchor_id,
+                stage="sensitivity",
+                status=status,
+                metric="flip_rate",
+                value=float(headline[j]) if varied else np.nan,
+                threshold=threshold,
+                aux=aux,
+                notes=notes,
+            )
+        )
+    return rows
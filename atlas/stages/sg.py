@@ -1,14 +1,94 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+import copy
+from typing import Any, Dict, List, Mapping, Optional
 
 import numpy as np
 
 from atlas.utils.logging import StageMeta, stage_line
 
 
+# Expensive stages that may be short-circuited when SG-0 fails, with their metric names
+# and the aux fields other readers (codex F1, SG-2, triage) expect, left undetermined.
+PRUNABLE = ("htop", "tg_ind", "kms")
+_SKIP_METRIC = {"htop": "H_obs", "tg_ind": "verification", "kms": "compatibility"}
+_SKIP_AUX: Dict[str, Dict[str, Any]] = {
+    "htop": {
+        "plateau_detected": None,
+        "H_lb": None,
+        "error_budget": {"E_disc": None, "E_loc": None, "E_resp": None, "total": None},
+    },
+    "tg_ind": {"frobenius_resid": None, "orthogonality_resid": None},
+    "kms": {"commutator_bound": None},
+}
+
+
+# Scalar observables SG-0 requires; series and operator observables are left to their stages.
+REQUIRED_SCALARS = ("Delta", "deltaN", "H_obs")
+
+
 def _finite(*values: Any) -> bool:
-    return all(np.isfinite(float(v)) for v in values if v is not None)
+    """True when every non-None value is a finite real scalar; anything else counts as non-finite."""
+    for v in values:
+        if v is None:
+            continue
+        if isinstance(v, (str, bytes)):
+            return False
+        try:
+            if not np.isfinite(float(v)):
+                return False
+        except (TypeError, ValueError):
+            return False
+    return True
+
+
+def pruning_settings(cfg: Mapping[str, Any]) -> Dict[str, Any]:
+    """``gating`` block of a profile: whether a failed SG-0 skips the expensive stages."""
+    gating = cfg.get("gating", {})
+    stages = tuple(gating.get("prune_stages", PRUNABLE))
+    unknown = sorted(set(stages) - set(PRUNABLE))
+    if unknown:
+        raise ValueError(f"Unsupported gating.prune_stages: {unknown}")
+    return {"enabled": bool(gating.get("lazy_pruning", False)), "stages": stages}
+
+
+def sanity(state: Dict[str, Any], meta: StageMeta) -> Dict[str, Any]:
+    """SG-0 row; it only reads the observables, so it can run before any metric stage."""
+    anchor_id = state.get("id", "unknown")
+    observables = state.get("observables", {})
+    missing = sorted(k for k in REQUIRED_SCALARS if k not in observables)
+    finite = _finite(*(observables.get(k) for k in REQUIRED_SCALARS))
+    status = "PASS" if not missing and finite else "FAIL"
+    aux0 = {"missing": missing, "finite": finite}
+    notes = "" if status == "PASS" else "Missing or non-finite observables."
+    return stage_line(
+        meta,
+        anchor_id=anchor_id,
+        stage="SG-0",
+        status=status,
+        metric="sanity",
+        value=None,
+        threshold=None,
+        aux=aux0,
+        notes=notes,
+    )
+
+
+def skipped(state: Dict[str, Any], meta: StageMeta, stage: str, sg0_row: Dict[str, Any]) -> Dict[str, Any]:
+    """Cheap INCONCLUSIVE placeholder for ``stage`` when SG-0 already failed."""
+    aux = {"skipped": True, "gate": "SG-0", "missing": sg0_row["aux"].get("missing", [])}
+    aux.update(copy.deepcopy(_SKIP_AUX.get(stage, {})))
+    return stage_line(
+        meta,
+        anchor_id=state.get("id", "unknown"),
+        stage=stage,
+        status="INCONCLUSIVE",
+        metric=_SKIP_METRIC[stage],
+        value=None,
+        threshold=None,
+        aux=aux,
+        notes="Skipped: SG-0 found missing or non-finite observables.",
+    )
 
 
 def evaluate(
@@ -18,37 +98,14 @@ def evaluate(
     delta_row: Dict[str, Any],
     nmod_row: Dict[str, Any],
     htop_row: Dict[str, Any],
+    *,
+    sg0_row: Optional[Dict[str, Any]] = None,
 ) -> List[Dict[str, Any]]:
     anchor_id = state.get("id", "unknown")
-    observables = state.get("observables", {})
-
-    results: List[Dict[str, Any]] = []
-
-    required_keys = {"Delta", "deltaN", "H_obs"}
-    missing = sorted(k for k in required_keys if k not in observables)
-    status = "PASS" if not missing and _finite(*observables.values()) else "FAIL"
-    aux0 = {
-        "missing": missing,
-        "finite": _finite(
-            observables.get("Delta"),
-            observables.get("deltaN"),
-            observables.get("H_obs"),
-        ),
-    }
-    notes = "" if status == "PASS" else "Missing or non-finite observables."
-    results.append(
-        stage_line(
-            meta,
-            anchor_id=anchor_id,
-            stage="SG-0",
-            status=status,
-            metric="sanity",
-            value=None,
-            threshold=None,
-            aux=aux0,
-            notes=notes,
-        )
-    )
+    if sg0_row is None:
+        sg0_row = sanity(state, meta)
+    status = sg0_row["status"]
+    results: List[Dict[str, Any]] = [sg0_row]
 
     status1 = "PASS"
     notes1 = ""
@@ -81,7 +138,11 @@ def evaluate(
     h_lb = htop_row.get("aux", {}).get("H_lb")
     status2 = "PASS"
     notes2 = ""
-    if not plateau:
+    if htop_row.get("aux", {}).get("skipped"):
+        # No plateau decision was made; SG-3 already fails on SG-0.
+        status2 = "INCONCLUSIVE"
+        notes2 = "htop skipped after SG-0 failure."
+    elif not plateau:
         status2 = "WARN"
         notes2 = "Plateau not confirmed."
     if not _finite(h_lb):
@@ -1,14 +1,85 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
 
 from atlas.utils.logging import StageMeta, stage_line
+from atlas.utils.rules import CompiledTriage, compile_triage
+
+
+# Class of anchors whose htop row was pruned by the SG-0 gate.
+SKIPPED_CLASS = "skipped"
 
 
 def _clamp(value: float, lo: float = 0.0, hi: float = 1.0) -> float:
     return float(max(lo, min(hi, value)))
 
 
+def _metric(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def classify_block(
+    delta_chart: Sequence[float],
+    abs_delta_n: Sequence[float],
+    plateau: Sequence[bool],
+    cfg: Dict[str, Any],
+    *,
+    compiled: Optional[CompiledTriage] = None,
+) -> Dict[str, np.ndarray]:
+    """Apply the compiled ``triage.rules`` to whole arrays of anchors at once."""
+    if compiled is None:
+        compiled = compile_triage(cfg)
+    return compiled.evaluate(
+        {
+            "delta_chart": np.asarray(delta_chart, dtype=np.float64),
+            "abs_delta_N": np.asarray(abs_delta_n, dtype=np.float64),
+            "H_plateau": np.asarray(plateau, dtype=np.float64),
+        }
+    )
+
+
+def _skipped(
+    anchor_id: str,
+    meta: StageMeta,
+    delta_row: Dict[str, Any],
+    nmod_row: Dict[str, Any],
+    tg_row: Dict[str, Any],
+    kms_row: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Explicit ``skipped`` class when htop was pruned: there is no plateau to classify with.
+
+    ``confidence`` is ``None``, so ROC readers drop the row rather than scoring a guess.
+    """
+    aux = {
+        "class": SKIPPED_CLASS,
+        "confidence": None,
+        "plateau": None,
+        "delta_status": delta_row.get("status"),
+        "nmod_status": nmod_row.get("status"),
+        "tg_ind_status": tg_row.get("status"),
+        "kms_status": kms_row.get("status"),
+        "H_lb": None,
+        "priority_index": -1,
+        "skipped": True,
+    }
+    return stage_line(
+        meta,
+        anchor_id=anchor_id,
+        stage="triage",
+        status="INCONCLUSIVE",
+        metric="class",
+        value=None,
+        threshold=None,
+        aux=aux,
+        notes="htop skipped after SG-0 failure; not classified.",
+    )
+
+
 def evaluate(
     state: Dict[str, Any],
     cfg: Dict[str, Any],
@@ -18,8 +89,12 @@ def evaluate(
     htop_row: Dict[str, Any],
     tg_row: Dict[str, Any],
     kms_row: Dict[str, Any],
+    *,
+    compiled: Optional[CompiledTriage] = None,
 ) -> Dict[str, Any]:
     anchor_id = state.get("id", "unknown")
+    if htop_row.get("aux", {}).get("skipped"):
+        return _skipped(anchor_id, meta, delta_row, nmod_row, tg_row, kms_row)
     tau_delta = float(cfg.get("tau_delta", 0.15))
     tau_n = float(cfg.get("tau_n", 0.05))
     delta_value = delta_row.get("aux", {}).get("delta_chart")
@@ -49,6 +124,13 @@ def evaluate(
 
     confidence = _clamp(0.5 * (delta_ratio + n_ratio) + (0.5 if plateau else 0.0))
 
+    triage_cfg = cfg.get("triage", {})
+    if triage_cfg.get("rules"):
+        # Rule profiles classify on the raw metrics, not on stage statuses (see compile_triage).
+        block = classify_block([_metric(delta_value)], [_metric(abs_delta_n)], [plateau], cfg, compiled=compiled)
+        cls = str(block["class"][0])
+        confidence = float(block["confidence"][0])
+
     aux = {
         "class": cls,
         "confidence": confidence,
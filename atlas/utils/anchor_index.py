@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from atlas.io.jsonl import read_jsonl
+from atlas.utils.streaming import DEFAULT_CHUNK, DEFAULT_SKETCH_K, QuantileSketch
+
+DEFAULT_PARAMS = ("J", "h", "beta")
+
+
+def params_matrix(states: Iterable[Mapping[str, Any]], names: Sequence[str]) -> np.ndarray:
+    """Stack ``state["params"]`` into an ``(N, len(names))`` float64 matrix (NaN where missing)."""
+    rows: List[List[float]] = []
+    for state in states:
+        params = state.get("params", {}) or {}
+        row = []
+        for name in names:
+            try:
+                row.append(float(params[name]))
+            except (KeyError, TypeError, ValueError):
+                row.append(float("nan"))
+        rows.append(row)
+    return np.asarray(rows, dtype=np.float64).reshape(len(rows), len(names))
+
+
+def mad_scales(points: np.ndarray) -> np.ndarray:
+    """Per-column median absolute deviation, with 1.0 substituted for degenerate columns."""
+    median = np.nanmedian(points, axis=0)
+    mad = np.nanmedian(np.abs(points - median), axis=0)
+    return np.where(np.isfinite(mad) & (mad > 0.0), mad, 1.0)
+
+
+def sketch_params(
+    states: Iterable[Mapping[str, Any]],
+    names: Sequence[str],
+    *,
+    k: int = DEFAULT_SKETCH_K,
+    seed: int = 0,
+    chunk_size: int = DEFAULT_CHUNK,
+    sketches: Optional[Dict[str, QuantileSketch]] = None,
+) -> Dict[str, QuantileSketch]:
+    """One pass over ``states`` feeding a quantile sketch per parameter column.
+
+    Pass ``sketches`` to keep accumulating into existing (e.g. other shards') sketches.
+    """
+    out = sketches
+    if out is None:
+        out = {name: QuantileSketch(k=k, seed=seed + i) for i, name in enumerate(names)}
+    it = iter(states)
+    while True:
+        block = params_matrix(islice(it, chunk_size), names)
+        if block.shape[0] == 0:
+            return out
+        for j, name in enumerate(names):
+            out[name].update(block[:, j])
+
+
+def sketch_scales(sketches: Mapping[str, QuantileSketch], names: Sequence[str]) -> np.ndarray:
+    """Per-parameter MAD from sketches, with 1.0 substituted for degenerate columns."""
+    mad = np.asarray([sketches[name].median_mad()[1] for name in names], dtype=np.float64)
+    return np.where(np.isfinite(mad) & (mad > 0.0), mad, 1.0)
+
+
+def scales_overrides(names: Sequence[str], scales: Sequence[float]) -> Dict[str, Any]:
+    """Profile override patch pinning resolved ``anchor_metric.scales``."""
+    return {"anchor_metric": {"scales": {name: float(s) for name, s in zip(names, scales)}}}
+
+
+def apply_overrides(cfg: Mapping[str, Any], overrides: Mapping[str, Any]) -> Dict[str, Any]:
+    """Return ``cfg`` with the ``overrides`` patch (e.g. from :func:`scales_overrides`) merged in."""
+    merged = dict(cfg)
+    for key, value in overrides.items():
+        if isinstance(value, Mapping) and isinstance(merged.get(key), Mapping):
+            merged[key] = apply_overrides(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def metric_names(cfg: Mapping[str, Any]) -> List[str]:
+    metric = cfg.get("anchor_metric", {})
+    scales = metric.get("scales")
+    if isinstance(scales, dict):
+        return list(scales)
+    return list(metric.get("params", DEFAULT_PARAMS))
+
+
+def resolve_scales(
+    cfg: Mapping[str, Any],
+    anchor_points: Optional[np.ndarray] = None,
+    *,
+    sketches: Optional[Mapping[str, QuantileSketch]] = None,
+) -> Tuple[List[str], np.ndarray, str]:
+    """Return ``(names, scales, source)`` for ``anchor_metric``.
+
+    Explicit per-parameter ``scales`` are used as-is; the placeholder
+    ``from_anchor_or_units`` falls back to ``scales_fallback`` (``mad``
+    from streamed ``sketches`` when given, else over the anchor set).
+    """
+    metric = cfg.get("anchor_metric", {})
+    kind = metric.get("type", "relative_l2")
+    if kind != "relative_l2":
+        raise ValueError(f"Unsupported anchor_metric.type: {kind}")
+    scales = metric.get("scales")
+    names = metric_names(cfg)
+    if isinstance(scales, dict):
+        return names, np.asarray([float(scales[n]) for n in names], dtype=np.float64), "profile"
+    if isinstance(scales, list) and len(scales) == len(names):
+        return names, np.asarray(scales, dtype=np.float64), "profile"
+    fallback = metric.get("scales_fallback", "mad")
+    if fallback == "mad" and sketches is not None:
+        return names, sketch_scales(sketches, names), "mad_sketch"
+    if fallback != "mad" or anchor_points is None:
+        return names, np.ones(len(names), dtype=np.float64), "units"
+    return names, mad_scales(anchor_points), "mad"
+
+
+@dataclass
+class AnchorIndex:
+    """KD-tree over scaled anchor parameters; ``relative_l2`` is Euclidean in scaled space."""
+
+    names: List[str]
+    scales: np.ndarray
+    ids: np.ndarray
+    tree: cKDTree
+    digest: str
+    scale_source: str = "profile"
+    # Identifies the anchor file and metric the index was built from (see load_or_build).
+    source_key: str = ""
+
+    @classmethod
+    def build(
+        cls,
+        anchors: Sequence[Mapping[str, Any]],
+        cfg: Mapping[str, Any],
+        *,
+        sketches: Optional[Mapping[str, QuantileSketch]] = None,
+    ) -> "AnchorIndex":
+        raw = params_matrix(anchors, metric_names(cfg))
+        names, scales, source = resolve_scales(cfg, raw, sketches=sketches)
+        keep = np.all(np.isfinite(raw), axis=1)
+        ids = np.asarray([str(a.get("id", i)) for i, a in enumerate(anchors)], dtype=object)[keep]
+        scaled = raw[keep] / scales
+        digest = hashlib.sha256(scaled.tobytes() + "\x00".join(ids.tolist()).encode("utf-8")).hexdigest()
+        return cls(names=names, scales=scales, ids=ids, tree=cKDTree(scaled), digest=digest, scale_source=source)
+
+    def save(self, path: str | Path) -> None:
+        """Write the scaled points and metadata as plain arrays; the tree is rebuilt on load."""
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # An open handle stops numpy from appending ``.npz`` to the name.
+        with target.open("wb") as f:
+            np.savez(
+                f,
+                names=np.asarray(self.names, dtype=str),
+                scales=self.scales,
+                ids=np.asarray(self.ids.tolist(), dtype=str),
+                points=np.asarray(self.tree.data),
+                digest=np.asarray(self.digest),
+                scale_source=np.asarray(self.scale_source),
+                source_key=np.asarray(self.source_key),
+            )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "AnchorIndex":
+        with np.load(path, allow_pickle=False) as data:
+            points = data["points"].reshape(-1, data["names"].size)
+            return cls(
+                names=data["names"].tolist(),
+                scales=data["scales"],
+                ids=np.asarray(data["ids"].tolist(), dtype=object),
+                tree=cKDTree(points),
+                digest=str(data["digest"]),
+                scale_source=str(data["scale_source"]),
+                source_key=str(data["source_key"]),
+            )
+
+    def query(self, points: np.ndarray, *, workers: int = -1) -> Tuple[np.ndarray, np.ndarray]:
+        """Nearest anchor for each ``(N, P)`` raw parameter row: ``(ids, distances)``.
+
+        Rows with non-finite parameters get ``None`` ids and NaN distances.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        ids = np.full(points.shape[0], None, dtype=object)
+        dist = np.full(points.shape[0], np.nan, dtype=np.float64)
+        ok = np.all(np.isfinite(points), axis=1)
+        if np.any(ok) and self.ids.size:
+            d, idx = self.tree.query(points[ok] / self.scales, k=1, workers=workers)
+            dist[ok] = d
+            ids[ok] = self.ids[idx]
+        return ids, dist
+
+
+def load_or_build(
+    anchors_path: str | Path,
+    cfg: Mapping[str, Any],
+    cache_path: Optional[str | Path] = None,
+    anchors: Optional[Sequence[Dict[str, Any]]] = None,
+    *,
+    sketches: Optional[Mapping[str, QuantileSketch]] = None,
+) -> AnchorIndex:
+    """Build the index, reusing ``cache_path`` when it holds one for the same anchor file and metric.
+
+    ``sketches`` are passed to :meth:`AnchorIndex.build` for MAD scales over the full input.
+    Nothing is persisted unless ``cache_path`` is given; a stale cache is rebuilt and overwritten.
+    """
+    source = Path(anchors_path)
+    key = hashlib.sha256(source.read_bytes()).hexdigest()[:16]
+    metric: Any = cfg.get("anchor_metric", {})
+    if sketches is not None:
+        metric = {"anchor_metric": metric, "sketch_scales": sketch_scales(sketches, metric_names(cfg)).tolist()}
+    metric_key = hashlib.sha256(json.dumps(metric, sort_keys=True).encode("utf-8")).hexdigest()[:8]
+    source_key = f"{key}.{metric_key}"
+    cache = Path(cache_path) if cache_path else None
+    if cache is not None and cache.exists():
+        cached = AnchorIndex.load(cache)
+        if cached.source_key == source_key:
+            return cached
+    index = AnchorIndex.build(
+        anchors if anchors is not None else list(read_jsonl(str(source))), cfg, sketches=sketches
+    )
+    index.source_key = source_key
+    if cache is not None:
+        index.save(cache)
+    return index
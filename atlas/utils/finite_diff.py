@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from atlas.utils.richardson import richardson_extrapolate
+
+DEFAULT_H_REL_GRID = (0.001, 0.003, 0.01, 0.03)
+
+ResponseFn = Callable[[np.ndarray], np.ndarray]
+
+
+def _ordered_grid(h_rel_grid: Sequence[float]) -> np.ndarray:
+    grid = np.asarray(list(h_rel_grid), dtype=np.float64)
+    if grid.ndim != 1 or grid.size == 0 or np.any(grid <= 0.0):
+        raise ValueError("h_rel_grid must be a non-empty list of positive steps.")
+    # Coarse to fine, the order expected by the Richardson table.
+    return np.unique(grid)[::-1]
+
+
+def _step_scale(x: np.ndarray) -> np.ndarray:
+    """Relative steps are taken with respect to |x|, falling back to 1 at the origin."""
+    scale = np.abs(x)
+    return np.where(scale > 0.0, scale, 1.0)
+
+
+def stencil_offsets(h_rel_grid: Sequence[float], scheme: str = "central") -> np.ndarray:
+    """Return the unique relative offsets needed to evaluate ``scheme`` on every grid step.
+
+    The base point (offset 0) appears once even though every one-sided step
+    uses it, so all grid steps share a single base evaluation.
+    """
+    grid = _ordered_grid(h_rel_grid)
+    if scheme == "central":
+        offsets = np.concatenate([-grid, grid])
+    elif scheme == "forward":
+        offsets = np.concatenate([[0.0], grid])
+    elif scheme == "backward":
+        offsets = np.concatenate([[0.0], -grid])
+    else:
+        raise ValueError(f"Unsupported diff_scheme: {scheme}")
+    return np.unique(offsets)
+
+
+def _difference_quotients(
+    values: np.ndarray,
+    offsets: np.ndarray,
+    grid: np.ndarray,
+    scale: np.ndarray,
+    scheme: str,
+) -> np.ndarray:
+    index = {float(o): i for i, o in enumerate(offsets)}
+    plus = values[:, [index[float(g)] for g in grid]] if scheme != "backward" else None
+    minus = values[:, [index[float(-g)] for g in grid]] if scheme != "forward" else None
+    steps = scale[:, None] * grid[None, :]
+    if scheme == "central":
+        return (plus - minus) / (2.0 * steps)
+    base = values[:, [index[0.0]]]
+    if scheme == "forward":
+        return (plus - base) / steps
+    return (base - minus) / steps
+
+
+@dataclass
+class DerivativeBatch:
+    """Finite-difference derivatives for a block of anchors on a shared relative grid."""
+
+    h_rel: np.ndarray
+    estimates: np.ndarray
+    extrapolated: np.ndarray
+    evaluations: int
+
+    @property
+    def value(self) -> np.ndarray:
+        return self.extrapolated[:, -1]
+
+    def guard_metrics(self) -> Dict[str, np.ndarray]:
+        """Vectorised equivalent of ``nmod._guard_metrics`` over the extrapolation sequence."""
+        seq = self.extrapolated
+        count = seq.shape[1]
+        metrics: Dict[str, np.ndarray] = {"count": np.full(seq.shape[0], count, dtype=np.int64)}
+        if count >= 2:
+            metrics["order_disagreement"] = np.abs(seq[:, -1] - seq[:, -2])
+        if count >= 3:
+            diffs = np.diff(seq, axis=1)
+            signs = np.sign(diffs)
+            metrics["oscillations"] = np.sum(signs[:, 1:] != signs[:, :-1], axis=1)
+            metrics["max_step"] = np.max(np.abs(diffs), axis=1)
+        metrics["max_abs"] = np.max(np.abs(seq), axis=1) if count else np.zeros(seq.shape[0])
+        return metrics
+
+    def row_metrics(self, i: int) -> Dict[str, Any]:
+        """Guard metrics for anchor ``i`` in the JSON-friendly form stored in ``aux``."""
+        return self.metrics_rows([i])[0]
+
+    def metrics_rows(self, rows: Optional[Sequence[int]] = None) -> List[Dict[str, Any]]:
+        """:meth:`row_metrics` for several anchors (all by default) from one guard computation."""
+        metrics = self.guard_metrics()
+        rows = range(self.extrapolated.shape[0]) if rows is None else rows
+        out: List[Dict[str, Any]] = []
+        for i in rows:
+            out.append(
+                {key: int(v[i]) if key in ("count", "oscillations") else float(v[i]) for key, v in metrics.items()}
+            )
+        return out
+
+
+def derivatives_from_table(
+    values: np.ndarray,
+    x: np.ndarray,
+    *,
+    h_rel_grid: Sequence[float] = DEFAULT_H_REL_GRID,
+    scheme: str = "central",
+    richardson_order: int = 2,
+) -> DerivativeBatch:
+    """Differentiate tabulated observables.
+
+    ``values[i, j]`` holds the observable of anchor ``i`` at
+    ``x[i] + s[i] * offsets[j]`` where ``offsets = stencil_offsets(h_rel_grid, scheme)``
+    and ``s[i] = |x[i]|`` (``1`` when ``x[i] == 0``), the layout :func:`differentiate`
+    evaluates.
+    """
+    x = np.atleast_1d(np.asarray(x, dtype=np.float64))
+    values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+    grid = _ordered_grid(h_rel_grid)
+    offsets = stencil_offsets(grid, scheme)
+    if values.shape != (x.size, offsets.size):
+        raise ValueError(
+            f"Tabulated values must have shape {(x.size, offsets.size)}, got {values.shape}."
+        )
+    scale = _step_scale(x)
+    estimates = _difference_quotients(values, offsets, grid, scale, scheme)
+    step_order = 2 if scheme == "central" else 1
+    extrapolated = richardson_extrapolate(
+        estimates, grid, order=richardson_order, step_order=step_order
+    )
+    return DerivativeBatch(
+        h_rel=grid,
+        estimates=estimates,
+        extrapolated=extrapolated,
+        evaluations=int(values.size),
+    )
+
+
+def differentiate(
+    func: ResponseFn,
+    x: Sequence[float] | np.ndarray,
+    *,
+    h_rel_grid: Sequence[float] = DEFAULT_H_REL_GRID,
+    scheme: str = "central",
+    richardson_order: int = 2,
+) -> DerivativeBatch:
+    """Differentiate ``func`` at every anchor point on all grid steps with a single call.
+
+    ``func`` receives an ``(A, M)`` array of evaluation points (row ``i`` belongs
+    to anchor ``i``) and must return values of the same shape.  Each distinct
+    stencil point, including the shared base point of one-sided schemes, is
+    evaluated exactly once.
+    """
+    x = np.atleast_1d(np.asarray(x, dtype=np.float64))
+    grid = _ordered_grid(h_rel_grid)
+    offsets = stencil_offsets(grid, scheme)
+    scale = _step_scale(x)
+    points = x[:, None] + scale[:, None] * offsets[None, :]
+    values = np.asarray(func(points), dtype=np.float64)
+    if values.shape != points.shape:
+        raise ValueError(f"Response function returned shape {values.shape}, expected {points.shape}.")
+    # Tabulated inputs are expressed in the same relative stencil.
+    return derivatives_from_table(
+        values,
+        x,
+        h_rel_grid=grid,
+        scheme=scheme,
+        richardson_order=richardson_order,
+    )
+
+
+def engine_settings(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    """Read the N_mod finite-difference settings from a thresholds profile."""
+    nmod_cfg = cfg.get("N_mod", {})
+    return {
+        "h_rel_grid": tuple(nmod_cfg.get("h_rel_grid", DEFAULT_H_REL_GRID)),
+        "scheme": str(nmod_cfg.get("diff_scheme", "central")),
+        "richardson_order": int(nmod_cfg.get("richardson_order", 2)),
+    }
+
+
+def table_derivative(table: Dict[str, Any], cfg: Dict[str, Any]) -> Optional[DerivativeBatch]:
+    """Evaluate a single-anchor ``deltaN_grid`` observable, or ``None`` if it is malformed.
+
+    The table holds ``x`` and ``values`` sampled at ``x + |x| * stencil_offsets``; an
+    optional ``h_rel_grid`` overrides the profile grid.
+    """
+    settings = engine_settings(cfg)
+    if "h_rel_grid" in table:
+        settings["h_rel_grid"] = tuple(table["h_rel_grid"])
+    try:
+        return derivatives_from_table(
+            np.asarray(table["values"], dtype=np.float64)[None, :],
+            np.asarray([table["x"]], dtype=np.float64),
+            **settings,
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def table_derivatives(
+    tables: Sequence[Mapping[str, Any]],
+    cfg: Dict[str, Any],
+) -> List[Optional[Tuple[Dict[str, Any], float]]]:
+    """Batched :func:`table_derivative` returning ``(guard metrics, extrapolated value)`` per table.
+
+    Tables that share a relative grid are stacked into one
+    :func:`derivatives_from_table` call; malformed tables give ``None``.
+    """
+    settings = engine_settings(cfg)
+    out: List[Optional[Tuple[Dict[str, Any], float]]] = [None] * len(tables)
+    groups: Dict[Tuple[float, ...], List[Tuple[int, float, np.ndarray]]] = {}
+    for i, table in enumerate(tables):
+        try:
+            grid = tuple(float(h) for h in table.get("h_rel_grid", settings["h_rel_grid"]))
+            values = np.asarray(table["values"], dtype=np.float64)
+            x = float(table["x"])
+        except (AttributeError, KeyError, TypeError, ValueError):
+            continue
+        if values.ndim == 1:
+            groups.setdefault(grid, []).append((i, x, values))
+    for grid, members in groups.items():
+        try:
+            width = stencil_offsets(grid, settings["scheme"]).size
+        except ValueError:
+            continue
+        members = [m for m in members if m[2].size == width]
+        if not members:
+            continue
+        batch = derivatives_from_table(
+            np.stack([m[2] for m in members]),
+            np.array([m[1] for m in members]),
+            h_rel_grid=grid,
+            scheme=settings["scheme"],
+            richardson_order=settings["richardson_order"],
+        )
+        for (i, _, _), metrics, value in zip(members, batch.metrics_rows(), batch.value):
+            out[i] = (metrics, float(value))
+    return out
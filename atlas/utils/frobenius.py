@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_DELTA_T_REL = (0.001, 0.003, 0.01)
+
+InvariantsFn = Callable[[np.ndarray], np.ndarray]
+FrameFn = Callable[[np.ndarray], np.ndarray]
+
+
+def tg_status(frob: float, orth: float, frob_tol: float, orth_tol: float) -> str:
+    """Spec §1.3 decision: PASS within tolerance, FAIL beyond 10x, UNCERTAIN otherwise."""
+    if frob <= frob_tol and orth <= orth_tol:
+        return "PASS"
+    if frob > 10.0 * frob_tol or orth > 10.0 * orth_tol:
+        return "FAIL"
+    return "UNCERTAIN"
+
+
+def invariant_jacobians(invariants: InvariantsFn, points: np.ndarray, eps: float = 1e-6) -> np.ndarray:
+    """Central-difference Jacobians ``(M, m, p)`` of ``invariants`` at ``(M, p)`` points in one call."""
+    points = np.asarray(points, dtype=np.float64)
+    count, dim = points.shape
+    steps = eps * np.maximum(np.abs(points), 1.0)
+    eye = np.eye(dim, dtype=np.float64)
+    shifts = steps[:, None, :] * eye[None, :, :]
+    stencil = np.concatenate([points[:, None, :] + shifts, points[:, None, :] - shifts], axis=1)
+    values = np.asarray(invariants(stencil.reshape(-1, dim)), dtype=np.float64)
+    values = values.reshape(count, 2 * dim, -1)
+    diff = (values[:, :dim, :] - values[:, dim:, :]) / (2.0 * steps[:, :, None])
+    return diff.transpose(0, 2, 1)
+
+
+def _null_projectors(jac: np.ndarray) -> np.ndarray:
+    dim = jac.shape[-1]
+    return np.eye(dim)[None] - np.linalg.pinv(jac) @ jac
+
+
+@dataclass
+class TGIndBatch:
+    """Per-anchor outcome of the finite-difference TG-Ind protocol."""
+
+    basis: np.ndarray
+    frobenius_by_step: np.ndarray
+    orthogonality: np.ndarray
+    evaluations: int
+
+    @property
+    def frobenius(self) -> np.ndarray:
+        # The largest residual over the time-slice steps, so a favourable step
+        # cannot pull an anchor toward PASS; per-step values stay in frobenius_by_step.
+        return np.max(self.frobenius_by_step, axis=1)
+
+    def statuses(self, frob_tol: float, orth_tol: float) -> List[str]:
+        return [
+            tg_status(float(f), float(o), frob_tol, orth_tol)
+            for f, o in zip(self.frobenius, self.orthogonality)
+        ]
+
+
+def verify_tg_ind(
+    invariants: Optional[InvariantsFn],
+    points: np.ndarray,
+    x_t: np.ndarray,
+    *,
+    delta_t_rel: Sequence[float] = DEFAULT_DELTA_T_REL,
+    eps: float = 1e-6,
+    frame: Optional[FrameFn] = None,
+) -> TGIndBatch:
+    """Run ``verify_TG_Ind`` (spec §1.3) for a block of anchors.
+
+    ``invariants`` maps ``(M, p)`` parameter points to ``(M, m)`` invariant
+    values.  The distribution D is the kernel of their Jacobian, extended
+    to a smooth frame by projecting the anchor's orthonormal kernel basis.
+    Alternatively ``frame`` maps ``(M, p)`` points to ``(M, p, q)`` basis
+    fields directly.  Brackets are formed from directional derivatives of
+    the frame along each basis vector, so one batched call serves all
+    ``q * (q - 1) / 2`` pairs with ``2 q`` stencil points per step.
+    """
+    points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+    x_t = np.atleast_2d(np.asarray(x_t, dtype=np.float64))
+    anchors, dim = points.shape
+    steps = np.asarray(list(delta_t_rel), dtype=np.float64)
+
+    if frame is not None:
+        basis = np.asarray(frame(points), dtype=np.float64).reshape(anchors, dim, -1)
+        evaluations = anchors
+    elif invariants is not None:
+        jac0 = invariant_jacobians(invariants, points, eps)
+        rank = jac0.shape[1]
+        _, _, vh = np.linalg.svd(jac0, full_matrices=True)
+        basis = vh[:, rank:, :].transpose(0, 2, 1)
+        evaluations = 2 * dim * anchors
+    else:
+        raise ValueError("verify_tg_ind needs either invariants or frame.")
+    q = basis.shape[2]
+    unit = basis / np.maximum(np.linalg.norm(basis, axis=1, keepdims=True), 1e-300)
+    if q:
+        orthogonality = np.max(np.abs(np.einsum("ap,apq->aq", x_t, unit)), axis=1)
+    else:
+        orthogonality = np.zeros(anchors)
+    if q < 2:
+        return TGIndBatch(basis, np.zeros((anchors, steps.size)), orthogonality, evaluations)
+
+    scale = np.maximum(np.linalg.norm(points, axis=1), 1.0)
+    h = scale[:, None] * steps[None, :]
+    # (A, S, q, p) displacement along each basis vector for every step.
+    disp = h[:, :, None, None] * unit.transpose(0, 2, 1)[:, None, :, :]
+    shifted = np.stack([points[:, None, None, :] + disp, points[:, None, None, :] - disp], axis=3)
+    flat = shifted.reshape(-1, dim)
+    if frame is not None:
+        fields = np.asarray(frame(flat), dtype=np.float64).reshape(anchors, steps.size, q, 2, dim, q)
+        evaluations += flat.shape[0]
+    else:
+        # b_j(lambda) = P(lambda) b_j(lambda_0) keeps the frame smooth and inside D.
+        frames = _null_projectors(invariant_jacobians(invariants, flat, eps))
+        frames = frames.reshape(anchors, steps.size, q, 2, dim, dim)
+        fields = np.einsum("asitpr,arj->asitpj", frames, basis)
+        evaluations += 2 * dim * flat.shape[0]
+    # Directional derivative of every b_j along unit b_i, rescaled to D_{b_i} b_j.
+    norms = np.linalg.norm(basis, axis=1)
+    deriv = (fields[:, :, :, 0] - fields[:, :, :, 1]) / (2.0 * h[:, :, None, None, None])
+    deriv = deriv * norms[:, None, :, None, None]
+    iu, ju = np.triu_indices(q, k=1)
+    # Advanced indexing on two separated axes moves the pair axis first: (pairs, A, S, p).
+    brackets = (deriv[:, :, iu, :, ju] - deriv[:, :, ju, :, iu]).transpose(1, 3, 2, 0)
+    frob = np.empty((anchors, steps.size), dtype=np.float64)
+    for a in range(anchors):
+        rhs = brackets[a].reshape(dim, -1)
+        coeffs, *_ = np.linalg.lstsq(basis[a], rhs, rcond=None)
+        resid = np.linalg.norm(rhs - basis[a] @ coeffs, axis=0).reshape(steps.size, -1)
+        frob[a] = np.max(resid, axis=1)
+    return TGIndBatch(basis, frob, orthogonality, evaluations)
+
+
+def protocol_settings(cfg: Dict[str, object]) -> Dict[str, object]:
+    tg_cfg = cfg.get("temporal_gauge", {})
+    ind_cfg = tg_cfg.get("tg_independence", {})
+    return {
+        "delta_t_rel": tuple(tg_cfg.get("time_slices", {}).get("delta_t_rel", DEFAULT_DELTA_T_REL)),
+        "frob_tol": float(ind_cfg.get("frobenius_tol", 1e-3)),
+        "orth_tol": float(ind_cfg.get("orthogonality_tol", 1e-6)),
+    }
+
+
+def _spec_array(spec: Mapping[str, Any], key: str, ndim: int) -> Optional[np.ndarray]:
+    if spec.get(key) is None:
+        return None
+    arr = np.asarray(spec[key], dtype=np.float64)
+    if arr.ndim != ndim:
+        raise ValueError(f"{key} must be {ndim}-D, got shape {arr.shape}")
+    return arr
+
+
+def invariants_from_spec(spec: Mapping[str, Any], dim: int) -> InvariantsFn:
+    """Quadratic invariants ``I_k(x) = x^T Q_k x + L_k . x + c_k`` from a JSON ``invariants`` spec.
+
+    ``quadratic`` is ``(m, p, p)``, ``linear`` ``(m, p)`` and ``constant``
+    ``(m,)``; at least one of the first two is required.
+    """
+    quad = _spec_array(spec, "quadratic", 3)
+    lin = _spec_array(spec, "linear", 2)
+    if quad is None and lin is None:
+        raise ValueError("invariants need quadratic or linear coefficients")
+    count = (quad if quad is not None else lin).shape[0]
+    if quad is not None and quad.shape != (count, dim, dim):
+        raise ValueError(f"quadratic must have shape {(count, dim, dim)}, got {quad.shape}")
+    if lin is not None and lin.shape != (count, dim):
+        raise ValueError(f"linear must have shape {(count, dim)}, got {lin.shape}")
+    const = _spec_array(spec, "constant", 1)
+    if const is not None and const.shape != (count,):
+        raise ValueError(f"constant must have shape {(count,)}, got {const.shape}")
+
+    def invariants(points: np.ndarray) -> np.ndarray:
+        out = np.zeros((points.shape[0], count), dtype=np.float64)
+        if quad is not None:
+            out += np.einsum("ap,kpr,ar->ak", points, quad, points)
+        if lin is not None:
+            out += points @ lin.T
+        if const is not None:
+            out += const
+        return out
+
+    return invariants
+
+
+def frame_from_spec(spec: Mapping[str, Any], dim: int) -> FrameFn:
+    """Affine frame ``B(x) = B_0 + B_1 . x`` from a JSON ``frame`` spec.
+
+    ``constant`` is the ``(p, q)`` basis ``B_0``; the optional ``linear``
+    ``(p, q, p)`` holds its first-order variation.
+    """
+    const = _spec_array(spec, "constant", 2)
+    if const is None or const.shape[0] != dim:
+        raise ValueError(f"frame needs a constant basis with {dim} rows")
+    lin = _spec_array(spec, "linear", 3)
+    if lin is not None and lin.shape != const.shape + (dim,):
+        raise ValueError(f"linear must have shape {const.shape + (dim,)}, got {lin.shape}")
+
+    def frame(points: np.ndarray) -> np.ndarray:
+        out = np.broadcast_to(const, (points.shape[0],) + const.shape).copy()
+        if lin is not None:
+            out += np.einsum("pqr,ar->apq", lin, points)
+        return out
+
+    return frame
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import ArpackNoConvergence, LinearOperator, aslinearoperator, eigs
+
+from atlas.utils.op_norm import probe_op_norm
+
+COMPAT_METHODS = ("commutator_bound",)
+
+# ARPACK needs k < n - 1; below this size a dense solve is cheaper anyway.
+_DENSE_CUTOFF = 64
+
+
+def _as_operator(op: Any) -> Any:
+    if sparse.issparse(op) or isinstance(op, LinearOperator):
+        return op
+    return np.asarray(op)
+
+
+def spectral_radius(op: Any, *, tol: float = 1e-8, maxiter: Optional[int] = None) -> Dict[str, Any]:
+    """Largest-magnitude eigenvalue modulus via ARPACK for sparse or matrix-free operators."""
+    a = _as_operator(op)
+    n = a.shape[0]
+    if isinstance(a, np.ndarray) and n <= _DENSE_CUTOFF:
+        return {"value": float(np.max(np.abs(np.linalg.eigvals(a)))), "method": "dense", "converged": True}
+    try:
+        vals = eigs(aslinearoperator(a), k=1, which="LM", tol=tol, maxiter=maxiter, return_eigenvectors=False)
+        return {"value": float(np.abs(vals[0])), "method": "arpack", "converged": True}
+    except ArpackNoConvergence as exc:
+        partial = exc.eigenvalues
+        value = float(np.max(np.abs(partial))) if len(partial) else float("nan")
+        return {"value": value, "method": "arpack", "converged": False}
+
+
+def commutator_operator(a: Any, b: Any) -> LinearOperator:
+    """Matrix-free ``[A, B] = AB - BA``; products are applied, never formed."""
+    la = aslinearoperator(_as_operator(a))
+    lb = aslinearoperator(_as_operator(b))
+    return la * lb - lb * la
+
+
+def commutator_bound(
+    a: Any,
+    b: Any,
+    *,
+    limit: Optional[float] = None,
+    margin: float = 0.1,
+    max_iters: int = 64,
+    tol: float = 1e-6,
+    restarts: int = 3,
+    seed: int = 1337,
+) -> Dict[str, Any]:
+    """Randomised block power estimate of ``||[A, B]||_op``.
+
+    The estimate is a lower bound, so once it exceeds ``limit * (1 + margin)``
+    the bound is already violated and iteration stops early.
+    """
+    stop = None if limit is None else float(limit) * (1.0 + margin)
+    result = probe_op_norm(
+        commutator_operator(a, b),
+        max_iters=max_iters,
+        tol=tol,
+        restarts=restarts,
+        seed=seed,
+        stop_above=stop,
+    )
+    return {
+        "value": result.estimate,
+        "iterations": result.iterations,
+        "converged": result.converged,
+        "short_circuit": result.exceeded,
+    }
+
+
+def kms_compat(
+    modular: Any,
+    generator: Any,
+    cfg: Dict[str, Any],
+    *,
+    seed: int = 1337,
+) -> Dict[str, Any]:
+    """Run ``kms.compat_test`` for one anchor; returns the scalars the kms stage reads."""
+    kms_cfg = cfg.get("kms", {})
+    compat_cfg = kms_cfg.get("compat_test", {})
+    method = compat_cfg.get("method", "commutator_bound")
+    if method not in COMPAT_METHODS:
+        raise ValueError(f"Unsupported kms.compat_test.method: {method}")
+    comm = commutator_bound(
+        modular,
+        generator,
+        limit=float(kms_cfg.get("commutator_max", 0.05)),
+        max_iters=int(compat_cfg.get("max_iters", 64)),
+        tol=float(compat_cfg.get("tol", 1e-6)),
+        seed=seed,
+    )
+    radius = spectral_radius(modular)
+    return {
+        "commutator_bound": comm["value"],
+        "converged": comm["converged"],
+        "spectral_radius": radius["value"],
+        "diagnostics": {
+            "method": method,
+            "commutator": comm,
+            "spectral_radius": radius,
+        },
+    }
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import LinearOperator, norm as sparse_norm
+
+from atlas.utils.rng import make_rng
+
+
+@dataclass
+class OpNormResult:
+    """Outcome of a blocked power-iteration probe for the largest singular value."""
+
+    estimate: float
+    iterations: int
+    converged: bool
+    vector: np.ndarray = field(repr=False)
+    hs_norm: float = float("nan")
+    exceeded: bool = False
+
+    def as_aux(self) -> Dict[str, Any]:
+        return {
+            "op_norm": self.estimate,
+            "hs_norm": self.hs_norm,
+            "iterations": self.iterations,
+            "converged": self.converged,
+        }
+
+
+def _adjoint(a: Any) -> Any:
+    if isinstance(a, LinearOperator):
+        return a.H
+    return a.conj().T
+
+
+def _hs_norm(a: Any) -> float:
+    if isinstance(a, LinearOperator):
+        return float("nan")
+    if sparse.issparse(a):
+        return float(sparse_norm(a, ord="fro"))
+    return float(np.linalg.norm(a, ord="fro"))
+
+
+def probe_op_norm(
+    matrix: np.ndarray,
+    *,
+    max_iters: int = 64,
+    tol: float = 1e-8,
+    restarts: int = 3,
+    seed: int = 1337,
+    warm_start: Optional[np.ndarray] = None,
+    stop_above: Optional[float] = None,
+) -> OpNormResult:
+    """Estimate ``||A||_op`` by subspace iteration on ``A^H A``.
+
+    All ``restarts`` random starts are carried as one ``(n, restarts)`` block,
+    so every iteration is two matrix-block products plus a thin QR.  The
+    Rayleigh-Ritz value of the block is a lower bound that increases
+    monotonically; iteration stops once its relative change drops below
+    ``tol``.  ``warm_start`` replaces the first start vector, e.g. with the
+    dominant vector of a neighbouring anchor.
+
+    ``matrix`` may be dense, a SciPy sparse matrix or a ``LinearOperator``.
+    Because the estimate is a lower bound, iteration also stops as soon as
+    it exceeds ``stop_above`` (``exceeded`` is then set).
+    """
+    a = matrix if sparse.issparse(matrix) or isinstance(matrix, LinearOperator) else np.asarray(matrix)
+    if len(a.shape) != 2 or 0 in a.shape:
+        raise ValueError("Operator must be a non-empty 2-D matrix.")
+    n = a.shape[1]
+    width = max(1, min(int(restarts), n))
+    block = make_rng(seed).normal((n, width))
+    if np.iscomplexobj(a) or np.iscomplexobj(warm_start):
+        block = block.astype(np.complex128)
+    if warm_start is not None and warm_start.shape == (n,) and np.any(warm_start):
+        block[:, 0] = warm_start
+    q, _ = np.linalg.qr(block)
+    adj = _adjoint(a)
+    previous = 0.0
+    estimate = 0.0
+    vector = q[:, 0]
+    converged = False
+    exceeded = False
+    iterations = 0
+    for iterations in range(1, int(max_iters) + 1):
+        y = a @ q
+        _, s, vh = np.linalg.svd(y, full_matrices=False)
+        estimate = float(s[0])
+        vector = q @ vh[0].conj()
+        if estimate == 0.0 or abs(estimate - previous) <= tol * estimate:
+            converged = True
+            break
+        if stop_above is not None and estimate > stop_above:
+            exceeded = True
+            break
+        previous = estimate
+        q, _ = np.linalg.qr(adj @ y)
+    return OpNormResult(
+        estimate=estimate,
+        iterations=iterations,
+        converged=converged,
+        vector=vector,
+        hs_norm=_hs_norm(a),
+        exceeded=exceeded,
+    )
+
+
+class OpNormProbe:
+    """Configured probe; every call is cold-started so a result depends only on its operator.
+
+    Warm starts are limited to :meth:`run_all`, where the caller explicitly
+    probes a sequence of related operators (e.g. one operator under
+    successive perturbations) and each run starts from the previous
+    dominant vector.
+    """
+
+    def __init__(self, cfg: Dict[str, Any]) -> None:
+        probe_cfg = cfg.get("delta_chart", {}).get("op_probe", {})
+        self.enabled = bool(probe_cfg.get("enable", True))
+        self.max_iters = int(probe_cfg.get("max_iters", 64))
+        self.tol = float(probe_cfg.get("tol", 1e-8))
+        self.restarts = int(probe_cfg.get("restarts", 3))
+        self.seed = int(probe_cfg.get("seed", 1337))
+        self.on_nonconverge = str(probe_cfg.get("on_nonconverge", "INCONCLUSIVE"))
+
+    def run(self, matrix: np.ndarray, *, warm_start: Optional[np.ndarray] = None) -> OpNormResult:
+        return probe_op_norm(
+            matrix,
+            max_iters=self.max_iters,
+            tol=self.tol,
+            restarts=self.restarts,
+            seed=self.seed,
+            warm_start=warm_start,
+        )
+
+    def run_all(self, matrices: Iterable[np.ndarray]) -> List[OpNormResult]:
+        results: List[OpNormResult] = []
+        for m in matrices:
+            previous = results[-1].vector if results else None
+            results.append(self.run(m, warm_start=previous))
+        return results
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_TAU = 0.1
+DEFAULT_BOOTSTRAP = 100
+DEFAULT_SUBSAMPLE = 50_000
+# Sample count above which the band-reduction preprocessing is used.
+PREPROCESS_MIN = 100_000
+# Band half-width (as a fraction of the subsample size) and sign fix-up rounds.
+_BAND_FACTOR = 0.8
+_MAX_FIXUPS = 3
+
+# Fraction of the distance to the boundary taken by each interior-point step.
+_STEP = 0.9995
+
+
+@dataclass
+class QuantRegResult:
+    """Linear ``tau``-quantile fit ``y ~ X coef`` (no implicit intercept)."""
+
+    coef: np.ndarray
+    tau: float
+    iterations: int
+    converged: bool
+    loss: float
+    samples: int
+
+
+def check_loss(residuals: np.ndarray, tau: float) -> float:
+    """Koenker-Bassett check loss ``sum rho_tau(r)``."""
+    r = np.asarray(residuals, dtype=np.float64)
+    return float(np.sum(r * (tau - (r < 0))))
+
+
+def _max_step(x: np.ndarray, dx: np.ndarray) -> float:
+    neg = dx < 0
+    if not np.any(neg):
+        return 1.0
+    return float(min(1.0, _STEP * np.min(-x[neg] / dx[neg])))
+
+
+def _interior_point(
+    Xs: np.ndarray,
+    ys: np.ndarray,
+    b: np.ndarray,
+    tau: float,
+    tol: float,
+    max_iter: int,
+) -> Tuple[np.ndarray, int, bool]:
+    """Frisch-Newton interior point (Mehrotra predictor-corrector) on the dual.
+
+    Solves ``max y'a  s.t.  X'a = b,  0 <= a <= 1``; the equality
+    multipliers are the coefficients.  Each Newton step reduces to a
+    ``p x p`` system ``X' Q X``, so an iteration is a handful of
+    length-``n`` array passes.
+    """
+    n, p = Xs.shape
+    Xt = np.ascontiguousarray(Xs.T)
+    a = np.full(n, 1.0 - tau)
+    s = np.full(n, tau)
+    beta = np.linalg.lstsq(Xs, ys, rcond=None)[0]
+    r = ys - beta @ Xt
+    offset = 0.1 * float(np.mean(np.abs(r))) + 1e-6
+    w = np.maximum(r, 0.0) + offset
+    z = np.maximum(-r, 0.0) + offset
+
+    def direction(rc, rb, r1, r2, q):
+        rr = rc - r2 / s + r1 / a
+        m = (Xt * q) @ Xs
+        dbeta = np.linalg.solve(m + 1e-12 * np.eye(p), Xt @ (q * rr) - rb)
+        da = q * (rr - dbeta @ Xt)
+        ds = -da
+        dz = (r1 - z * da) / a
+        dw = (r2 - w * ds) / s
+        return da, ds, dbeta, dz, dw
+
+    for iterations in range(1, max_iter + 1):
+        rb = b - Xt @ a
+        rc = ys - beta @ Xt - w + z
+        mu = float(a @ z + s @ w)
+        scale = 1.0 + abs(float(ys @ a))
+        if mu / scale < tol and np.max(np.abs(rc)) < 1e-7 and np.max(np.abs(rb)) < 1e-7 * n:
+            return beta, iterations, True
+        q = 1.0 / (z / a + w / s)
+        # Predictor (affine-scaling) step.
+        da, ds, dbeta, dz, dw = direction(rc, rb, -a * z, -s * w, q)
+        ap = min(_max_step(a, da), _max_step(s, ds))
+        ad = min(_max_step(z, dz), _max_step(w, dw))
+        mu_aff = float((a + ap * da) @ (z + ad * dz) + (s + ap * ds) @ (w + ad * dw))
+        sigma = (mu_aff / mu) ** 3
+        target = sigma * mu / (2 * n)
+        # Corrector with centering.
+        da, ds, dbeta, dz, dw = direction(
+            rc,
+            rb,
+            target - a * z - da * dz,
+            target - s * w - ds * dw,
+            q,
+        )
+        ap = min(_max_step(a, da), _max_step(s, ds))
+        ad = min(_max_step(z, dz), _max_step(w, dw))
+        a = a + ap * da
+        s = s + ap * ds
+        beta = beta + ad * dbeta
+        z = z + ad * dz
+        w = w + ad * dw
+    return beta, max_iter, False
+
+
+def _fit(Xs: np.ndarray, ys: np.ndarray, tau: float, tol: float, max_iter: int) -> Tuple[np.ndarray, int, bool]:
+    return _interior_point(Xs, ys, (1.0 - tau) * Xs.sum(axis=0), tau, tol, max_iter)
+
+
+def _preprocessed(
+    Xs: np.ndarray,
+    ys: np.ndarray,
+    tau: float,
+    tol: float,
+    max_iter: int,
+    seed: int,
+) -> Optional[Tuple[np.ndarray, int, bool]]:
+    """Portnoy-Koenker preprocessing: solve on the residual band plus two globbed points.
+
+    A subsample fit predicts which points lie clearly below/above the
+    quantile plane; each side is collapsed into one pseudo-observation
+    (column sums of ``X`` and ``y``) and only the band in between enters
+    the interior point.  Points whose full-sample residual contradicts
+    their side are moved back into the band and the reduced problem is
+    re-solved, so the result is the exact optimum.  Returns ``None`` when
+    the band never fits and the caller should solve directly.
+    """
+    n, p = Xs.shape
+    rng = np.random.default_rng(seed)
+    m = int(round(((p + 1) * n) ** (2.0 / 3.0)))
+    total = 0
+    while m < n:
+        sub = rng.choice(n, size=m, replace=False)
+        beta, iters, _ = _fit(Xs[sub], ys[sub], tau, tol, max_iter)
+        total += iters
+        chol = np.linalg.cholesky(Xs[sub].T @ Xs[sub] + 1e-12 * np.eye(p))
+        band = np.sqrt(np.sum(np.linalg.solve(chol, Xs.T) ** 2, axis=0))
+        r = ys - Xs @ beta
+        # Centre the band on the pilot fit's own sign split: without an
+        # intercept column the share of negative residuals need not be tau.
+        centre = float(np.count_nonzero(r < 0)) / n
+        width = _BAND_FACTOR * m / (2.0 * n)
+        lo_q, hi_q = max(1.0 / n, centre - width), min(centre + width, (n - 1.0) / n)
+        k_lo, k_hi = np.quantile(r / np.maximum(band, 1e-12), [lo_q, hi_q])
+        below = r < band * k_lo
+        above = r > band * k_hi
+        for _ in range(_MAX_FIXUPS):
+            keep = ~(below | above)
+            X_red = np.vstack([Xs[keep], Xs[below].sum(axis=0), Xs[above].sum(axis=0)])
+            y_red = np.concatenate([ys[keep], [ys[below].sum(), ys[above].sum()]])
+            beta, iters, converged = _fit(X_red, y_red, tau, tol, max_iter)
+            total += iters
+            r = ys - Xs @ beta
+            bad_below = below & (r > 0)
+            bad_above = above & (r < 0)
+            bad = int(np.count_nonzero(bad_below) + np.count_nonzero(bad_above))
+            if bad == 0:
+                return beta, total, converged
+            if bad > 0.1 * _BAND_FACTOR * m:
+                break
+            below &= ~bad_below
+            above &= ~bad_above
+        m *= 2
+    return None
+
+
+def quantile_regression(
+    X: np.ndarray,
+    y: np.ndarray,
+    tau: float = DEFAULT_TAU,
+    *,
+    tol: float = 1e-9,
+    max_iter: int = 100,
+    seed: int = 0,
+) -> QuantRegResult:
+    """Linear ``tau``-quantile regression by interior point, linear in the sample count.
+
+    Columns are rescaled to unit max-abs internally.  Above
+    :data:`PREPROCESS_MIN` samples the Portnoy-Koenker band reduction
+    (:func:`_preprocessed`) shrinks the interior-point problem to
+    ``O(n^(2/3))`` points; ``seed`` only drives its subsample and does
+    not change the optimum.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64).reshape(-1)
+    if X.ndim != 2:
+        X = X.reshape(y.size, -1)
+    n, p = X.shape
+    if n == 0 or n < p:
+        return QuantRegResult(np.zeros(p), tau, 0, False, 0.0, n)
+    cx = np.max(np.abs(X), axis=0)
+    cx = np.where(cx > 0, cx, 1.0)
+    cy = float(np.max(np.abs(y))) or 1.0
+    Xs = X / cx
+    ys = y / cy
+
+    solved = _preprocessed(Xs, ys, tau, tol, max_iter, seed) if n >= PREPROCESS_MIN else None
+    if solved is None:
+        solved = _fit(Xs, ys, tau, tol, max_iter)
+    beta, iterations, converged = solved
+    coef = beta * cy / cx
+    return QuantRegResult(coef, tau, iterations, converged, check_loss(y - X @ coef, tau), n)
+
+
+_WORKER: Dict[str, Tuple[np.ndarray, np.ndarray, float, int]] = {}
+
+
+def _init_worker(X: np.ndarray, y: np.ndarray, tau: float, m: int) -> None:
+    _WORKER["data"] = (X, y, tau, m)
+
+
+def _bootstrap_task(seed_seq: np.random.SeedSequence) -> np.ndarray:
+    return _replicate(*_WORKER["data"], seed_seq)
+
+
+def _replicate(X: np.ndarray, y: np.ndarray, tau: float, m: int, seed_seq: np.random.SeedSequence) -> np.ndarray:
+    rng = np.random.Generator(np.random.Philox(seed_seq))
+    idx = rng.integers(0, y.size, size=m)
+    return quantile_regression(X[idx], y[idx], tau).coef
+
+
+def bootstrap_quantreg(
+    X: np.ndarray,
+    y: np.ndarray,
+    tau: float = DEFAULT_TAU,
+    *,
+    bootstraps: int = DEFAULT_BOOTSTRAP,
+    subsample: int = DEFAULT_SUBSAMPLE,
+    seed: int = 0,
+    workers: int = 1,
+    coef: Optional[np.ndarray] = None,
+) -> Dict[str, object]:
+    """Percentile 95% CIs for the coefficients from ``m``-out-of-``n`` pairs bootstrap.
+
+    Each replicate refits on ``m = min(n, subsample)`` resampled pairs;
+    deviations from the full-sample ``coef`` are rescaled by ``sqrt(m / n)``
+    so the interval reflects ``n`` points.  Replicate ``i`` always uses the
+    ``i``-th spawned seed, so results do not depend on ``workers``.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64).reshape(-1)
+    if X.ndim != 2:
+        X = X.reshape(y.size, -1)
+    n = y.size
+    if coef is None:
+        coef = quantile_regression(X, y, tau).coef
+    if n < 2 or bootstraps <= 0:
+        return {"ci95": [[float(c), float(c)] for c in coef], "B": 0, "subsample": 0}
+    m = int(min(n, subsample))
+    seeds = np.random.SeedSequence(seed).spawn(bootstraps)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(X, y, tau, m)) as pool:
+            reps: List[np.ndarray] = list(pool.map(_bootstrap_task, seeds))
+    else:
+        reps = [_replicate(X, y, tau, m, ss) for ss in seeds]
+    reps_arr = np.asarray(reps)
+    scaled = coef + (reps_arr - coef) * np.sqrt(m / n)
+    lo, hi = np.percentile(scaled, [2.5, 97.5], axis=0)
+    return {
+        "ci95": [[float(lo_), float(hi_)] for lo_, hi_ in zip(lo, hi)],
+        "B": int(bootstraps),
+        "subsample": m,
+    }
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+SERIES_KEYS: Dict[str, Sequence[str]] = {
+    "Delta_series": ("Delta_series", "Delta_samples", "delta_series"),
+    "deltaN_series": ("deltaN_series", "deltaN_samples", "n_series"),
+    "H_series": ("H_series", "H_samples"),
+    "H_times": ("H_times",),
+}
+
+
+@dataclass
+class RaggedArray:
+    """CSR-style batch of variable-length float64 series (``values`` plus ``offsets``).
+
+    Segment ``i`` is ``values[offsets[i]:offsets[i + 1]]``; an anchor without a
+    series is an empty segment, so per-anchor overhead is one int64 offset.
+    """
+
+    values: np.ndarray
+    offsets: np.ndarray
+
+    def __post_init__(self) -> None:
+        self.values = np.asarray(self.values, dtype=np.float64)
+        self.offsets = np.asarray(self.offsets, dtype=np.int64)
+        if self.offsets.ndim != 1 or self.offsets.size == 0 or self.offsets[0] != 0:
+            raise ValueError("offsets must be a 1-D array starting at 0.")
+        if self.offsets[-1] != self.values.size or np.any(np.diff(self.offsets) < 0):
+            raise ValueError("offsets must be non-decreasing and end at len(values).")
+
+    @classmethod
+    def from_lists(cls, series: Iterable[Optional[Iterable[float]]]) -> "RaggedArray":
+        builder = RaggedBuilder()
+        for item in series:
+            builder.append(item)
+        return builder.build()
+
+    @classmethod
+    def load(cls, path: str | Path, *, mmap: bool = True) -> "RaggedArray":
+        """Load a sidecar written by :meth:`save`, memory-mapping the payload by default."""
+        base = Path(path)
+        mode = "r" if mmap else None
+        values = np.load(base.with_suffix(".values.npy"), mmap_mode=mode)
+        offsets = np.load(base.with_suffix(".offsets.npy"))
+        return cls(values=values, offsets=offsets)
+
+    def save(self, path: str | Path) -> None:
+        base = Path(path)
+        base.parent.mkdir(parents=True, exist_ok=True)
+        np.save(base.with_suffix(".values.npy"), self.values)
+        np.save(base.with_suffix(".offsets.npy"), self.offsets)
+
+    def __len__(self) -> int:
+        return int(self.offsets.size - 1)
+
+    def __getitem__(self, i: int) -> np.ndarray:
+        return self.values[self.offsets[i] : self.offsets[i + 1]]
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def segment_ids(self) -> np.ndarray:
+        return np.repeat(np.arange(len(self), dtype=np.int64), self.lengths)
+
+    def _reduceat(self, ufunc: np.ufunc, values: np.ndarray, empty: float) -> np.ndarray:
+        lengths = self.lengths
+        out = np.full(len(self), empty, dtype=np.float64)
+        nonempty = lengths > 0
+        if np.any(nonempty):
+            out[nonempty] = ufunc.reduceat(values, self.offsets[:-1][nonempty])
+        return out
+
+    def segment_min(self) -> np.ndarray:
+        return self._reduceat(np.minimum, self.values, np.nan)
+
+    def segment_max(self) -> np.ndarray:
+        return self._reduceat(np.maximum, self.values, np.nan)
+
+    def segment_max_abs(self) -> np.ndarray:
+        return self._reduceat(np.maximum, np.abs(self.values), 0.0)
+
+    def segment_sum(self) -> np.ndarray:
+        return self._reduceat(np.add, self.values, 0.0)
+
+    def segment_mean(self) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.segment_sum() / self.lengths
+
+    def segment_std(self, ddof: int = 1) -> np.ndarray:
+        """Two-pass segmented standard deviation; segments with ``len <= ddof`` give 0."""
+        mean = self.segment_mean()
+        centred = self.values - np.repeat(np.nan_to_num(mean), self.lengths)
+        ssq = self._reduceat(np.add, centred * centred, 0.0)
+        denom = self.lengths - ddof
+        out = np.zeros(len(self), dtype=np.float64)
+        ok = denom > 0
+        out[ok] = np.sqrt(ssq[ok] / denom[ok])
+        return out
+
+    def diff(self) -> "RaggedArray":
+        """First differences within each segment (segments shrink by one)."""
+        if self.values.size == 0:
+            return RaggedArray(values=self.values[:0], offsets=self.offsets.copy())
+        d = np.diff(self.values)
+        keep = np.ones(d.size, dtype=bool)
+        ends = self.offsets[1:-1][self.offsets[1:-1] > 0] - 1
+        keep[ends[ends < d.size]] = False
+        new_lengths = np.maximum(self.lengths - 1, 0)
+        offsets = np.concatenate([[0], np.cumsum(new_lengths)])
+        return RaggedArray(values=d[keep], offsets=offsets)
+
+    def sign_changes(self) -> np.ndarray:
+        """Count adjacent sign flips within each segment (``np.sign`` semantics)."""
+        signs = RaggedArray(values=np.sign(self.values), offsets=self.offsets)
+        flips = signs.diff()
+        return flips._reduceat(np.add, (flips.values != 0).astype(np.float64), 0.0).astype(np.int64)
+
+    def tail(self, k: int) -> "RaggedArray":
+        """The last ``k`` entries of every segment."""
+        new_lengths = np.minimum(self.lengths, k)
+        starts = self.offsets[1:] - new_lengths
+        offsets = np.concatenate([[0], np.cumsum(new_lengths)])
+        index = np.repeat(starts - offsets[:-1], new_lengths) + np.arange(offsets[-1])
+        return RaggedArray(values=self.values[index], offsets=offsets)
+
+    def last(self, k: int = 1) -> np.ndarray:
+        """Entry ``-k`` of each segment, NaN where the segment is shorter than ``k``."""
+        out = np.full(len(self), np.nan, dtype=np.float64)
+        ok = self.lengths >= k
+        out[ok] = self.values[self.offsets[1:][ok] - k]
+        return out
+
+    def tolist(self, i: int) -> List[float]:
+        return [float(x) for x in self[i]]
+
+
+class RaggedBuilder:
+    """Append-only builder that fills a growing float64 buffer without per-anchor lists."""
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self._values = np.empty(max(1, capacity), dtype=np.float64)
+        self._size = 0
+        self._offsets: List[int] = [0]
+
+    def append(self, series: Optional[Iterable[float]]) -> None:
+        if series is None:
+            chunk = np.empty(0, dtype=np.float64)
+        elif isinstance(series, np.ndarray):
+            chunk = series.astype(np.float64, copy=False).ravel()
+        else:
+            chunk = np.fromiter(series, dtype=np.float64)
+        needed = self._size + chunk.size
+        if needed > self._values.size:
+            grown = np.empty(max(needed, 2 * self._values.size), dtype=np.float64)
+            grown[: self._size] = self._values[: self._size]
+            self._values = grown
+        self._values[self._size : needed] = chunk
+        self._size = needed
+        self._offsets.append(needed)
+
+    def build(self) -> RaggedArray:
+        return RaggedArray(
+            values=self._values[: self._size].copy(),
+            offsets=np.asarray(self._offsets, dtype=np.int64),
+        )
+
+
+def first_series(observables: Dict[str, Any], key: str) -> Optional[Iterable[float]]:
+    """Return the first non-empty alias of ``key`` the same way the stages look it up."""
+    for alias in SERIES_KEYS[key]:
+        value = observables.get(alias)
+        if value:
+            return value
+    return None
+
+
+def series_block(
+    states: Iterable[Dict[str, Any]],
+    keys: Sequence[str] = tuple(SERIES_KEYS),
+) -> Dict[str, RaggedArray]:
+    """Pack the series observables of a block of SystemStates into one RaggedArray per key."""
+    builders = {key: RaggedBuilder() for key in keys}
+    for state in states:
+        observables = state.get("observables", {})
+        for key, builder in builders.items():
+            builder.append(first_series(observables, key))
+    return {key: builder.build() for key, builder in builders.items()}
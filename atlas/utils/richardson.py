@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Dict, Iterable
+from typing import Dict, Iterable, Sequence
 
 import numpy as np
 
@@ -20,3 +20,37 @@ def richardson_error(
     denom = max(1.0, float(2**order - 1))
     err = safety_factor * abs(latest - prev) / denom
     return {"estimate": float(latest), "error": float(err)}
+
+
+def richardson_weights(steps: Sequence[float], *, order: int = 2, step_order: int = 2) -> np.ndarray:
+    """Return Richardson weights for estimates ordered coarse to fine.
+
+    Row ``k`` of the returned ``(K, K)`` matrix combines the first ``k + 1``
+    estimates so that error terms of order ``order, order + step_order, ...``
+    cancel exactly, for arbitrary (not necessarily geometric) steps.  The map
+    depends only on step ratios, so every anchor on the same relative grid
+    shares it.
+    """
+    h = np.asarray(list(steps), dtype=np.float64)
+    h = h / np.max(h)
+    k_total = h.size
+    weights = np.zeros((k_total, k_total), dtype=np.float64)
+    for k in range(k_total):
+        powers = order + step_order * np.arange(k, dtype=np.float64)
+        system = np.vstack([np.ones(k + 1), h[None, : k + 1] ** powers[:, None]])[: k + 1]
+        rhs = np.zeros(k + 1, dtype=np.float64)
+        rhs[0] = 1.0
+        weights[k, : k + 1] = np.linalg.solve(system, rhs)
+    return weights
+
+
+def richardson_extrapolate(
+    estimates: np.ndarray,
+    steps: Sequence[float],
+    *,
+    order: int = 2,
+    step_order: int = 2,
+) -> np.ndarray:
+    """Extrapolate ``(..., K)`` estimates taken at ``steps`` (coarse to fine) towards zero step."""
+    weights = richardson_weights(steps, order=order, step_order=step_order)
+    return np.asarray(estimates, dtype=np.float64) @ weights.T
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import ast
+import json
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Mapping, Sequence
+
+import numpy as np
+
+Columns = Mapping[str, np.ndarray]
+Expr = Callable[[Columns], np.ndarray]
+
+DEFAULT_PRIORITY = ("true_tear", "anomaly", "hard_spot", "fake")
+# Stage metrics that fail their stage when non-finite; rules see them as +inf so a
+# failed metric trips every "exceeds threshold" comparison, like a stage FAIL does.
+METRIC_COLUMNS = ("delta_chart", "abs_delta_N")
+# Columns every caller of :class:`CompiledTriage` supplies; rules may reference only these
+# plus the ``symbols`` passed to :func:`compile_triage`.
+RULE_COLUMNS = METRIC_COLUMNS + ("H_plateau",)
+
+_BINOPS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.divide,
+}
+_CMPOPS = {
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+}
+_CALLS = {
+    "min": np.minimum,
+    "max": np.maximum,
+    "abs": np.abs,
+}
+
+
+class RuleCompileError(ValueError):
+    """Raised when a triage rule or confidence expression uses unsupported syntax."""
+
+
+def _compile_node(node: ast.AST, constants: Mapping[str, float], columns: Sequence[str]) -> Expr:
+    if isinstance(node, ast.Expression):
+        return _compile_node(node.body, constants, columns)
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, bool)):
+        value = float(node.value)
+        return lambda cols: value
+    if isinstance(node, ast.Name):
+        name = node.id
+        if name in constants:
+            value = float(constants[name])
+            return lambda cols: value
+        if name not in columns:
+            raise RuleCompileError(f"Unknown name {name!r}; expected a profile constant or one of {sorted(columns)}")
+        return lambda cols: cols[name]
+    if isinstance(node, ast.UnaryOp):
+        inner = _compile_node(node.operand, constants, columns)
+        if isinstance(node.op, ast.USub):
+            return lambda cols: np.negative(inner(cols))
+        if isinstance(node.op, ast.Not):
+            return lambda cols: np.logical_not(inner(cols))
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINOPS:
+        op = _BINOPS[type(node.op)]
+        left = _compile_node(node.left, constants, columns)
+        right = _compile_node(node.right, constants, columns)
+        return lambda cols: op(left(cols), right(cols))
+    if isinstance(node, ast.Compare) and all(type(o) in _CMPOPS for o in node.ops):
+        terms = [_compile_node(node.left, constants, columns)] + [_compile_node(c, constants, columns) for c in node.comparators]
+        ops = [_CMPOPS[type(o)] for o in node.ops]
+
+        def compare(cols: Columns) -> np.ndarray:
+            values = [t(cols) for t in terms]
+            out = ops[0](values[0], values[1])
+            for i in range(1, len(ops)):
+                out = np.logical_and(out, ops[i](values[i], values[i + 1]))
+            return out
+
+        return compare
+    if isinstance(node, ast.BoolOp):
+        parts = [_compile_node(v, constants, columns) for v in node.values]
+        combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        return lambda cols: _fold(combine, [p(cols) for p in parts])
+    if isinstance(node, ast.IfExp):
+        test = _compile_node(node.test, constants, columns)
+        body = _compile_node(node.body, constants, columns)
+        orelse = _compile_node(node.orelse, constants, columns)
+        return lambda cols: np.where(test(cols), body(cols), orelse(cols))
+    if (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id in _CALLS
+        and not node.keywords
+    ):
+        fn = _CALLS[node.func.id]
+        args = [_compile_node(a, constants, columns) for a in node.args]
+        if fn is np.abs and len(args) == 1:
+            return lambda cols: np.abs(args[0](cols))
+        if fn is not np.abs and len(args) >= 2:
+            return lambda cols: _fold(fn, [a(cols) for a in args])
+    raise RuleCompileError(f"Unsupported expression: {ast.dump(node)}")
+
+
+def _fold(fn: Callable[[Any, Any], Any], values: List[Any]) -> Any:
+    out = values[0]
+    for v in values[1:]:
+        out = fn(out, v)
+    return out
+
+
+def compile_expression(
+    source: str,
+    constants: Mapping[str, float],
+    columns: Sequence[str] = RULE_COLUMNS,
+) -> Expr:
+    """Parse ``source`` once into a closure over column arrays (no per-row ``eval``).
+
+    Names must be ``constants`` or ``columns``; anything else is rejected
+    here rather than failing with a ``KeyError`` at classification time.
+    """
+    try:
+        tree = ast.parse(source, mode="eval")
+    except SyntaxError as exc:
+        raise RuleCompileError(f"Cannot parse expression {source!r}: {exc}") from exc
+    return _compile_node(tree, constants, tuple(columns))
+
+
+@dataclass
+class CompiledTriage:
+    """Vectorised form of ``triage.rules``, ``triage.priority`` and ``triage.confidence``."""
+
+    classes: List[str]
+    masks: Dict[str, Expr]
+    confidence: Expr
+    priority: List[str]
+    default_class: str
+
+    @property
+    def labels(self) -> List[str]:
+        """Rule classes in evaluation order, followed by ``default_class``."""
+        order = self.priority + [cls for cls in self.classes if cls not in self.priority]
+        return [cls for cls in order if cls in self.masks] + [self.default_class]
+
+    @staticmethod
+    def _columns(columns: Mapping[str, Sequence[Any]]) -> Dict[str, np.ndarray]:
+        cols = {key: np.asarray(value, dtype=np.float64) for key, value in columns.items()}
+        for key in METRIC_COLUMNS:
+            if key in cols:
+                cols[key] = np.where(np.isfinite(cols[key]), cols[key], np.inf)
+        return cols
+
+    def class_codes(self, columns: Mapping[str, Sequence[Any]]) -> np.ndarray:
+        """Integer codes into :attr:`labels` for every row (columns broadcast against each other)."""
+        cols = self._columns(columns)
+        shape = np.broadcast_shapes(*(c.shape for c in cols.values())) if cols else (0,)
+        unmatched = len(self.labels) - 1
+        codes = np.full(shape, unmatched, dtype=np.int64)
+        for i, cls in enumerate(self.labels[:-1]):
+            mask = np.broadcast_to(np.asarray(self.masks[cls](cols), dtype=bool), shape)
+            codes[mask & (codes == unmatched)] = i
+        return codes
+
+    def scores(self, columns: Mapping[str, Sequence[Any]]) -> np.ndarray:
+        """``triage.confidence`` clipped to ``[0, 1]``, broadcast over the columns."""
+        cols = self._columns(columns)
+        shape = np.broadcast_shapes(*(c.shape for c in cols.values())) if cols else (0,)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            conf = np.broadcast_to(np.asarray(self.confidence(cols), dtype=np.float64), shape)
+        return np.clip(np.nan_to_num(conf, nan=0.0), 0.0, 1.0)
+
+    def evaluate(self, columns: Mapping[str, Sequence[Any]]) -> Dict[str, np.ndarray]:
+        codes = self.class_codes(columns)
+        names = self.labels
+        index = {cls: i for i, cls in enumerate(self.priority)}
+        priority_lookup = np.array([index.get(cls, -1) for cls in names], dtype=np.int64)
+        conf = self.scores(columns).reshape(codes.shape)
+        return {
+            "class": np.asarray(names, dtype=object)[codes],
+            "priority_index": priority_lookup[codes],
+            "confidence": conf,
+            "matched": codes < len(names) - 1,
+        }
+
+
+def _rule_expression(spec: Mapping[str, Any]) -> str:
+    clauses: List[str] = []
+    for key, value in spec.items():
+        if key == "any_of":
+            clauses.append("(" + " or ".join(f"({c})" for c in value) + ")")
+        elif key == "all_of":
+            clauses.append("(" + " and ".join(f"({c})" for c in value) + ")")
+        elif isinstance(value, bool):
+            clauses.append(f"({key} == {int(value)})")
+        else:
+            raise RuleCompileError(f"Unsupported rule key: {key}")
+    return " and ".join(clauses) if clauses else "True"
+
+
+def _constants(cfg: Mapping[str, Any]) -> Dict[str, float]:
+    constants = {"tau_delta": 0.15, "tau_n": 0.05}
+    constants.update(
+        (key, float(value))
+        for key, value in cfg.items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    )
+    return constants
+
+
+@lru_cache(maxsize=32)
+def _compile_cached(payload: str) -> CompiledTriage:
+    data = json.loads(payload)
+    triage_cfg = data["triage"]
+    constants = data["constants"]
+    columns = RULE_COLUMNS + tuple(data["symbols"])
+    rules = triage_cfg.get("rules", {})
+    masks = {cls: compile_expression(_rule_expression(spec), constants, columns) for cls, spec in rules.items()}
+    confidence_src = triage_cfg.get(
+        "confidence",
+        "min(1.0, 0.5*(delta_chart/tau_delta + abs_delta_N/tau_n)) + (0.5 if H_plateau else 0.0)",
+    )
+    priority = list(triage_cfg.get("priority", DEFAULT_PRIORITY))
+    return CompiledTriage(
+        classes=list(rules),
+        masks=masks,
+        confidence=compile_expression(confidence_src, constants, columns),
+        priority=priority,
+        default_class=str(triage_cfg.get("default_class", "anomaly")),
+    )
+
+
+def compile_triage(cfg: Mapping[str, Any], symbols: Sequence[str] = ()) -> CompiledTriage:
+    """Compile the profile's triage section; identical profiles share one compiled object.
+
+    Non-finite :data:`METRIC_COLUMNS` compare as ``+inf``, so a failed
+    metric matches the "exceeds threshold" rules; rows matching no rule get
+    ``triage.default_class`` (``anomaly`` unless configured).  Callers that
+    classify anchor by anchor should compile once and reuse the result.
+    Names in ``symbols`` (e.g. ``tau_delta``) are read from the columns
+    instead of being folded in as profile constants, so they can vary.
+    Any other name must be one of :data:`RULE_COLUMNS`, or
+    :class:`RuleCompileError` is raised here.
+
+    Rules see raw metrics only, not stage statuses: an anchor whose delta
+    row is INCONCLUSIVE (unconverged op-probe, unreadable sidecar) but has
+    a finite ``delta_chart`` is classified on that value, whereas the
+    legacy status-based triage treats any non-PASS delta as failing.
+    """
+    constants = {key: value for key, value in _constants(cfg).items() if key not in symbols}
+    payload = json.dumps(
+        {"triage": cfg.get("triage", {}), "constants": constants, "symbols": list(symbols)},
+        sort_keys=True,
+    )
+    return _compile_cached(payload)
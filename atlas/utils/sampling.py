@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+from scipy.stats import norm
+
+from atlas.utils.rng import DEFAULT_SEED, stable_hash64
+
+SAMPLE_WEIGHT_KEY = "sample_weight"
+
+Stratum = Tuple[str, Optional[str]]
+
+
+def stratum_of(state: Mapping[str, Any]) -> Stratum:
+    """``(system_class, ground_truth.class)``; the second part is ``None`` when unlabelled."""
+    truth = state.get("ground_truth") or {}
+    label = truth.get("class") if isinstance(truth, Mapping) else None
+    return str(state.get("system_class", "unknown")), None if label is None else str(label)
+
+
+def sample_key(anchor_id: str, seed: int = DEFAULT_SEED) -> float:
+    """Uniform ``[0, 1)`` draw fixed by ``(seed, anchor_id)``; a smaller fraction selects a subset."""
+    return stable_hash64(f"{seed}\x00sample\x00{anchor_id}") / 2.0**64
+
+
+@dataclass
+class StratifiedSampler:
+    """Hash-threshold sample of anchors, post-stratified by :func:`stratum_of`.
+
+    An anchor is kept when its :func:`sample_key` is below ``fraction``, so
+    the sample does not depend on file order or sharding.  Every stratum
+    seen in the input is represented: if none of its anchors passes the
+    threshold, the one with the smallest key is backfilled at the end.
+    """
+
+    fraction: float
+    seed: int = DEFAULT_SEED
+    population: Dict[Stratum, int] = field(default_factory=dict)
+    sampled: Dict[Stratum, int] = field(default_factory=dict)
+    reserve: Dict[Stratum, Tuple[float, Dict[str, Any]]] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        if not 0.0 < self.fraction <= 1.0:
+            raise ValueError(f"Sample fraction must be in (0, 1]: {self.fraction}")
+
+    def offer(self, state: Dict[str, Any]) -> bool:
+        """Count ``state`` in its stratum and say whether to evaluate it now."""
+        stratum = stratum_of(state)
+        self.population[stratum] = self.population.get(stratum, 0) + 1
+        key = sample_key(str(state.get("id", "unknown")), self.seed)
+        if key < self.fraction:
+            self.sampled[stratum] = self.sampled.get(stratum, 0) + 1
+            self.reserve.pop(stratum, None)
+            return True
+        if not self.sampled.get(stratum):
+            held = self.reserve.get(stratum)
+            if held is None or key < held[0]:
+                self.reserve[stratum] = (key, state)
+        return False
+
+    def backfill(self) -> List[Dict[str, Any]]:
+        """States for strata that got no sampled anchor; call once after the last :meth:`offer`."""
+        states = []
+        for stratum, (_, state) in sorted(self.reserve.items(), key=lambda item: item[1][0]):
+            self.sampled[stratum] = 1
+            states.append(state)
+        self.reserve.clear()
+        return states
+
+    def weight(self, stratum: Stratum) -> float:
+        """Inverse inclusion probability ``N_h / n_h``; final only once the input is exhausted."""
+        return self.population[stratum] / self.sampled[stratum]
+
+    def scale_up(self, counts: Mapping[Stratum, Mapping[str, int]]) -> Dict[str, Dict[str, Any]]:
+        """Population totals of per-stratum label counts with normal-approximation 95% CIs.
+
+        Each stratum contributes ``N_h * c_h / n_h``; the variance uses the
+        finite-population correction ``1 - n_h / N_h`` and the sample
+        variance of the label indicator (``1/4`` when ``n_h = 1``).
+        """
+        z = float(norm.ppf(0.975))
+        total = sum(self.population.values())
+        labels = sorted({label for per in counts.values() for label in per})
+        out: Dict[str, Dict[str, Any]] = {}
+        for label in labels:
+            estimate = 0.0
+            variance = 0.0
+            seen = 0
+            for stratum, n_h in self.sampled.items():
+                big_n = self.population[stratum]
+                c = counts.get(stratum, {}).get(label, 0)
+                seen += c
+                p = c / n_h
+                s2 = p * (1.0 - p) * n_h / (n_h - 1) if n_h > 1 else 0.25
+                estimate += big_n * p
+                variance += big_n**2 * (1.0 - n_h / big_n) * s2 / n_h
+            half = z * float(np.sqrt(variance))
+            out[label] = {
+                "estimate": estimate,
+                "ci95": [max(0.0, estimate - half), min(float(total), estimate + half)],
+                "proportion": estimate / total if total else 0.0,
+                "sampled": seen,
+            }
+        return out
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "fraction": self.fraction,
+            "seed": self.seed,
+            "population": sum(self.population.values()),
+            "sampled": sum(self.sampled.values()),
+            "strata": [
+                {
+                    "system_class": stratum[0],
+                    "class": stratum[1],
+                    "population": self.population[stratum],
+                    "sampled": self.sampled.get(stratum, 0),
+                }
+                for stratum in sorted(self.population, key=lambda s: (s[0], s[1] or ""))
+            ],
+        }
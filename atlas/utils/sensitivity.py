@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+from scipy.stats import norm
+
+from atlas.utils.rng import DEFAULT_SEED, SubstreamPool
+from atlas.utils.rules import compile_triage
+
+# Observables whose external-anchor ci_95 is propagated, and the cached column each perturbs.
+PERTURBED = {"Delta": "delta_chart", "deltaN": "abs_delta_N"}
+
+# Status codes shared by the vectorised decisions.
+PASS, WARN, FAIL, INCONCLUSIVE = 0, 1, 2, 3
+STATUS_NAMES = np.array(["PASS", "WARN", "FAIL", "INCONCLUSIVE"], dtype=object)
+_FALLBACK_CLASSES = ("true_tear", "anomaly", "hard_spot", "fake")
+_CODES = {"PASS": PASS, "WARN": WARN, "FAIL": FAIL, "INCONCLUSIVE": INCONCLUSIVE}
+
+
+def status_code(status: Optional[str]) -> int:
+    return _CODES.get(status or "", INCONCLUSIVE)
+
+
+def sensitivity_settings(cfg: Mapping[str, Any]) -> Dict[str, Any]:
+    sens = cfg.get("provenance", {}).get("sensitivity", {})
+    method = sens.get("method", "monte_carlo")
+    if method != "monte_carlo":
+        raise ValueError(f"Unsupported provenance.sensitivity.method: {method}")
+    level = sens.get("vary_within_ci", "95%")
+    coverage = float(str(level).rstrip("%")) / 100.0 if isinstance(level, str) else float(level)
+    mode = sens.get("joint_vs_marginal", "joint")
+    if mode not in ("joint", "marginal"):
+        raise ValueError(f"Unsupported provenance.sensitivity.joint_vs_marginal: {mode}")
+    return {
+        "enabled": bool(sens.get("enabled", False)),
+        "samples": int(sens.get("samples", 100)),
+        "z": float(norm.ppf(0.5 + 0.5 * coverage)),
+        "mode": mode,
+        "flip_rate_threshold": float(sens.get("flip_rate_threshold", 0.1)),
+        "report_effect_on_passfail": bool(sens.get("report_effect_on_passfail", True)),
+    }
+
+
+def ci_sigmas(states: Sequence[Mapping[str, Any]], z: float) -> np.ndarray:
+    """``(Q, N)`` standard deviations implied by each anchor's ``provenance.ci_95`` (0 when absent).
+
+    Entries may be ``[lo, hi]`` intervals or a symmetric half-width.
+    """
+    sigmas = np.zeros((len(PERTURBED), len(states)), dtype=np.float64)
+    for j, state in enumerate(states):
+        ci = state.get("provenance", {}).get("ci_95") or {}
+        if not isinstance(ci, Mapping):
+            continue
+        for q, name in enumerate(PERTURBED):
+            bounds = ci.get(name)
+            try:
+                if isinstance(bounds, (list, tuple)) and len(bounds) == 2:
+                    half = 0.5 * (float(bounds[1]) - float(bounds[0]))
+                else:
+                    half = float(bounds)
+            except (TypeError, ValueError):
+                continue
+            if np.isfinite(half) and half > 0.0:
+                sigmas[q, j] = half / z
+    return sigmas
+
+
+@dataclass
+class CachedDecisions:
+    """Upstream per-anchor values the cheap downstream decisions are recomputed from."""
+
+    ids: List[str]
+    delta_chart: np.ndarray
+    delta_inconclusive: np.ndarray
+    abs_delta_n: np.ndarray
+    guard_pass: np.ndarray
+    plateau: np.ndarray
+    sg0: np.ndarray
+    sg2: np.ndarray
+
+    @classmethod
+    def from_rows(cls, rows_by_anchor: Mapping[str, Mapping[str, Dict[str, Any]]]) -> "CachedDecisions":
+        """Build from ``{anchor_id: {stage: row}}`` as emitted by the pipeline."""
+        ids = list(rows_by_anchor)
+
+        def aux(anchor: str, stage: str, key: str, default: Any) -> Any:
+            value = rows_by_anchor[anchor].get(stage, {}).get("aux", {}).get(key, default)
+            return default if value is None else value
+
+        def status(anchor: str, stage: str) -> int:
+            return status_code(rows_by_anchor[anchor].get(stage, {}).get("status"))
+
+        return cls(
+            ids=ids,
+            delta_chart=np.array([aux(a, "delta", "delta_chart", np.nan) for a in ids], dtype=np.float64),
+            delta_inconclusive=np.array([status(a, "delta") == INCONCLUSIVE for a in ids], dtype=bool),
+            abs_delta_n=np.array([aux(a, "nmod", "abs_delta_N", np.nan) for a in ids], dtype=np.float64),
+            guard_pass=np.array([bool(aux(a, "nmod", "guard_pass", False)) for a in ids], dtype=bool),
+            plateau=np.array([bool(aux(a, "htop", "plateau_detected", False)) for a in ids], dtype=bool),
+            sg0=np.array([status(a, "SG-0") for a in ids], dtype=np.int8),
+            sg2=np.array([status(a, "SG-2") for a in ids], dtype=np.int8),
+        )
+
+
+def decide(
+    cached: CachedDecisions,
+    delta_chart: np.ndarray,
+    abs_delta_n: np.ndarray,
+    cfg: Mapping[str, Any],
+) -> Dict[str, np.ndarray]:
+    """Vectorised delta/nmod status, SG-1/SG-3 gates and triage class code.
+
+    ``delta_chart``/``abs_delta_n`` may carry leading sample axes; the cached
+    per-anchor columns broadcast against the trailing anchor axis.
+    """
+    tau_delta = float(cfg.get("tau_delta", 0.15))
+    tau_n = float(cfg.get("tau_n", 0.05))
+    shape = np.broadcast_shapes(np.shape(delta_chart), np.shape(abs_delta_n))
+    with np.errstate(invalid="ignore"):
+        d = np.where(
+            ~np.isfinite(delta_chart),
+            FAIL,
+            np.where(delta_chart > tau_delta, WARN, np.where(cached.delta_inconclusive, INCONCLUSIVE, PASS)),
+        )
+        n = np.where(
+            ~np.isfinite(abs_delta_n),
+            FAIL,
+            np.where((abs_delta_n > tau_n) | ~cached.guard_pass, WARN, PASS),
+        )
+    d = np.broadcast_to(d, shape).astype(np.int8)
+    n = np.broadcast_to(n, shape).astype(np.int8)
+    sg1 = np.where((d == FAIL) | (n == FAIL), FAIL, np.where((d != PASS) | (n != PASS), WARN, PASS))
+    sg3 = np.where(
+        (cached.sg0 == FAIL) | (sg1 == FAIL) | (cached.sg2 == FAIL),
+        FAIL,
+        np.where((cached.sg0 == WARN) | (sg1 == WARN) | (cached.sg2 == WARN), WARN, PASS),
+    ).astype(np.int8)
+
+    plateau = np.broadcast_to(cached.plateau, shape)
+    if cfg.get("triage", {}).get("rules"):
+        codes = compile_triage(cfg).class_codes(
+            {
+                "delta_chart": np.broadcast_to(delta_chart, shape).reshape(-1),
+                "abs_delta_N": np.broadcast_to(abs_delta_n, shape).reshape(-1),
+                "H_plateau": plateau.reshape(-1).astype(np.float64),
+            }
+        ).reshape(shape)
+    else:
+        # Mirrors the fallback branch of triage.evaluate.
+        core_ok = (d == PASS) & (n == PASS)
+        codes = np.where(plateau, np.where(core_ok, 2, 0), np.where(core_ok, 3, 1))
+    return {"delta": d, "nmod": n, "SG-1": sg1, "SG-3": sg3, "triage": codes}
+
+
+def triage_labels(cfg: Mapping[str, Any]) -> List[str]:
+    """Class names indexed by the ``triage`` codes returned from :func:`decide`."""
+    if cfg.get("triage", {}).get("rules"):
+        return compile_triage(cfg).labels
+    return list(_FALLBACK_CLASSES)
+
+
+@dataclass
+class SensitivityResult:
+    """Per-anchor flip rates of each downstream decision over ``samples`` perturbations."""
+
+    samples: int
+    mode: str
+    baseline: Dict[str, np.ndarray]
+    flip_rates: Dict[str, np.ndarray]
+    passfail_flip_rate: np.ndarray
+    marginal: Dict[str, Dict[str, np.ndarray]] = field(default_factory=dict)
+
+    @property
+    def max_flip_rate(self) -> np.ndarray:
+        return np.max(np.stack(list(self.flip_rates.values())), axis=0)
+
+
+def _flips(baseline: Dict[str, np.ndarray], sampled: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    return {key: np.mean(sampled[key] != baseline[key][None, :], axis=0) for key in baseline}
+
+
+def _passfail(baseline: Dict[str, np.ndarray], sampled: Dict[str, np.ndarray]) -> np.ndarray:
+    return np.mean((sampled["SG-3"] == PASS) != (baseline["SG-3"] == PASS)[None, :], axis=0)
+
+
+def run_sensitivity(
+    cached: CachedDecisions,
+    sigmas: np.ndarray,
+    cfg: Mapping[str, Any],
+    *,
+    samples: int = 100,
+    mode: str = "joint",
+    seed: int = DEFAULT_SEED,
+    thread_offset: int = 0,
+) -> SensitivityResult:
+    """Monte Carlo over the ``ci_95`` of each perturbed observable.
+
+    Each anchor's ``(Q, S)`` normal draws come from its own Philox
+    substream, so results do not depend on block composition or order.
+    Every sample is decided in a single broadcast call, so ``S`` samples
+    cost roughly one vectorised pass over the anchors.
+    """
+    base_cols = {"delta_chart": cached.delta_chart, "abs_delta_N": cached.abs_delta_n}
+    baseline = decide(cached, cached.delta_chart, cached.abs_delta_n, cfg)
+    draws = np.empty((len(cached.ids), len(PERTURBED), samples), dtype=np.float64)
+    SubstreamPool(seed, "sensitivity", thread_offset).normal(cached.ids, draws)
+    shifted = {
+        col: base_cols[col][None, :] + draws[:, q, :].T * sigmas[q][None, :]
+        for q, col in enumerate(PERTURBED.values())
+    }
+    shifted["abs_delta_N"] = np.abs(shifted["abs_delta_N"])
+
+    joint = decide(cached, shifted["delta_chart"], shifted["abs_delta_N"], cfg)
+    flip_rates = _flips(baseline, joint)
+    passfail = _passfail(baseline, joint)
+    marginal: Dict[str, Dict[str, np.ndarray]] = {}
+    if mode == "marginal":
+        # One observable at a time; the headline rates become the worst single-observable rates.
+        passfail = np.zeros_like(passfail)
+        flip_rates = {key: np.zeros_like(value) for key, value in flip_rates.items()}
+        for name, col in PERTURBED.items():
+            cols = {key: (shifted[key] if key == col else value[None, :]) for key, value in base_cols.items()}
+            sampled = decide(cached, cols["delta_chart"], cols["abs_delta_N"], cfg)
+            marginal[name] = _flips(baseline, sampled)
+            passfail = np.maximum(passfail, _passfail(baseline, sampled))
+            for key, value in marginal[name].items():
+                flip_rates[key] = np.maximum(flip_rates[key], value)
+    return SensitivityResult(
+        samples=samples,
+        mode=mode,
+        baseline=baseline,
+        flip_rates=flip_rates,
+        passfail_flip_rate=passfail,
+        marginal=marginal,
+    )
@@ -1,66 +1,444 @@
 from __future__ import annotations
 
-from typing import Dict, Iterable, Sequence, Tuple
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 import numpy as np
 
+from atlas.utils.rng import stable_hash64
+from atlas.utils.streaming import DEFAULT_CHUNK
 
-def _prepare_scores(
+TRIAGE_CLASSES = ("true_tear", "anomaly", "hard_spot", "fake")
+DEFAULT_ROC_BINS = 4096
+
+
+def triage_columns(
     rows: Iterable[Dict[str, object]],
-    positives: Sequence[str],
-) -> Sequence[Tuple[float, bool]]:
-    pairs = []
-    pos_set = set(positives)
+    weight_key: Optional[str] = None,
+) -> Dict[str, Optional[np.ndarray]]:
+    """``confidence``/``class``/``weight``/``anchor_id`` columns from triage rows.
+
+    Rows whose ``aux.confidence`` is not numeric are dropped.  Weights come
+    from ``aux[weight_key]`` (1.0 where missing) and are ``None`` without a key.
+    """
+    scores = []
+    classes = []
+    weights = []
+    anchors = []
     for r in rows:
         aux = r.get("aux", {}) if isinstance(r, dict) else {}
-        cls = aux.get("class")
-        conf = aux.get("confidence")
         try:
-            score = float(conf)
+            score = float(aux.get("confidence"))
         except (TypeError, ValueError):
             continue
-        pairs.append((score, cls in pos_set))
-    pairs.sort(key=lambda x: -x[0])
-    return pairs
+        scores.append(score)
+        classes.append(aux.get("class"))
+        anchors.append(str(r.get("anchor_id", "")))
+        if weight_key is not None:
+            try:
+                weights.append(float(aux.get(weight_key, 1.0)))
+            except (TypeError, ValueError):
+                weights.append(1.0)
+    return {
+        "confidence": np.asarray(scores, dtype=np.float64),
+        "class": np.asarray(classes, dtype=object),
+        "weight": np.asarray(weights, dtype=np.float64) if weight_key is not None else None,
+        "anchor_id": np.asarray(anchors, dtype=object),
+    }
 
 
-def roc_curve(
+def triage_arrays(
     rows: Iterable[Dict[str, object]],
-    positives: Sequence[str] = ("true_tear",),
+    weight_key: Optional[str] = None,
+) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    """``(confidence, class, weight)`` columns from triage rows (see :func:`triage_columns`)."""
+    cols = triage_columns(rows, weight_key)
+    return cols["confidence"], cols["class"], cols["weight"]
+
+
+def _empty_roc(auc: float) -> Dict[str, object]:
+    return {"fpr": [0.0, 1.0], "tpr": [0.0, 1.0], "auc": auc, "best_J": 0.0, "threshold": 1.0}
+
+
+def roc_sweep(
+    scores: np.ndarray,
+    positive: np.ndarray,
+    weights: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Cumulative ``(thresholds, tp, fp, P, N)`` for ``(n, K)`` positive masks over one descending sort.
+
+    One operating point is taken at the first row of every tie group, and
+    ``thresholds[0]`` is the top score plus ``1e-9`` (the all-negative point).
+    Without ``weights`` the counts stay integer.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    positive = np.asarray(positive, dtype=bool).reshape(scores.size, -1)
+    w = np.ones(scores.size, dtype=np.int64) if weights is None else np.asarray(weights, dtype=np.float64)
+    order = np.argsort(-scores, kind="stable")
+    s_sorted = scores[order]
+    first = np.flatnonzero(np.r_[True, s_sorted[1:] != s_sorted[:-1]])
+    pos_w = positive[order] * w[order][:, None]
+    neg_w = (~positive[order]) * w[order][:, None]
+    tp = np.cumsum(pos_w, axis=0)[first]
+    fp = np.cumsum(neg_w, axis=0)[first]
+    thresholds = np.r_[s_sorted[0] + 1e-9, s_sorted[first]]
+    return thresholds, tp, fp, pos_w.sum(axis=0), neg_w.sum(axis=0)
+
+
+def _roc_from_counts(
+    thresholds: np.ndarray,
+    tp: np.ndarray,
+    fp: np.ndarray,
+    p: Any,
+    n: Any,
 ) -> Dict[str, object]:
-    pairs = _prepare_scores(rows, positives)
-    if not pairs:
-        return {"fpr": [0.0, 1.0], "tpr": [0.0, 1.0], "auc": 0.5, "best_J": 0.0, "threshold": 1.0}
-    labels = np.array([1 if is_pos else 0 for _, is_pos in pairs], dtype=np.int32)
-    scores = np.array([score for score, _ in pairs], dtype=np.float64)
-    P = labels.sum()
-    N = len(labels) - P
-    if P == 0 or N == 0:
-        base = 0.5 if P == N else (1.0 if P > 0 else 0.0)
-        return {"fpr": [0.0, 1.0], "tpr": [0.0, 1.0], "auc": base, "best_J": 0.0, "threshold": 1.0}
-
-    fpr = [0.0]
-    tpr = [0.0]
-    thresholds = [scores[0] + 1e-9]
-    tp = fp = 0
-    prev_score = None
-    for score, label in zip(scores, labels):
-        tp += label
-        fp += (1 - label)
-        if prev_score is None or score != prev_score:
-            fpr.append(fp / N)
-            tpr.append(tp / P)
-            thresholds.append(score)
-            prev_score = score
-    auc = 0.0
-    for i in range(1, len(fpr)):
-        auc += (fpr[i] - fpr[i - 1]) * (tpr[i] + tpr[i - 1]) * 0.5
-    youden = np.array(tpr) - np.array(fpr)
+    if p <= 0 or n <= 0:
+        return _empty_roc(0.5 if p == n else (1.0 if p > 0 else 0.0))
+    fpr = np.r_[0.0, fp / n]
+    tpr = np.r_[0.0, tp / p]
+    # Sequential cumsum rather than a pairwise sum keeps the trapezoid total bit-stable.
+    auc = np.cumsum((fpr[1:] - fpr[:-1]) * (tpr[1:] + tpr[:-1]) * 0.5)
+    youden = tpr - fpr
     idx = int(np.argmax(youden))
     return {
-        "fpr": list(map(float, fpr)),
-        "tpr": list(map(float, tpr)),
-        "auc": float(auc),
+        "fpr": fpr.tolist(),
+        "tpr": tpr.tolist(),
+        "auc": float(auc[-1]) if auc.size else 0.0,
         "best_J": float(youden[idx]),
         "threshold": float(thresholds[idx]),
     }
+
+
+def roc_arrays(
+    scores: np.ndarray,
+    classes: np.ndarray,
+    positives: Sequence[str] = ("true_tear",),
+    weights: Optional[np.ndarray] = None,
+) -> Dict[str, object]:
+    """Array form of :func:`roc_curve`: ``classes`` in ``positives`` are the positive set."""
+    scores = np.asarray(scores, dtype=np.float64)
+    if scores.size == 0:
+        return _empty_roc(0.5)
+    positive = np.isin(np.asarray(classes, dtype=object), list(positives))
+    thresholds, tp, fp, p, n = roc_sweep(scores, positive, weights)
+    return _roc_from_counts(thresholds, tp[:, 0], fp[:, 0], p[0], n[0])
+
+
+def roc_one_vs_rest(
+    scores: np.ndarray,
+    classes: np.ndarray,
+    labels: Sequence[str] = TRIAGE_CLASSES,
+    weights: Optional[np.ndarray] = None,
+) -> Dict[str, Dict[str, object]]:
+    """Per-class ROC (class vs rest) for every label from a single sort of ``scores``."""
+    scores = np.asarray(scores, dtype=np.float64)
+    if scores.size == 0:
+        return {label: _empty_roc(0.5) for label in labels}
+    classes = np.asarray(classes, dtype=object)
+    positive = np.stack([classes == label for label in labels], axis=1)
+    thresholds, tp, fp, p, n = roc_sweep(scores, positive, weights)
+    return {
+        label: _roc_from_counts(thresholds, tp[:, k], fp[:, k], p[k], n[k])
+        for k, label in enumerate(labels)
+    }
+
+
+def fold_ids(anchor_ids: Sequence[str], k: int) -> np.ndarray:
+    """Deterministic fold per row from a process-independent hash of ``anchor_id``.
+
+    Every row of one anchor lands in the same fold, whatever the file order or shard.
+    """
+    uniq, inverse = np.unique(np.asarray(anchor_ids, dtype=object).astype(str), return_inverse=True)
+    folds = np.fromiter((stable_hash64(a) % k for a in uniq.tolist()), dtype=np.int64, count=uniq.size)
+    return folds[inverse.reshape(-1)]
+
+
+def _t975(dof: int) -> float:
+    from scipy.stats import t
+
+    return float(t.ppf(0.975, dof))
+
+
+def kfold_roc(
+    scores: np.ndarray,
+    classes: np.ndarray,
+    anchor_ids: Sequence[str],
+    k: int = 5,
+    positives: Sequence[str] = ("true_tear",),
+    weights: Optional[np.ndarray] = None,
+) -> Dict[str, object]:
+    """K-fold ROC calibration: best-J threshold fitted on k-1 folds, scored on the held-out fold.
+
+    All folds share one descending sort of ``scores``: held-out and
+    training counts for every fold are columns of a single cumulative
+    sum, so the threshold chosen on the training curve is read off the
+    held-out curve at the same index.  Folds with no positives or no
+    negatives are reported but left out of the pooled mean/variance;
+    ``ci95`` is a Student-t interval on the mean held-out AUC.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    folds = fold_ids(anchor_ids, k) if scores.size else np.empty(0, dtype=np.int64)
+    positive = np.isin(np.asarray(classes, dtype=object), list(positives))
+    per_fold: List[Dict[str, object]] = []
+    if scores.size:
+        order = np.argsort(-scores, kind="stable")
+        s_sorted = scores[order]
+        # Points close whole tie groups: folds share the grid, so a group's first row may sit in another fold.
+        last = np.flatnonzero(np.r_[s_sorted[1:] != s_sorted[:-1], True])
+        thresholds = np.r_[s_sorted[0] + 1e-9, s_sorted[last]]
+        # Column ``f`` counts fold-f positives, column ``k + f`` fold-f negatives.
+        column = folds[order] + k * (~positive[order])
+        w = np.ones(scores.size, dtype=np.int64) if weights is None else np.asarray(weights, dtype=np.float64)[order]
+        counts = np.empty((last.size, 2 * k), dtype=w.dtype)
+        totals = np.empty(2 * k, dtype=w.dtype)
+        for c in range(2 * k):
+            running = np.cumsum(np.where(column == c, w, 0))
+            counts[:, c] = running[last]
+            totals[c] = running[-1]
+        held_tp, held_fp = counts[:, :k], counts[:, k:]
+        held_p, held_n = totals[:k], totals[k:]
+        train_tp = held_tp.sum(axis=1, keepdims=True) - held_tp
+        train_fp = held_fp.sum(axis=1, keepdims=True) - held_fp
+        train_p = held_p.sum() - held_p
+        train_n = held_n.sum() - held_n
+    for f in range(k):
+        entry: Dict[str, object] = {"fold": f, "n": int(np.sum(folds == f))}
+        if scores.size and held_p[f] > 0 and held_n[f] > 0 and train_p[f] > 0 and train_n[f] > 0:
+            train_j = np.r_[0.0, train_tp[:, f] / train_p[f] - train_fp[:, f] / train_n[f]]
+            idx = int(np.argmax(train_j))
+            held = _roc_from_counts(thresholds, held_tp[:, f], held_fp[:, f], held_p[f], held_n[f])
+            tpr = held["tpr"][idx]
+            fpr = held["fpr"][idx]
+            entry.update(
+                {
+                    "AUC": held["auc"],
+                    "threshold": float(thresholds[idx]),
+                    "TPR": tpr,
+                    "FPR": fpr,
+                    "best_J": tpr - fpr,
+                }
+            )
+        per_fold.append(entry)
+
+    valid = [e for e in per_fold if "AUC" in e]
+
+    def pooled(key: str) -> Tuple[float, float]:
+        values = np.asarray([e[key] for e in valid], dtype=np.float64)
+        if not values.size:
+            return float("nan"), float("nan")
+        return float(values.mean()), float(values.var(ddof=1)) if values.size > 1 else 0.0
+
+    auc, auc_var = pooled("AUC")
+    threshold, threshold_var = pooled("threshold")
+    best_j, best_j_var = pooled("best_J")
+    if len(valid) > 1:
+        half = _t975(len(valid) - 1) * np.sqrt(auc_var / len(valid))
+        ci95 = [float(max(auc - half, 0.0)), float(min(auc + half, 1.0))]
+    else:
+        ci95 = [0.0, 1.0]
+    return {
+        "kfold": int(k),
+        "folds_used": len(valid),
+        "AUC": auc,
+        "AUC_var": auc_var,
+        "best_J": best_j,
+        "best_J_var": best_j_var,
+        "threshold": threshold,
+        "threshold_var": threshold_var,
+        "TPR": pooled("TPR")[0],
+        "FPR": pooled("FPR")[0],
+        "ci95": ci95,
+        "folds": per_fold,
+    }
+
+
+def roc_curve(
+    rows: Iterable[Dict[str, object]],
+    positives: Sequence[str] = ("true_tear",),
+    weight_key: Optional[str] = None,
+) -> Dict[str, object]:
+    scores, classes, weights = triage_arrays(rows, weight_key)
+    return roc_arrays(scores, classes, positives, weights)
+
+
+def histogram_bins(scores: np.ndarray, bins: int, lo: float = 0.0, hi: float = 1.0) -> np.ndarray:
+    """:class:`RocSketch` column of every score: ``0``/``bins + 1`` are under/overflow."""
+    scaled = (np.asarray(scores, dtype=np.float64) - lo) * (bins / (hi - lo))
+    # Bin ``i`` (1-based) is [lo + (i-1) w, lo + i w); ``hi`` itself lands in the top bin.
+    idx = np.where(scaled == bins, bins, np.floor(scaled) + 1)
+    return np.clip(idx, 0, bins + 1).astype(np.int64)
+
+
+def roc_histograms(
+    pos: np.ndarray,
+    neg: np.ndarray,
+    lo: float = 0.0,
+    hi: float = 1.0,
+) -> Dict[str, np.ndarray]:
+    """``auc``/``best_J``/``threshold``/``auc_error_bound`` for stacks of binned score histograms.
+
+    ``pos``/``neg`` have shape ``(..., bins + 2)`` laid out as
+    :class:`RocSketch` rows; every leading index is an independent curve,
+    so a whole grid of ROCs is reduced at once.
+    """
+    pos = np.asarray(pos, dtype=np.float64)
+    neg = np.asarray(neg, dtype=np.float64)
+    bins = pos.shape[-1] - 2
+    resolution = (hi - lo) / bins
+    p = pos.sum(axis=-1)
+    n = neg.sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        zero = np.zeros(pos.shape[:-1] + (1,))
+        tpr = np.concatenate([zero, np.cumsum(pos[..., ::-1], axis=-1) / p[..., None]], axis=-1)
+        fpr = np.concatenate([zero, np.cumsum(neg[..., ::-1], axis=-1) / n[..., None]], axis=-1)
+        auc = np.sum((fpr[..., 1:] - fpr[..., :-1]) * (tpr[..., 1:] + tpr[..., :-1]) * 0.5, axis=-1)
+        bound = 0.5 * np.sum(pos * neg, axis=-1) / (p * n)
+    youden = tpr - fpr
+    idx = np.argmax(youden, axis=-1)
+    edges = np.linspace(lo, hi, bins + 1)
+    thresholds = np.r_[hi + resolution, hi, edges[-2::-1], lo - resolution]
+    degenerate = (p <= 0) | (n <= 0)
+    return {
+        "auc": np.where(degenerate, np.where(p == n, 0.5, np.where(p > 0, 1.0, 0.0)), auc),
+        "best_J": np.where(degenerate, 0.0, np.take_along_axis(youden, idx[..., None], axis=-1)[..., 0]),
+        "threshold": np.where(degenerate, 1.0, thresholds[idx]),
+        "auc_error_bound": np.where(degenerate, 0.0, bound),
+    }
+
+
+@dataclass
+class RocSketch:
+    """Fixed-memory, mergeable ROC summary: per-class weighted histograms of ``confidence``.
+
+    ``counts`` has one row per label plus a final row for any other class,
+    and ``bins + 2`` columns (under/overflow at either end).  Counts are
+    exact, so merging shard sketches in any order gives the same result as
+    sketching the concatenated rows.  Curves are evaluated at bin edges,
+    which only loses the ordering of positive/negative pairs sharing a bin;
+    :meth:`roc` reports that as an error bound.
+    """
+
+    bins: int = DEFAULT_ROC_BINS
+    lo: float = 0.0
+    hi: float = 1.0
+    labels: List[str] = field(default_factory=lambda: list(TRIAGE_CLASSES))
+    counts: Optional[np.ndarray] = None
+
+    def __post_init__(self) -> None:
+        shape = (len(self.labels) + 1, self.bins + 2)
+        if self.counts is None:
+            self.counts = np.zeros(shape, dtype=np.float64)
+        self.counts = np.asarray(self.counts, dtype=np.float64).reshape(shape)
+
+    @property
+    def count(self) -> float:
+        return float(self.counts.sum())
+
+    def edges(self) -> np.ndarray:
+        return np.linspace(self.lo, self.hi, self.bins + 1)
+
+    def update(
+        self,
+        scores: np.ndarray,
+        classes: np.ndarray,
+        weights: Optional[np.ndarray] = None,
+    ) -> "RocSketch":
+        """Add rows; non-finite scores are ignored."""
+        scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+        classes = np.asarray(classes, dtype=object).reshape(-1)
+        keep = np.isfinite(scores)
+        if not np.any(keep):
+            return self
+        other = len(self.labels)
+        codes = np.full(scores.size, other, dtype=np.int64)
+        for k, label in enumerate(self.labels):
+            codes[classes == label] = k
+        idx = histogram_bins(scores[keep], self.bins, self.lo, self.hi)
+        flat = codes[keep] * (self.bins + 2) + idx
+        w = None if weights is None else np.asarray(weights, dtype=np.float64).reshape(-1)[keep]
+        self.counts += np.bincount(flat, weights=w, minlength=self.counts.size).reshape(self.counts.shape)
+        return self
+
+    def update_rows(
+        self,
+        rows: Iterable[Dict[str, object]],
+        *,
+        weight_key: Optional[str] = None,
+        chunk_size: int = DEFAULT_CHUNK,
+    ) -> "RocSketch":
+        """Stream triage rows through :func:`triage_arrays` in chunks of ``chunk_size``."""
+        it = iter(rows)
+        while True:
+            chunk = list(islice(it, chunk_size))
+            if not chunk:
+                return self
+            self.update(*triage_arrays(chunk, weight_key))
+
+    def merge(self, other: "RocSketch") -> "RocSketch":
+        if (other.bins, other.lo, other.hi, list(other.labels)) != (self.bins, self.lo, self.hi, list(self.labels)):
+            raise ValueError("Cannot merge ROC sketches with different grids or labels.")
+        self.counts += other.counts
+        return self
+
+    def _positive_rows(self, positives: Sequence[str]) -> np.ndarray:
+        return np.asarray([label in positives for label in self.labels] + [False], dtype=bool)
+
+    def roc(self, positives: Sequence[str] = ("true_tear",)) -> Dict[str, object]:
+        """Binned ROC with ``error_bound`` (AUC) and ``best_J_error_bound`` on the exact values.
+
+        Pairs in one bin count as ties (1/2), so the AUC is off by at most
+        half their share; moving the threshold inside a bin can raise TPR
+        by at most that bin's positive mass, which bounds the best-J gap.
+        """
+        mask = self._positive_rows(positives)
+        pos = self.counts[mask].sum(axis=0)[::-1]
+        neg = self.counts[~mask].sum(axis=0)[::-1]
+        p = float(pos.sum())
+        n = float(neg.sum())
+        resolution = (self.hi - self.lo) / self.bins
+        if p <= 0 or n <= 0:
+            out = _empty_roc(0.5 if p == n else (1.0 if p > 0 else 0.0))
+            out.update({"auc_error_bound": 0.0, "best_J_error_bound": 0.0, "threshold_resolution": resolution})
+            return out
+        occupied = (pos + neg) > 0
+        # Lower edge of each reversed column; under/overflow are clamped one bin outside the grid.
+        lower = np.r_[self.hi, self.edges()[-2::-1], self.lo - resolution]
+        tpr = np.r_[0.0, np.cumsum(pos)[occupied] / p]
+        fpr = np.r_[0.0, np.cumsum(neg)[occupied] / n]
+        thresholds = np.r_[self.hi + resolution, lower[occupied]]
+        auc = float(np.sum((fpr[1:] - fpr[:-1]) * (tpr[1:] + tpr[:-1]) * 0.5))
+        youden = tpr - fpr
+        idx = int(np.argmax(youden))
+        return {
+            "fpr": fpr.tolist(),
+            "tpr": tpr.tolist(),
+            "auc": auc,
+            "best_J": float(youden[idx]),
+            "threshold": float(thresholds[idx]),
+            "auc_error_bound": float(0.5 * np.dot(pos, neg) / (p * n)),
+            "best_J_error_bound": float(np.max(pos) / p),
+            "threshold_resolution": resolution,
+        }
+
+    def roc_one_vs_rest(self) -> Dict[str, Dict[str, object]]:
+        return {label: self.roc((label,)) for label in self.labels}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "bins": self.bins,
+            "lo": self.lo,
+            "hi": self.hi,
+            "labels": list(self.labels),
+            "counts": self.counts.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RocSketch":
+        return cls(
+            bins=int(data.get("bins", DEFAULT_ROC_BINS)),
+            lo=float(data.get("lo", 0.0)),
+            hi=float(data.get("hi", 1.0)),
+            labels=list(data.get("labels", TRIAGE_CLASSES)),
+            counts=np.asarray(data["counts"], dtype=np.float64) if "counts" in data else None,
+        )
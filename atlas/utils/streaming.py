@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from itertools import islice
+from math import ceil
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from atlas.utils.rng import DEFAULT_SEED, stable_hash64
+
+DEFAULT_CHUNK = 1 << 16
+DEFAULT_SKETCH_K = 200
+DEFAULT_BLOOM_BITS = 1 << 27
+
+
+def iter_chunks(values: Iterable[float], chunk_size: int = DEFAULT_CHUNK) -> Iterator[np.ndarray]:
+    """Yield float64 chunks from an array, memmap or arbitrary iterable without copying it whole."""
+    if isinstance(values, (list, tuple)):
+        values = np.asarray(values, dtype=np.float64)
+    if isinstance(values, np.ndarray):
+        flat = values.reshape(-1)
+        for start in range(0, flat.size, chunk_size):
+            yield np.asarray(flat[start : start + chunk_size], dtype=np.float64)
+        return
+    it = iter(values)
+    while True:
+        chunk = np.fromiter(islice(it, chunk_size), dtype=np.float64)
+        if chunk.size == 0:
+            return
+        yield chunk
+
+
+@dataclass
+class BloomFilter:
+    """Fixed-size membership filter: no false negatives, false positives at rate ~``(1 - e^(-kn/m))^k``."""
+
+    bits: int = DEFAULT_BLOOM_BITS
+    hashes: int = 4
+
+    def __post_init__(self) -> None:
+        self._table = bytearray((self.bits + 7) // 8)
+
+    def add(self, key: str) -> bool:
+        """Insert ``key``; returns whether it may have been inserted before."""
+        h = stable_hash64(key)
+        h1 = h & 0xFFFFFFFF
+        h2 = (h >> 32) | 1
+        table = self._table
+        seen = True
+        for i in range(self.hashes):
+            byte, bit = divmod((h1 + i * h2) % self.bits, 8)
+            mask = 1 << bit
+            if not table[byte] & mask:
+                seen = False
+                table[byte] |= mask
+        return seen
+
+
+@dataclass
+class RunningStats:
+    """Single-pass count/min/max/mean/variance accumulator (Welford with Chan merges).
+
+    Each chunk is summarised with vectorised NumPy and folded in with the
+    pairwise update of Chan et al., so partial results from different
+    workers can be combined with :meth:`merge` in any order.
+    """
+
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    min: float = float("inf")
+    max: float = float("-inf")
+
+    def _combine(self, count: int, mean: float, m2: float, lo: float, hi: float) -> None:
+        if count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2, self.min, self.max = count, mean, m2, lo, hi
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min = float(np.minimum(self.min, lo))
+        self.max = float(np.maximum(self.max, hi))
+
+    def update(self, chunk: Iterable[float]) -> "RunningStats":
+        arr = np.asarray(chunk, dtype=np.float64).reshape(-1)
+        if arr.size:
+            mean = float(np.mean(arr))
+            centred = arr - mean
+            self._combine(
+                int(arr.size),
+                mean,
+                float(np.dot(centred, centred)),
+                float(np.min(arr)),
+                float(np.max(arr)),
+            )
+        return self
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        self._combine(other.count, other.mean, other.m2, other.min, other.max)
+        return self
+
+    @classmethod
+    def from_values(cls, values: Iterable[float], chunk_size: int = DEFAULT_CHUNK) -> "RunningStats":
+        stats = cls()
+        for chunk in iter_chunks(values, chunk_size):
+            stats.update(chunk)
+        return stats
+
+    def std(self, ddof: int = 1) -> float:
+        if self.count <= ddof:
+            return 0.0
+        return float(np.sqrt(self.m2 / (self.count - ddof)))
+
+    def as_series_stats(self) -> Dict[str, Any]:
+        """Render in the ``delta`` stage ``series_stats`` layout."""
+        if self.count == 0:
+            return {"count": 0}
+        return {
+            "count": int(self.count),
+            "min": float(self.min),
+            "max": float(self.max),
+            "mean": float(self.mean),
+            "std": self.std(ddof=1),
+        }
+
+
+@dataclass
+class QuantileSketch:
+    """Mergeable KLL quantile sketch with ``O(k log(n / k))`` memory.
+
+    Level ``h`` holds items of weight ``2**h``.  An over-full level is
+    sorted, halved with a random offset and promoted; each such compaction
+    moves any rank by at most ``2**h``, which is accumulated in ``error``
+    so :meth:`rank_error` is a worst-case bound rather than an asymptotic
+    one.  Non-finite values are ignored.
+    """
+
+    k: int = DEFAULT_SKETCH_K
+    seed: int = DEFAULT_SEED
+    count: int = 0
+    min: float = float("inf")
+    max: float = float("-inf")
+    error: float = 0.0
+    levels: List[np.ndarray] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        # Keyed on the item count too, so a sketch restored from a shard dump
+        # does not replay the coin flips of a fresh one.
+        self._rng = np.random.Generator(np.random.Philox(np.random.SeedSequence([self.seed, self.count])))
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - 1 - h
+        return max(2, int(ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def _add(self, h: int, items: np.ndarray) -> None:
+        while len(self.levels) <= h:
+            self.levels.append(np.empty(0, dtype=np.float64))
+        self.levels[h] = np.concatenate([self.levels[h], items]) if self.levels[h].size else items
+
+    def _compress(self) -> None:
+        while True:
+            over = [h for h, level in enumerate(self.levels) if level.size > self._capacity(h)]
+            if not over:
+                return
+            h = over[0]
+            level = np.sort(self.levels[h])
+            odd = level.size % 2
+            self.levels[h] = level[level.size - odd :]
+            self._add(h + 1, level[int(self._rng.integers(2)) : level.size - odd : 2])
+            self.error += float(2**h)
+
+    def update(self, chunk: Iterable[float]) -> "QuantileSketch":
+        arr = np.asarray(chunk, dtype=np.float64).reshape(-1)
+        arr = arr[np.isfinite(arr)]
+        if arr.size:
+            self.count += int(arr.size)
+            self.min = float(np.minimum(self.min, np.min(arr)))
+            self.max = float(np.maximum(self.max, np.max(arr)))
+            self._add(0, arr.copy())
+            self._compress()
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        if other.k != self.k:
+            raise ValueError(f"Cannot merge sketches with k={self.k} and k={other.k}.")
+        for h, level in enumerate(other.levels):
+            if level.size:
+                self._add(h, level.copy())
+        self.count += other.count
+        self.min = float(np.minimum(self.min, other.min))
+        self.max = float(np.maximum(self.max, other.max))
+        self.error += other.error
+        self._compress()
+        return self
+
+    def _weighted(self) -> Tuple[np.ndarray, np.ndarray]:
+        values = np.concatenate([level for level in self.levels] or [np.empty(0)])
+        weights = np.concatenate(
+            [np.full(level.size, float(2**h)) for h, level in enumerate(self.levels)] or [np.empty(0)]
+        )
+        order = np.argsort(values, kind="stable")
+        return values[order], weights[order]
+
+    def rank_error(self) -> float:
+        """Worst-case normalised rank error of any quantile or CDF query."""
+        return self.error / self.count if self.count else 0.0
+
+    def quantiles(self, qs: Sequence[float]) -> np.ndarray:
+        qs = np.asarray(qs, dtype=np.float64)
+        if self.count == 0:
+            return np.full(qs.shape, np.nan)
+        values, weights = self._weighted()
+        cum = np.cumsum(weights)
+        idx = np.searchsorted(cum, qs * cum[-1], side="left")
+        return values[np.clip(idx, 0, values.size - 1)]
+
+    def quantile(self, q: float) -> float:
+        return float(self.quantiles([q])[0])
+
+    def median_mad(self) -> Tuple[float, float]:
+        """Median and median absolute deviation from the retained weighted items.
+
+        ``|x - m| <= r`` is an interval query, so the MAD rank is off by at
+        most twice :meth:`rank_error` on top of the median's own error.
+        """
+        if self.count == 0:
+            return float("nan"), float("nan")
+        values, weights = self._weighted()
+        cum = np.cumsum(weights)
+        median = float(values[min(np.searchsorted(cum, 0.5 * cum[-1]), values.size - 1)])
+        dev = np.abs(values - median)
+        order = np.argsort(dev, kind="stable")
+        dcum = np.cumsum(weights[order])
+        mad = float(dev[order][min(np.searchsorted(dcum, 0.5 * dcum[-1]), dev.size - 1)])
+        return median, mad
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "k": self.k,
+            "seed": self.seed,
+            "count": self.count,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "error": self.error,
+            "levels": [level.tolist() for level in self.levels],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuantileSketch":
+        count = int(data.get("count", 0))
+        return cls(
+            k=int(data.get("k", DEFAULT_SKETCH_K)),
+            seed=int(data.get("seed", DEFAULT_SEED)),
+            count=count,
+            min=float(data["min"]) if count else float("inf"),
+            max=float(data["max"]) if count else float("-inf"),
+            error=float(data.get("error", 0.0)),
+            levels=[np.asarray(level, dtype=np.float64) for level in data.get("levels", [])],
+        )
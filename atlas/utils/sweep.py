@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Sequence
+
+import numpy as np
+
+from atlas.utils.rules import compile_triage
+from atlas.utils.sensitivity import INCONCLUSIVE, PASS, CachedDecisions, status_code, triage_labels
+from atlas.utils.stats import roc_histograms
+
+# Stages whose rows carry every input of the swept decisions.
+SWEEP_STAGES = ("delta", "nmod", "htop", "SG-0", "SG-2")
+# Swept thresholds, in grid axis order.
+SWEPT = ("tau_delta", "tau_n", "order_agreement_tol", "oscillation_max")
+DEFAULT_SWEEP_BINS = 1024
+# Grid points x anchors evaluated per broadcast block.
+BLOCK_ELEMENTS = 1 << 22
+
+
+def _float(value: Any, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+@dataclass
+class SweepCache(CachedDecisions):
+    """:class:`CachedDecisions` plus the raw extrapolation-guard metrics behind ``guard_pass``."""
+
+    guard_available: np.ndarray
+    order_disagreement: np.ndarray
+    oscillations: np.ndarray
+
+    @classmethod
+    def from_stage_rows(cls, rows: Iterable[Mapping[str, Any]]) -> "SweepCache":
+        """One streaming pass over :data:`SWEEP_STAGES` rows; later rows of an anchor win.
+
+        Only a handful of numbers per anchor are kept, so this scales to
+        logs whose rows would not fit in memory as dicts.
+        """
+        index: Dict[str, int] = {}
+        cols: Dict[str, List[Any]] = {
+            "delta_chart": [],
+            "delta_status": [],
+            "abs_delta_n": [],
+            "guard_pass": [],
+            "plateau": [],
+            "SG-0": [],
+            "SG-2": [],
+            "guard_available": [],
+            "order_disagreement": [],
+            "oscillations": [],
+        }
+        defaults = {
+            "delta_chart": np.nan,
+            "delta_status": INCONCLUSIVE,
+            "abs_delta_n": np.nan,
+            "guard_pass": False,
+            "plateau": False,
+            "SG-0": INCONCLUSIVE,
+            "SG-2": INCONCLUSIVE,
+            "guard_available": False,
+            "order_disagreement": 0.0,
+            "oscillations": 0,
+        }
+        for row in rows:
+            anchor = str(row.get("anchor_id"))
+            i = index.get(anchor)
+            if i is None:
+                i = index[anchor] = len(index)
+                for key, values in cols.items():
+                    values.append(defaults[key])
+            stage = row.get("stage")
+            aux = row.get("aux", {}) or {}
+            if stage == "delta":
+                cols["delta_chart"][i] = _float(aux.get("delta_chart"), np.nan)
+                cols["delta_status"][i] = status_code(row.get("status"))
+            elif stage == "nmod":
+                metrics = aux.get("guard_metrics") or {}
+                cols["abs_delta_n"][i] = _float(aux.get("abs_delta_N"), np.nan)
+                cols["guard_pass"][i] = bool(aux.get("guard_pass", False))
+                cols["guard_available"][i] = int(metrics.get("count", 0) or 0) > 0
+                cols["order_disagreement"][i] = _float(metrics.get("order_disagreement"), 0.0)
+                cols["oscillations"][i] = int(metrics.get("oscillations", 0) or 0)
+            elif stage == "htop":
+                cols["plateau"][i] = bool(aux.get("plateau_detected", False))
+            elif stage in ("SG-0", "SG-2"):
+                cols[stage][i] = status_code(row.get("status"))
+        return cls(
+            ids=list(index),
+            delta_chart=np.asarray(cols["delta_chart"], dtype=np.float64),
+            delta_inconclusive=np.asarray(cols["delta_status"], dtype=np.int8) == INCONCLUSIVE,
+            abs_delta_n=np.asarray(cols["abs_delta_n"], dtype=np.float64),
+            guard_pass=np.asarray(cols["guard_pass"], dtype=bool),
+            plateau=np.asarray(cols["plateau"], dtype=bool),
+            sg0=np.asarray(cols["SG-0"], dtype=np.int8),
+            sg2=np.asarray(cols["SG-2"], dtype=np.int8),
+            guard_available=np.asarray(cols["guard_available"], dtype=bool),
+            order_disagreement=np.asarray(cols["order_disagreement"], dtype=np.float64),
+            oscillations=np.asarray(cols["oscillations"], dtype=np.int64),
+        )
+
+    def guard_at(self, order_tol: float, osc_max: float) -> np.ndarray:
+        """``guard_pass`` as ``nmod.evaluate`` would decide it under other guard thresholds."""
+        order_ok = (self.order_disagreement == 0) | (self.order_disagreement <= order_tol)
+        osc_ok = (self.oscillations == 0) | (self.oscillations <= osc_max)
+        return self.guard_available & order_ok & osc_ok
+
+    def save(self, path: str | Path) -> None:
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # An open handle stops numpy from appending ``.npz`` to the name.
+        with target.open("wb") as f:
+            np.savez(f, ids=np.asarray(self.ids, dtype=str), **{name: getattr(self, name) for name in _ARRAYS})
+
+    @classmethod
+    def load(cls, path: str | Path) -> "SweepCache":
+        with np.load(path) as data:
+            return cls(ids=data["ids"].tolist(), **{name: data[name] for name in _ARRAYS})
+
+
+_ARRAYS = (
+    "delta_chart",
+    "delta_inconclusive",
+    "abs_delta_n",
+    "guard_pass",
+    "plateau",
+    "sg0",
+    "sg2",
+    "guard_available",
+    "order_disagreement",
+    "oscillations",
+)
+
+
+def profile_values(cfg: Mapping[str, Any]) -> Dict[str, float]:
+    """The profile's own value of every :data:`SWEPT` threshold (stage defaults where unset)."""
+    guards = cfg.get("N_mod", {}).get("extrapolation_guard", {})
+    return {
+        "tau_delta": float(cfg.get("tau_delta", 0.15)),
+        "tau_n": float(cfg.get("tau_n", 0.05)),
+        "order_agreement_tol": float(guards.get("order_agreement_tol", 5e-3)),
+        "oscillation_max": float(int(guards.get("oscillation_max", 3))),
+    }
+
+
+@dataclass
+class SweepResult:
+    """Metrics on the Cartesian grid ``axes``; every array has one axis per :data:`SWEPT` name."""
+
+    axes: Dict[str, np.ndarray]
+    metrics: Dict[str, np.ndarray]
+    anchors: int
+    bins: int
+
+    def pareto(self, objectives: Sequence[str] = ("AUC", "best_J")) -> List[Dict[str, float]]:
+        """Grid points no other point beats on every objective (all maximised), best first."""
+        values = np.stack([self.metrics[name].reshape(-1) for name in objectives], axis=1)
+        order = np.lexsort(tuple(-values[:, k] for k in range(values.shape[1] - 1, -1, -1)))
+        front: List[int] = []
+        for i in order:
+            if front:
+                kept = values[front]
+                if np.any(np.all(kept >= values[i], axis=1) & np.any(kept > values[i], axis=1)):
+                    continue
+            front.append(int(i))
+        shape = tuple(axis.size for axis in self.axes.values())
+        points = []
+        for flat in front:
+            cell = np.unravel_index(flat, shape)
+            point = {name: float(axis[c]) for (name, axis), c in zip(self.axes.items(), cell)}
+            point.update({name: float(value[cell]) for name, value in self.metrics.items()})
+            points.append(point)
+        return points
+
+
+def _first_passing(values: np.ndarray, axis: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """Index of the first ascending ``axis`` value ``>= values`` (``axis.size`` = never passes)."""
+    idx = np.searchsorted(axis, np.where(valid, values, np.inf), side="left")
+    return np.where(valid, idx, axis.size)
+
+
+def sweep_grid(
+    cache: SweepCache,
+    cfg: Mapping[str, Any],
+    grid: Mapping[str, Sequence[float]],
+    positives: Sequence[str] = ("true_tear",),
+    *,
+    bins: int = DEFAULT_SWEEP_BINS,
+) -> SweepResult:
+    """Triage ROC and SG-3 pass rate for every point of a Cartesian threshold grid.
+
+    Every status is monotone in its threshold, so each anchor reduces to
+    the first grid index at which it passes along each axis.  The SG-3
+    pass count is then a 4-D histogram of those indices cumulated along
+    every axis.  Confidence and rule classes are broadcast over the
+    ``tau_n`` axis in blocks; when triage falls back to the status-based
+    classes, the guard axes enter through the same cumulated-histogram
+    trick on the per-bin class switch.  ROC curves are binned like
+    :class:`RocSketch` and reduced for the whole grid at once.
+    """
+    base = profile_values(cfg)
+    axes = {name: np.unique(np.asarray(grid.get(name, [base[name]]), dtype=np.float64)) for name in SWEPT}
+    td, tn, tol, osc = (axes[name] for name in SWEPT)
+    shape = tuple(axis.size for axis in axes.values())
+    size = len(cache.ids)
+
+    d_first = _first_passing(
+        cache.delta_chart, td, np.isfinite(cache.delta_chart) & ~cache.delta_inconclusive
+    )
+    n_first = _first_passing(cache.abs_delta_n, tn, np.isfinite(cache.abs_delta_n))
+    # A zero disagreement/oscillation count never trips the guard (see nmod.evaluate).
+    guarded = cache.guard_available
+    tol_first = np.where(cache.order_disagreement == 0, 0, _first_passing(cache.order_disagreement, tol, guarded))
+    osc_first = np.where(cache.oscillations == 0, 0, _first_passing(cache.oscillations, osc, guarded))
+    tol_first = np.where(guarded, tol_first, tol.size)
+    osc_first = np.where(guarded, osc_first, osc.size)
+
+    # SG-3 PASS needs SG-0, SG-2, delta and nmod (hence the guard) all PASS.
+    first = np.stack([d_first, n_first, tol_first, osc_first])
+    ok = (cache.sg0 == PASS) & (cache.sg2 == PASS) & np.all(first < np.asarray(shape)[:, None], axis=0)
+    passing = np.bincount(np.ravel_multi_index(first[:, ok], shape), minlength=int(np.prod(shape))).reshape(shape)
+    for k in range(len(shape)):
+        passing = np.cumsum(passing, axis=k)
+
+    ruled = bool(cfg.get("triage", {}).get("rules"))
+    compiled = compile_triage(cfg, symbols=("tau_delta", "tau_n"))
+    labels = triage_labels(cfg)
+    positive_code = np.asarray([label in positives for label in labels], dtype=bool)
+    width = bins + 2
+    guard_cells = tol.size * osc.size
+    metrics = {name: np.empty(shape) for name in ("AUC", "best_J", "threshold", "auc_error_bound")}
+    block = max(1, BLOCK_ELEMENTS // tn.size)
+    plateau = cache.plateau
+    if not ruled:
+        # Fallback classes (triage.evaluate): plateau picks true_tear/hard_spot, else anomaly/fake,
+        # and passing delta + nmod picks the second of each pair.
+        pos_fail = np.where(plateau, positive_code[0], positive_code[1])
+        pos_ok = np.where(plateau, positive_code[2], positive_code[3])
+        switch = (pos_ok.astype(np.int64) - pos_fail) * (tol_first < tol.size) * (osc_first < osc.size)
+        guard_cell = np.minimum(tol_first, tol.size - 1) * osc.size + np.minimum(osc_first, osc.size - 1)
+
+    rows = np.arange(tn.size)[:, None]
+    for a, tau_delta in enumerate(td):
+        pos = np.zeros((tn.size, width))
+        total = np.zeros((tn.size, width))
+        delta = np.zeros((tn.size, guard_cells, width))
+        for start in range(0, size, block):
+            sl = slice(start, min(size, start + block))
+            cols = {
+                "delta_chart": cache.delta_chart[None, sl],
+                "abs_delta_N": cache.abs_delta_n[None, sl],
+                "H_plateau": plateau[None, sl].astype(np.float64),
+                "tau_delta": np.float64(tau_delta),
+                "tau_n": tn[:, None],
+            }
+            conf = compiled.scores(cols)
+            # Same columns as histogram_bins, which needs no under/overflow handling on [0, 1].
+            score_bin = np.minimum((conf * bins).astype(np.int64) + 1, bins)
+            cells = (rows * width + score_bin).reshape(-1)
+            total += np.bincount(cells, minlength=total.size).reshape(total.shape)
+            if ruled:
+                hit = positive_code[compiled.class_codes(cols)].reshape(-1)
+            else:
+                hit = np.broadcast_to(pos_fail[None, sl], score_bin.shape).reshape(-1)
+                # Anchors whose delta/nmod pass here switch class from their guard cell onwards.
+                core = (d_first[None, sl] <= a) & (n_first[None, sl] <= rows) & (switch[None, sl] != 0)
+                r, j = np.nonzero(core)
+                flat = (r * guard_cells + guard_cell[sl][j]) * width + score_bin[r, j]
+                delta += np.bincount(flat, weights=switch[sl][j], minlength=delta.size).reshape(delta.shape)
+            pos += np.bincount(cells[hit], minlength=pos.size).reshape(pos.shape)
+        if ruled:
+            pos_grid = np.broadcast_to(pos[:, None, None, :], (tn.size, tol.size, osc.size, width))
+        else:
+            grid_delta = delta.reshape(tn.size, tol.size, osc.size, width)
+            grid_delta = np.cumsum(np.cumsum(grid_delta, axis=1), axis=2)
+            pos_grid = pos[:, None, None, :] + grid_delta
+        roc = roc_histograms(pos_grid, total[:, None, None, :] - pos_grid)
+        metrics["AUC"][a] = roc["auc"]
+        metrics["best_J"][a] = roc["best_J"]
+        metrics["threshold"][a] = roc["threshold"]
+        metrics["auc_error_bound"][a] = roc["auc_error_bound"]
+    metrics["pass_rate"] = passing / size if size else np.zeros(shape)
+    return SweepResult(axes=axes, metrics=metrics, anchors=size, bins=bins)
@@ -639,6 +639,8 @@ class AtlasContext:
         self._override_store.clear()
 
     def reset_dynamic_profiles(self) -> None:
+        for alias in [k for k, v in self.aliases.items() if v in self._dynamic_profiles]:
+            del self.aliases[alias]
         self._dynamic_profiles.clear()
 
     def select_profile(
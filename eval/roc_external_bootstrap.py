@@ -5,6 +5,13 @@ ATLAS v2.4R2 — External ROC with bootstrap CI (JSON Lines logger)
 - Reads labels(id,label) and scores(id,score) CSV (headers optional).
 - Computes AUC (mid-rank / Mann–Whitney), Youden's J (best_J, threshold),
   and 95% bootstrap CI (percentile).
+- Bootstrap AUCs are computed from resample counts over one ranking
+  (weighted Mann–Whitney), in seeded blocks optionally spread over
+  ``--workers`` processes; the CI depends only on ``--seed``.
+- ``--adaptive`` draws ``--batch`` resamples at a time and stops once both
+  CI endpoints move less than ``--ci-tol`` per batch with Monte Carlo SE
+  below it (``--bootstraps`` is then the cap); diagnostics go to
+  ``aux.convergence``.
 - Appends a single JSONL record:
   {
     "stage":"roc", "metric":"external", "value": <auc>, "threshold": <min_auc>,
@@ -22,8 +29,11 @@ import json
 import random
 import sys
 import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, Iterable, List, Sequence, Tuple
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 
 Label = Tuple[str, int]
@@ -72,6 +82,156 @@ def read_scores(path: Path) -> Dict[str, float]:
     return out
 
 
+def _gather_fields(buf: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Copy byte ranges ``[starts, ends)`` of ``buf`` into one fixed-width ``S`` array."""
+    lengths = ends - starts
+    width = int(lengths.max()) if lengths.size else 0
+    if width == 0:
+        return np.zeros(starts.size, dtype="S1")
+    mat = np.empty((starts.size, width), dtype=np.uint8)
+    last = buf.size - 1
+    for col in range(width):
+        byte = buf[np.minimum(starts + col, last)]
+        mat[:, col] = np.where(lengths > col, byte, 0)
+    return mat.view(f"S{width}").reshape(-1)
+
+
+def _parses(token: bytes, dtype: type) -> bool:
+    try:
+        dtype(token)
+        return True
+    except ValueError:
+        return False
+
+
+def _parse_values(values: np.ndarray, dtype: type) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorised parse returning (parsed values, ok-mask); bad tokens such as headers are skipped."""
+    ok = np.ones(values.size, dtype=bool)
+    try:
+        return values.astype(dtype), ok
+    except ValueError:
+        pass
+    try:
+        # The usual culprit is a single header row.
+        parsed = values[1:].astype(dtype)
+        ok[0] = False
+        return parsed, ok
+    except ValueError:
+        pass
+    ok = np.array([_parses(token, dtype) for token in values.tolist()], dtype=bool)
+    return values[ok].astype(dtype), ok
+
+
+def _read_id_value_columns(path: Path, dtype: type) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Bulk-load the first two CSV columns as (ids bytes array, values).
+
+    Line and comma offsets are found on the raw buffer, so no per-row
+    Python objects are created.  Rows without a second column or with an
+    unparseable value (headers) are skipped, matching :func:`read_labels`
+    / :func:`read_scores`.  Returns ``None`` for quoted CSV, which needs
+    the ``csv`` module.
+    """
+    raw = path.read_bytes()
+    if b'"' in raw:
+        return None
+    if b"\r" in raw:
+        raw = raw.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    buf = np.frombuffer(raw, dtype=np.uint8)
+    newlines = np.flatnonzero(buf == ord("\n"))
+    starts = np.r_[0, newlines + 1]
+    ends = np.r_[newlines, buf.size]
+    commas = np.flatnonzero(buf == ord(","))
+    first = np.searchsorted(commas, starts)
+    padded = np.r_[commas, buf.size, buf.size]
+    comma = padded[first]
+    keep = comma < ends
+    second = padded[first + 1]
+    starts, ends, comma, second = starts[keep], ends[keep], comma[keep], second[keep]
+    ids = _gather_fields(buf, starts, comma)
+    values = _gather_fields(buf, comma + 1, np.minimum(second, ends))
+    if b" " in raw or b"\t" in raw:
+        ids = np.char.strip(ids)
+        values = np.char.strip(values)
+    parsed, ok = _parse_values(values, dtype)
+    return ids[ok], parsed
+
+
+def read_labels_np(path: Path) -> Tuple[np.ndarray, np.ndarray]:
+    """NumPy counterpart of :func:`read_labels`: (ids, int64 labels)."""
+    columns = _read_id_value_columns(path, int)
+    if columns is None:
+        rows = read_labels(path)
+        return np.array([i.encode("utf-8") for i, _ in rows]), np.array([y for _, y in rows], dtype=np.int64)
+    return columns
+
+
+def read_scores_np(path: Path) -> Tuple[np.ndarray, np.ndarray]:
+    """NumPy counterpart of :func:`read_scores`: (ids, float64 scores); the join keeps the last duplicate."""
+    columns = _read_id_value_columns(path, float)
+    if columns is None:
+        mapping = read_scores(path)
+        return np.array([i.encode("utf-8") for i in mapping]), np.array(list(mapping.values()), dtype=np.float64)
+    return columns
+
+
+def _hash_ids(ids: np.ndarray, width: int) -> np.ndarray:
+    """FNV-1a over fixed-width byte ids, one vectorised pass per byte column."""
+    mat = np.ascontiguousarray(ids.astype(f"S{width}")).view(np.uint8).reshape(ids.size, width)
+    h = np.full(ids.size, 0xCBF29CE484222325, dtype=np.uint64)
+    prime = np.uint64(0x100000001B3)
+    for col in range(width):
+        h ^= mat[:, col]
+        h *= prime
+    return h
+
+
+def join_on_ids(
+    label_ids: np.ndarray,
+    labels: np.ndarray,
+    score_ids: np.ndarray,
+    scores: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Hash join keeping label order; duplicate score ids keep the last value like :func:`make_pairs`.
+
+    Ids are joined on 64-bit hashes with an integer sort, then the matched
+    byte strings are compared; a hash collision falls back to an exact
+    string-sorted join.
+    """
+    labels = np.asarray(labels)
+    if label_ids.size == 0 or score_ids.size == 0:
+        return np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int64)
+    width = max(label_ids.dtype.itemsize, score_ids.dtype.itemsize)
+    s_hash = _hash_ids(score_ids, width)
+    order = np.argsort(s_hash, kind="stable")
+    s_sorted = s_hash[order]
+    # Stable sort keeps file order inside a run, so the run's last element is the last duplicate.
+    last = np.r_[s_sorted[1:] != s_sorted[:-1], True]
+    same = ~last[:-1]
+    exact = True
+    if np.any(same):
+        ordered_ids = score_ids[order]
+        exact = bool(np.all(ordered_ids[:-1][same] == ordered_ids[1:][same]))
+    if exact:
+        keys = s_sorted[last]
+        src = order[last]
+        l_hash = _hash_ids(label_ids, width)
+        # Probing with sorted keys keeps searchsorted cache-friendly on 10^7 ids.
+        probe_order = np.argsort(l_hash)
+        pos = np.empty(l_hash.size, dtype=np.intp)
+        pos[probe_order] = np.searchsorted(keys, l_hash[probe_order])
+        pos = np.minimum(pos, keys.size - 1)
+        hit = keys[pos] == l_hash
+        matched = src[pos[hit]]
+        if np.all(score_ids[matched] == label_ids[hit]):
+            return scores[matched].astype(np.float64), labels[hit].astype(np.int64)
+    uniq, first = np.unique(score_ids[::-1].astype(f"S{width}"), return_index=True)
+    src = (score_ids.size - 1 - first)
+    probe = label_ids.astype(f"S{width}")
+    pos = np.minimum(np.searchsorted(uniq, probe), uniq.size - 1)
+    hit = uniq[pos] == probe
+    return scores[src[pos[hit]]].astype(np.float64), labels[hit].astype(np.int64)
+
+
 def make_pairs(labs: Sequence[Label], scrs: Dict[str, float]) -> Pairs:
     """Join labels and scores on id keeping label order."""
     return [(scrs[_id], y) for _id, y in labs if _id in scrs]
@@ -123,6 +283,37 @@ def youden_best_j(pairs: Pairs) -> Tuple[float, float | None]:
     return best_j, best_th
 
 
+def roc_sweep(scores: np.ndarray, labels: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Thresholds (unique scores, descending) with TPR/FPR for ``score >= t``: one sort plus cumsums."""
+    scores = np.asarray(scores, dtype=np.float64)
+    positive = np.asarray(labels) == 1
+    order = np.argsort(-scores, kind="stable")
+    s_sorted = scores[order]
+    tp = np.cumsum(positive[order])
+    fp = np.arange(1, s_sorted.size + 1) - tp
+    # Last index of each tie group: everything scoring >= t is predicted positive.
+    last = np.flatnonzero(np.r_[s_sorted[1:] != s_sorted[:-1], True])
+    p_count = int(positive.sum())
+    n_count = int(positive.size - p_count)
+    tpr = tp[last] / max(p_count, 1)
+    fpr = fp[last] / max(n_count, 1)
+    return s_sorted[last], tpr, fpr
+
+
+def youden_best_j_np(scores: np.ndarray, labels: np.ndarray) -> Tuple[float, float | None]:
+    """Sort-based :func:`youden_best_j`; ties in J resolve to the highest threshold, as there."""
+    scores = np.asarray(scores, dtype=np.float64)
+    if scores.size == 0:
+        return -1.0, None
+    thresholds, tpr, fpr = roc_sweep(scores, labels)
+    # As in youden_best_j, specificity is tn / max(n_count, 1): 0, not 1, without negatives.
+    n_count = int(np.count_nonzero(np.asarray(labels) != 1))
+    spec = 1.0 - fpr if n_count else np.zeros_like(fpr)
+    j = tpr + spec - 1.0
+    best = int(np.argmax(j))
+    return float(j[best]), float(thresholds[best])
+
+
 def bootstrap_auc_ci(
     pairs: Pairs, bootstraps: int, seed: int, max_tries_factor: int = 20
 ) -> Tuple[float, float, int]:
@@ -153,6 +344,239 @@ def bootstrap_auc_ci(
     return float(lo), float(hi), len(aucs)
 
 
+def rank_layout(scores: np.ndarray, labels: np.ndarray) -> Tuple[int, np.ndarray, np.ndarray]:
+    """Rank once for the Mann–Whitney statistic.
+
+    Items are laid out as negatives (ascending score) followed by
+    positives.  For every positive, ``lo``/``hi`` count the negatives
+    scoring strictly below / at most its score.  Returns ``(n_neg, lo, hi)``.
+    """
+    positive = labels == 1
+    neg_sorted = np.sort(scores[~positive])
+    pos_scores = scores[positive]
+    lo = np.searchsorted(neg_sorted, pos_scores, side="left")
+    hi = np.searchsorted(neg_sorted, pos_scores, side="right")
+    return int(neg_sorted.size), lo, hi
+
+
+def auc_np(scores: np.ndarray, labels: np.ndarray) -> float:
+    """Point AUC from :func:`rank_layout` (equal to :func:`auc_midrank`)."""
+    scores = np.asarray(scores, dtype=np.float64)
+    n_neg, lo, hi = rank_layout(scores, np.asarray(labels))
+    if n_neg == 0 or lo.size == 0:
+        return 0.5
+    return float(weighted_auc(np.ones(scores.size), n_neg, lo, hi)[0])
+
+
+def weighted_auc(counts: np.ndarray, n_neg: int, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """Mann–Whitney AUC per row of resample multiplicities in :func:`rank_layout` order.
+
+    Ties count 1/2, exactly as mid-ranks do; rows without both classes give NaN.
+    """
+    counts = np.atleast_2d(counts)
+    c_neg = counts[:, :n_neg]
+    c_pos = counts[:, n_neg:]
+    below = np.zeros((counts.shape[0], n_neg + 1), dtype=np.float64)
+    np.cumsum(c_neg, axis=1, out=below[:, 1:])
+    if np.array_equal(lo, hi):
+        u = np.einsum("ij,ij->i", c_pos, below[:, lo])
+    else:
+        u = 0.5 * np.einsum("ij,ij->i", c_pos, below[:, lo] + below[:, hi])
+    p = c_pos.sum(axis=1, dtype=np.float64)
+    q = below[:, -1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where((p > 0) & (q > 0), u / (p * q), np.nan)
+
+
+_WORKER: Dict[str, Tuple[int, np.ndarray, np.ndarray]] = {}
+
+
+def _init_worker(n_neg: int, lo: np.ndarray, hi: np.ndarray) -> None:
+    _WORKER["layout"] = (n_neg, lo, hi)
+
+
+def _bootstrap_block(task: Tuple[np.random.SeedSequence, int]) -> np.ndarray:
+    seed_seq, size = task
+    n_neg, lo, hi = _WORKER["layout"]
+    n = n_neg + lo.size
+    rng = np.random.Generator(np.random.Philox(seed_seq))
+    draws = rng.integers(0, n, size=(size, n))
+    # Per-row bincount keeps the scatter inside cache; equivalent to multinomial(n, 1/n).
+    counts = np.empty((size, n), dtype=np.int64)
+    for i in range(size):
+        counts[i] = np.bincount(draws[i], minlength=n)
+    return weighted_auc(counts, n_neg, lo, hi)
+
+
+def _block_rows(n: int) -> int:
+    # Keep one block's (rows, n) count matrix around 32 MB.
+    return int(max(1, min(256, (1 << 22) // max(n, 1))))
+
+
+class BootstrapRunner:
+    """Runs seeded resample blocks; block ``i`` always gets the ``i``-th spawned seed."""
+
+    def __init__(self, layout: Tuple[int, np.ndarray, np.ndarray], seed: int, workers: int = 1) -> None:
+        self.layout = layout
+        self.root = np.random.SeedSequence(seed)
+        self.block = _block_rows(layout[0] + layout[1].size)
+        self.workers = max(1, int(workers))
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> "BootstrapRunner":
+        if self.workers > 1:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=self.layout,
+            )
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+
+    def draw(self, count: int) -> np.ndarray:
+        """Bootstrap AUCs for ``count`` more resamples (NaN marks degenerate ones)."""
+        sizes = [self.block] * (count // self.block) + ([count % self.block] if count % self.block else [])
+        tasks = list(zip(self.root.spawn(len(sizes)), sizes))
+        if self._pool is None:
+            _init_worker(*self.layout)
+            parts = [_bootstrap_block(t) for t in tasks]
+        else:
+            parts = list(self._pool.map(_bootstrap_block, tasks))
+        return np.concatenate(parts) if parts else np.empty(0)
+
+
+def percentile_ci(aucs: np.ndarray) -> Tuple[float, float]:
+    """Same order-statistic rule as :func:`bootstrap_auc_ci`."""
+    ordered = np.sort(aucs)
+    return float(ordered[int(0.025 * ordered.size)]), float(ordered[int(0.975 * ordered.size) - 1])
+
+
+def bootstrap_auc_ci_np(
+    scores: np.ndarray,
+    labels: np.ndarray,
+    bootstraps: int,
+    seed: int,
+    max_tries_factor: int = 20,
+    workers: int = 1,
+) -> Tuple[float, float, int]:
+    """Vectorised :func:`bootstrap_auc_ci`: rank once, then weighted Mann–Whitney per resample.
+
+    Resamples are multinomial counts over the sorted items, drawn in blocks
+    seeded by ``SeedSequence(seed).spawn`` so the CI depends only on
+    ``seed`` and never on ``workers``.  Degenerate resamples are skipped
+    and topped up, bounded by ``max_tries_factor * bootstraps`` draws.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    labels = np.asarray(labels)
+    if scores.size == 0 or bootstraps <= 0:
+        return 0.0, 1.0, 0
+    kept: List[np.ndarray] = []
+    valid = 0
+    tries = 0
+    with BootstrapRunner(rank_layout(scores, labels), seed, workers) as runner:
+        while valid < bootstraps and tries < max_tries_factor * bootstraps:
+            batch = min(bootstraps - valid, max_tries_factor * bootstraps - tries)
+            aucs = runner.draw(batch)
+            tries += aucs.size
+            aucs = aucs[np.isfinite(aucs)]
+            kept.append(aucs)
+            valid += aucs.size
+    if not valid:
+        return 0.0, 1.0, 0
+    aucs = np.concatenate(kept)[:bootstraps]
+    lo, hi = percentile_ci(aucs)
+    return lo, hi, int(aucs.size)
+
+
+def quantile_mcse(aucs: np.ndarray, q: float) -> float:
+    """Monte Carlo standard error of the ``q`` sample quantile (binomial order-statistic interval).
+
+    The ranks ``n q +/- sqrt(n q (1 - q))`` bracket the quantile with about
+    68% coverage, so half the spread of those order statistics is one SE.
+    """
+    ordered = np.sort(aucs)
+    n = ordered.size
+    if n < 2:
+        return float("inf")
+    half = np.sqrt(n * q * (1.0 - q))
+    lo = int(np.clip(np.floor(n * q - half), 0, n - 1))
+    hi = int(np.clip(np.ceil(n * q + half), 0, n - 1))
+    return float(0.5 * (ordered[hi] - ordered[lo]))
+
+
+def adaptive_bootstrap_auc_ci_np(
+    scores: np.ndarray,
+    labels: np.ndarray,
+    max_bootstraps: int,
+    seed: int,
+    *,
+    tol: float = 0.005,
+    batch: int = 500,
+    min_bootstraps: int = 1000,
+    max_tries_factor: int = 20,
+    workers: int = 1,
+) -> Tuple[float, float, int, Dict[str, object]]:
+    """Sequential :func:`bootstrap_auc_ci_np`: draw ``batch`` resamples at a time until the CI settles.
+
+    After each batch (once ``min_bootstraps`` valid resamples exist) the
+    run stops when both percentile endpoints moved by at most ``tol``
+    since the previous batch and their Monte Carlo standard errors are
+    at most ``tol``.  ``max_bootstraps`` is a hard cap on valid
+    resamples.  Like the fixed-B path the result depends only on ``seed``
+    and ``batch``, never on ``workers``.  Returns ``(lo, hi, effective_B, diagnostics)``.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    labels = np.asarray(labels)
+    diag: Dict[str, object] = {
+        "adaptive": True,
+        "converged": False,
+        "tol": float(tol),
+        "batch": int(batch),
+        "B_cap": int(max_bootstraps),
+        "batches": 0,
+        "draws": 0,
+        "mcse": [None, None],
+        "delta": [None, None],
+    }
+    if scores.size == 0 or max_bootstraps <= 0:
+        return 0.0, 1.0, 0, diag
+    batch = max(1, int(batch))
+    budget = max_tries_factor * max_bootstraps
+    kept: List[np.ndarray] = []
+    valid = 0
+    tries = 0
+    prev: Optional[Tuple[float, float]] = None
+    ci = (0.0, 1.0)
+    with BootstrapRunner(rank_layout(scores, labels), seed, workers) as runner:
+        while valid < max_bootstraps and tries < budget:
+            aucs = runner.draw(min(batch, max_bootstraps - valid, budget - tries))
+            tries += aucs.size
+            aucs = aucs[np.isfinite(aucs)]
+            kept.append(aucs)
+            valid += aucs.size
+            diag["batches"] = int(diag["batches"]) + 1
+            if not valid:
+                continue
+            pooled = np.concatenate(kept)[:max_bootstraps]
+            ci = percentile_ci(pooled)
+            mcse = (quantile_mcse(pooled, 0.025), quantile_mcse(pooled, 0.975))
+            diag["mcse"] = [m if np.isfinite(m) else None for m in mcse]
+            if prev is not None:
+                delta = (abs(ci[0] - prev[0]), abs(ci[1] - prev[1]))
+                diag["delta"] = [delta[0], delta[1]]
+                if valid >= min_bootstraps and max(delta + mcse) <= tol:
+                    diag["converged"] = True
+                    break
+            prev = ci
+    diag["draws"] = int(tries)
+    if not valid:
+        return 0.0, 1.0, 0, diag
+    return ci[0], ci[1], int(min(valid, max_bootstraps)), diag
+
+
 def now_iso() -> str:
     return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
@@ -170,6 +594,7 @@ def build_record(
     thr_sha256: str,
     anchor_id: str,
     notes: str = "bootstrap-ci(robust)",
+    convergence: Optional[Dict[str, object]] = None,
 ) -> dict:
     status = "PASS" if auc >= min_auc else "FAIL"
     rec = {
@@ -193,6 +618,8 @@ def build_record(
         "thresholds_sha256": thr_sha256,
         "anchor_id": anchor_id,
     }
+    if convergence is not None:
+        rec["aux"]["convergence"] = convergence
     return rec
 
 
@@ -223,15 +650,44 @@ def parse_args(argv: Iterable[str]) -> argparse.Namespace:
     p.add_argument("--commit", default="UNKNOWN", help="Git commit id")
     p.add_argument("--anchor-id", default="UNKNOWN", help="External set id/DOI alias")
     p.add_argument("--seed", type=int, default=42, help="Random seed")
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes for bootstrap blocks (default 1; the CI does not depend on this)",
+    )
+    p.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Stop once the CI endpoints settle; --bootstraps becomes the hard cap",
+    )
+    p.add_argument(
+        "--ci-tol",
+        type=float,
+        default=0.005,
+        help="Adaptive mode: max endpoint change and Monte Carlo SE (default 0.005)",
+    )
+    p.add_argument(
+        "--batch",
+        type=int,
+        default=500,
+        help="Adaptive mode: resamples per batch (default 500)",
+    )
+    p.add_argument(
+        "--min-bootstraps",
+        type=int,
+        default=1000,
+        help="Adaptive mode: resamples before stopping is allowed (default 1000)",
+    )
     return p.parse_args(list(argv))
 
 
 def main(argv: Iterable[str]) -> int:
     args = parse_args(argv)
-    labels = read_labels(Path(args.labels))
-    scores = read_scores(Path(args.scores))
-    pairs = make_pairs(labels, scores)
-    if not pairs:
+    label_ids, labels = read_labels_np(Path(args.labels))
+    score_ids, scores = read_scores_np(Path(args.scores))
+    scores, labels = join_on_ids(label_ids, labels, score_ids, scores)
+    if scores.size == 0:
         # Degenerate input: still log a FAIL with wide CI to remain auditable.
         rec = build_record(
             auc=0.5,
@@ -252,11 +708,28 @@ def main(argv: Iterable[str]) -> int:
         print(json.dumps({"auc": 0.5, "ci95": [0.0, 1.0], "B": 0}))
         return 0
 
-    auc = auc_midrank(pairs)
-    best_j, best_th = youden_best_j(pairs)
-    ci_lo, ci_hi, eff_b = bootstrap_auc_ci(
-        pairs, int(args.bootstraps), int(args.seed)
-    )
+    auc = auc_np(scores, labels)
+    best_j, best_th = youden_best_j_np(scores, labels)
+    convergence = None
+    if args.adaptive:
+        ci_lo, ci_hi, eff_b, convergence = adaptive_bootstrap_auc_ci_np(
+            scores,
+            labels,
+            int(args.bootstraps),
+            int(args.seed),
+            tol=float(args.ci_tol),
+            batch=int(args.batch),
+            min_bootstraps=int(args.min_bootstraps),
+            workers=int(args.workers),
+        )
+    else:
+        ci_lo, ci_hi, eff_b = bootstrap_auc_ci_np(
+            scores,
+            labels,
+            int(args.bootstraps),
+            int(args.seed),
+            workers=int(args.workers),
+        )
 
     rec = build_record(
         auc=auc,
@@ -270,6 +743,7 @@ def main(argv: Iterable[str]) -> int:
         seed=int(args.seed),
         thr_sha256=str(args.thresholds_sha256),
         anchor_id=str(args.anchor_id),
+        convergence=convergence,
     )
     with Path(args.out).open("a", encoding="utf-8") as g:
         g.write(json.dumps(rec) + "\n")
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import json
+
+import codex
+import jsonschema
+import numpy as np
+import pytest
+
+from atlas.cli import anchor_distance, anchor_scales
+from atlas.stages import anchor
+from atlas.utils.anchor_index import AnchorIndex, load_or_build, mad_scales, params_matrix, sketch_params
+from atlas.utils.logging import StageMeta
+
+
+def _states(points, prefix):
+    return [
+        {
+            "id": f"{prefix}{i}",
+            "system_class": "toy",
+            "params": {"J": float(p[0]), "h": float(p[1]), "beta": float(p[2])},
+            "ground_truth": {},
+            "observables": {},
+        }
+        for i, p in enumerate(points)
+    ]
+
+
+CFG = {
+    "anchor_metric": {"type": "relative_l2", "scales": {"J": 1.0, "h": 0.5, "beta": 2.0}},
+    "anchor_distance_warn": 0.15,
+    "anchor_distance_hard": 0.3,
+}
+
+
+def test_query_matches_brute_force():
+    rng = np.random.default_rng(3)
+    anchors = _states(rng.normal(size=(200, 3)), "anc")
+    queries = _states(rng.normal(size=(50, 3)), "q")
+    index = AnchorIndex.build(anchors, CFG)
+    ids, dist = index.query(params_matrix(queries, index.names))
+
+    scales = np.array([1.0, 0.5, 2.0])
+    a = params_matrix(anchors, ["J", "h", "beta"]) / scales
+    q = params_matrix(queries, ["J", "h", "beta"]) / scales
+    brute = np.linalg.norm(q[:, None, :] - a[None, :, :], axis=2)
+    np.testing.assert_allclose(dist, brute.min(axis=1), rtol=1e-12)
+    assert list(ids) == [f"anc{i}" for i in brute.argmin(axis=1)]
+
+
+def test_levels_and_missing_params():
+    anchors = _states([[0.0, 0.0, 0.0]], "anc")
+    index = AnchorIndex.build(anchors, CFG)
+    states = _states([[0.1, 0.0, 0.0], [0.2, 0.0, 0.0], [0.5, 0.0, 0.0]], "s") + [{"id": "x", "params": {"J": 1.0}}]
+    rows = anchor.evaluate_block(states, CFG, StageMeta(seed=1, commit="t", thresholds_sha256="x"), index)
+    assert [r["status"] for r in rows] == ["PASS", "WARN", "FAIL", "INCONCLUSIVE"]
+    assert rows[1]["aux"]["nearest_anchor"] == "anc0"
+    assert rows[3]["value"] is None and rows[3]["aux"]["level"] == "NONE"
+
+
+def test_mad_fallback_and_cache_round_trip(tmp_path):
+    rng = np.random.default_rng(5)
+    anchors = _states(rng.normal(size=(30, 3)) * [1.0, 10.0, 0.1], "anc")
+    path = tmp_path / "anchors.jsonl"
+    path.write_text("".join(json.dumps(a) + "\n" for a in anchors), encoding="utf-8")
+    cfg = {"anchor_metric": {"type": "relative_l2", "scales": "from_anchor_or_units", "scales_fallback": "mad"}}
+    assert load_or_build(path, cfg).scale_source == "mad"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["anchors.jsonl"]
+
+    cache = tmp_path / "cache" / "anchors.npz"
+    first = load_or_build(path, cfg, cache_path=cache)
+    assert first.scales[1] > first.scales[0] > first.scales[2]
+    second = load_or_build(path, cfg, cache_path=cache)
+    assert second.digest == first.digest
+    np.testing.assert_array_equal(second.tree.data, first.tree.data)
+    queries = rng.normal(size=(5, 3))
+    for a, b in zip(first.query(queries), second.query(queries)):
+        np.testing.assert_array_equal(a, b)
+
+    # A different metric invalidates the cached index instead of reusing it.
+    units = {"anchor_metric": {"type": "relative_l2", "scales": "from_anchor_or_units", "scales_fallback": "units"}}
+    assert load_or_build(path, units, cache_path=cache).scale_source == "units"
+
+
+def test_cli_streams_blocks(tmp_path):
+    anchors = _states([[0.0, 0.0, 0.0], [1.0, 1.0, 1.0]], "anc")
+    states = _states([[0.05, 0.0, 0.0], [1.0, 1.0, 1.5], [3.0, 0.0, 0.0]], "s")
+    for p, rows in (("anchors.jsonl", anchors), ("in.jsonl", states)):
+        (tmp_path / p).write_text("".join(json.dumps(r) + "\n" for r in rows), encoding="utf-8")
+    thresholds = tmp_path / "thresholds.json"
+    thresholds.write_text(json.dumps(CFG), encoding="utf-8")
+    out = tmp_path / "out.jsonl"
+    anchor_distance.main(
+        [str(thresholds), str(tmp_path / "anchors.jsonl"), str(tmp_path / "in.jsonl"), str(out), "--block-size", "2"]
+    )
+    rows = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert [r["aux"]["nearest_anchor"] for r in rows] == ["anc0", "anc1", "anc1"]
+    assert [r["status"] for r in rows] == ["PASS", "WARN", "FAIL"]
+
+
+def test_cli_validates_first_block_unless_asked(tmp_path):
+    anchors = _states([[0.0, 0.0, 0.0]], "anc")
+    states = _states([[0.05, 0.0, 0.0], [0.1, 0.0, 0.0]], "s")
+    del states[1]["ground_truth"]
+    for p, rows in (("anchors.jsonl", anchors), ("in.jsonl", states)):
+        (tmp_path / p).write_text("".join(json.dumps(r) + "\n" for r in rows), encoding="utf-8")
+    thresholds = tmp_path / "thresholds.json"
+    thresholds.write_text(json.dumps(CFG), encoding="utf-8")
+    out = tmp_path / "out.jsonl"
+    argv = [str(thresholds), str(tmp_path / "anchors.jsonl"), str(tmp_path / "in.jsonl"), str(out), "--block-size", "1"]
+    anchor_distance.main(argv)
+    assert len(out.read_text(encoding="utf-8").splitlines()) == 2
+    with pytest.raises(jsonschema.ValidationError):
+        anchor_distance.main(argv + ["--validate"])
+    # Rows are written as each block is evaluated, so the first block is already on disk.
+    assert len(out.read_text(encoding="utf-8").splitlines()) == 1
+
+
+def test_streamed_mad_scales_feed_index_and_dynamic_profile(tmp_path):
+    rng = np.random.default_rng(9)
+    points = rng.normal(size=(3000, 3)) * [1.0, 10.0, 0.1]
+    states = _states(points, "s")
+    cfg = {"anchor_metric": {"type": "relative_l2", "scales": "from_anchor_or_units", "scales_fallback": "mad"}}
+    sketches = sketch_params(iter(states), ["J", "h", "beta"], chunk_size=500)
+    index = AnchorIndex.build(states[:10], cfg, sketches=sketches)
+    assert index.scale_source == "mad_sketch"
+    np.testing.assert_allclose(index.scales, mad_scales(points), rtol=0.05)
+
+    shards = []
+    for i, part in enumerate((states[:1500], states[1500:])):
+        path = tmp_path / f"part{i}.jsonl"
+        path.write_text("".join(json.dumps(s) + "\n" for s in part), encoding="utf-8")
+        shard = tmp_path / f"part{i}.sketch.json"
+        anchor_scales.main([str(path), str(tmp_path / f"part{i}.summary.json"), "--sketch-out", str(shard)])
+        shards.append(str(shard))
+    codex.reset_dynamic_profiles()
+    out = tmp_path / "scales.json"
+    anchor_scales.main(shards + [str(out), "--profile-name", "mad_scaled"])
+    summary = json.loads(out.read_text(encoding="utf-8"))
+    profile = codex.get("atlas.profile", "mad_scaled")
+    assert profile["id"] == summary["profile"]["id"]
+    scales = profile["profile"]["anchor_metric"]["scales"]
+    np.testing.assert_allclose([scales[n] for n in ("J", "h", "beta")], mad_scales(points), rtol=0.05)
+    assert summary["params"]["h"]["count"] == 3000
+    codex.reset_dynamic_profiles()
+
+
+def test_cli_takes_scales_from_overrides_or_sketches(tmp_path):
+    rng = np.random.default_rng(11)
+    states = _states(rng.normal(size=(400, 3)) * [1.0, 10.0, 0.1], "s")
+    anchors = _states([[0.0, 0.0, 0.0]], "anc")
+    for p, rows in (("anchors.jsonl", anchors), ("in.jsonl", states)):
+        (tmp_path / p).write_text("".join(json.dumps(r) + "\n" for r in rows), encoding="utf-8")
+    thresholds = tmp_path / "thresholds.json"
+    placeholder = {"anchor_metric": {"type": "relative_l2", "scales": "from_anchor_or_units", "scales_fallback": "mad"}}
+    thresholds.write_text(json.dumps(placeholder), encoding="utf-8")
+    shard = tmp_path / "in.sketch.json"
+    summary = tmp_path / "scales.json"
+    codex.reset_dynamic_profiles()
+    anchor_scales.main(
+        [str(tmp_path / "in.jsonl"), str(summary), "--sketch-out", str(shard), "--profile-name", "mad_cli"]
+    )
+    scales = json.loads(summary.read_text(encoding="utf-8"))["overrides"]["anchor_metric"]["scales"]
+    expected = np.linalg.norm(
+        params_matrix(states, ["J", "h", "beta"]) / [scales[n] for n in ("J", "h", "beta")], axis=1
+    )
+
+    base = [str(thresholds), str(tmp_path / "anchors.jsonl"), str(tmp_path / "in.jsonl")]
+    # A fresh process has no dynamic profiles; the summary registers the recorded one again.
+    codex.reset_dynamic_profiles()
+    for name, extra in (("sketch", ["--sketch", str(shard)]), ("overrides", ["--overrides", str(summary)])):
+        out = tmp_path / f"{name}.jsonl"
+        anchor_distance.main(base + [str(out)] + extra)
+        rows = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+        np.testing.assert_allclose([r["value"] for r in rows], expected, rtol=1e-12)
+    profile = codex.get("atlas.profile", "mad_cli")
+    assert profile["profile"]["anchor_metric"]["scales"] == scales
+
+    tampered = json.loads(summary.read_text(encoding="utf-8"))
+    tampered["profile"]["effective_sha256"] = "0" * 64
+    summary.write_text(json.dumps(tampered), encoding="utf-8")
+    with pytest.raises(ValueError):
+        anchor_distance.main(base + [str(tmp_path / "bad.jsonl"), "--overrides", str(summary)])
+    codex.reset_dynamic_profiles()
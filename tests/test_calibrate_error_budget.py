@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from atlas.cli import calibrate_error_budget as cal
+from atlas.cli.run_pipeline import run_pipeline
+from atlas.io.jsonl import read_jsonl, write_jsonl
+
+
+@pytest.fixture(scope="module")
+def results(tmp_path_factory):
+    output = tmp_path_factory.mktemp("cal") / "results.jsonl"
+    run_pipeline(Path("thresholds/thresholds.json"), Path("data/toy.jsonl"), output)
+    return output
+
+
+def test_streaming_calibration_matches_in_memory(results):
+    expected = cal.calibrate(list(read_jsonl(str(results))), method="max")
+    assert expected["samples"] > 0
+    streamed = cal.calibrate_file(results, block=7, method="max")
+    assert streamed.pop("grouping") == "contiguous"
+    assert streamed == expected
+
+    # A tiny Bloom filter flags fresh anchors as seen; the recheck keeps results exact.
+    rechecked = cal.calibrate_file(results, bloom_bits=16, method="max")
+    assert rechecked.pop("grouping") == "contiguous+recheck"
+    assert rechecked == expected
+
+
+def test_split_anchors_fall_back_to_spill(results, tmp_path):
+    rows = list(read_jsonl(str(results)))
+    random.Random(0).shuffle(rows)
+    # Stale duplicates earlier in the log must lose to the later rows, as in calibrate().
+    stale = [json.loads(json.dumps(r)) for r in rows if r["stage"] == "htop"][:5]
+    for row in stale:
+        row["aux"]["H_obs"] = 1e6
+    shuffled = tmp_path / "shuffled.jsonl"
+    write_jsonl(str(shuffled), stale + rows)
+    expected = cal.calibrate(list(read_jsonl(str(shuffled))), method="max")
+    streamed = cal.calibrate_file(shuffled, block=5, spill_dir=tmp_path, partitions=3, method="max")
+    assert streamed.pop("grouping") == "spill"
+    assert streamed == expected
+    assert list(tmp_path.iterdir()) == [shuffled]
+
+
+def test_quantile_calibration_recovers_profile_coefficients(results):
+    # The toy pipeline derives H_lb from thresholds c_delta=0.4, c_n=0.6, so the gap is exactly linear.
+    rows = list(read_jsonl(str(results)))
+    ids = sorted({row["anchor_id"] for row in rows})
+    classes = {anchor: ("boson" if i % 2 else "spin") for i, anchor in enumerate(ids)}
+    settings = cal.QuantileSettings(bootstraps=20)
+    fit = cal.calibrate(rows, settings=settings, classes=classes)
+    assert fit["method"] == "quantreg" and fit["converged"]
+    assert fit["c_delta"] == pytest.approx(0.4, abs=1e-6)
+    assert fit["c_n"] == pytest.approx(0.6, abs=1e-6)
+    lo, hi = fit["ci95"]["c_delta"]
+    assert lo <= fit["c_delta"] + 1e-9 and fit["c_delta"] <= hi + 1e-9
+    assert set(fit["by_class"]) == {"boson", "spin"}
+    assert sum(v["samples"] for v in fit["by_class"].values()) == fit["samples"]
+
+    streamed = cal.calibrate_file(results, bloom_bits=16, settings=settings, classes=classes)
+    assert streamed.pop("grouping") == "contiguous+recheck"
+    assert streamed["c_delta"] == pytest.approx(fit["c_delta"], abs=1e-9)
+    assert streamed["by_class"]["boson"]["c_n"] == pytest.approx(fit["by_class"]["boson"]["c_n"], abs=1e-9)
+
+
+def test_main_writes_quantile_coefficients(results, tmp_path):
+    out = tmp_path / "coeffs.json"
+    cal.main([str(results), str(out), "--states", "data/toy.jsonl", "--bootstraps", "5"])
+    data = json.loads(out.read_text())
+    assert data["method"] == "quantreg" and data["tau"] == 0.1
+    assert set(data["by_class"]) == {"spin"}
+
+
+def test_quantile_calibration_without_triplets(tmp_path):
+    empty = {"c_delta": 0.0, "c_n": 0.0, "samples": 0}
+    assert cal.calibrate([]) == {**empty, "tau": cal.DEFAULT_TAU, "method": "quantreg"}
+    log = tmp_path / "partial.jsonl"
+    write_jsonl(str(log), [{"anchor_id": "a", "stage": "delta", "aux": {"delta_chart": 0.1}}])
+    out = tmp_path / "out.json"
+    cal.main([str(log), str(out)])
+    assert json.loads(out.read_text(encoding="utf-8"))["samples"] == 0
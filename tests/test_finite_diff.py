@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from atlas.stages import nmod
+from atlas.utils.finite_diff import derivatives_from_table, differentiate, stencil_offsets, table_derivatives
+from atlas.utils.logging import StageMeta
+
+
+def test_central_richardson_matches_analytic_derivative():
+    x = np.array([0.3, 1.2, -2.0])
+    calls = []
+
+    def response(points):
+        calls.append(points.shape)
+        return np.sin(points)
+
+    batch = differentiate(response, x, h_rel_grid=[0.001, 0.003, 0.01, 0.03])
+    assert calls == [(3, 8)]
+    np.testing.assert_allclose(batch.value, np.cos(x), rtol=1e-10)
+    metrics = batch.guard_metrics()
+    assert metrics["order_disagreement"].shape == (3,)
+    assert np.all(metrics["order_disagreement"] < 1e-8)
+
+
+def test_forward_scheme_shares_base_point():
+    offsets = stencil_offsets([0.01, 0.03], "forward")
+    assert list(offsets) == [0.0, 0.01, 0.03]
+    batch = differentiate(np.exp, [0.5], h_rel_grid=[0.001, 0.003, 0.01, 0.03], scheme="forward", richardson_order=1)
+    assert batch.evaluations == 5
+    np.testing.assert_allclose(batch.value, np.exp(0.5), rtol=1e-8)
+
+
+def test_nmod_uses_tabulated_grid():
+    grid = [0.001, 0.003, 0.01, 0.03]
+    x = 0.7
+    values = np.sin(x + x * stencil_offsets(grid)).tolist()
+    state = {
+        "id": "fd",
+        "observables": {"deltaN": 0.01, "deltaN_grid": {"x": x, "values": values}},
+    }
+    cfg = {"tau_n": 0.05, "N_mod": {"h_rel_grid": grid}}
+    meta = StageMeta(seed=0, commit="test", thresholds_sha256="x")
+    row = nmod.evaluate(state, cfg, meta)
+    assert row["aux"]["guard_source"] == "finite_diff"
+    assert row["aux"]["guard_pass"] is True
+    assert abs(row["aux"]["richardson_estimate"] - np.cos(x)) < 1e-9
+
+
+def test_tabulated_layout_handles_negative_and_zero_anchors():
+    grid = [0.001, 0.003, 0.01, 0.03]
+    x = np.array([-0.7, 0.0, 0.7])
+    scale = np.where(x != 0.0, np.abs(x), 1.0)
+    values = np.sin(x[:, None] + scale[:, None] * stencil_offsets(grid)[None, :])
+    batch = derivatives_from_table(values, x, h_rel_grid=grid)
+    np.testing.assert_allclose(batch.value, np.cos(x), rtol=1e-9)
+    np.testing.assert_allclose(differentiate(np.sin, x, h_rel_grid=grid).value, batch.value, rtol=1e-12)
+
+
+def test_batched_tables_match_single_anchor_nmod():
+    grid = [0.001, 0.003, 0.01, 0.03]
+    cfg = {"tau_n": 0.05, "N_mod": {"h_rel_grid": grid}}
+    coarse = [0.01, 0.03]
+    tables = [
+        {"x": 0.7, "values": np.sin(0.7 + 0.7 * stencil_offsets(grid)).tolist()},
+        {"x": -1.2, "values": np.exp(-1.2 + 1.2 * stencil_offsets(grid)).tolist()},
+        {"x": 0.3, "values": np.sin(0.3 + 0.3 * stencil_offsets(coarse)).tolist(), "h_rel_grid": coarse},
+        {"x": 0.3, "values": [1.0, 2.0]},
+        ["not", "a", "table"],
+    ]
+    batched = table_derivatives(tables, cfg)
+    assert batched[3] is None and batched[4] is None
+    meta = StageMeta(seed=0, commit="test", thresholds_sha256="x")
+    for table, result in zip(tables, batched):
+        state = {"id": "fd", "observables": {"deltaN": 0.01, "deltaN_grid": table}}
+        single = nmod.evaluate(state, cfg, meta)
+        block = nmod.evaluate(state, cfg, meta, grid_derivative=result)
+        assert block["aux"]["guard_metrics"] == pytest.approx(single["aux"]["guard_metrics"], rel=1e-9, abs=1e-12)
+        assert block["aux"].get("richardson_estimate") == pytest.approx(single["aux"].get("richardson_estimate"))
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+from scipy.linalg import expm
+
+from atlas.cli.run_pipeline import run_pipeline
+from atlas.stages import htop
+from atlas.utils.holonomy import (
+    damping_rotation_generator,
+    dissipator_generator,
+    holonomy_from_observables,
+    kraus_to_liouville,
+    loop_holonomy,
+)
+from atlas.utils.logging import StageMeta
+
+
+def _direct_holonomy(generator, corner, size, r):
+    """Reference loop holonomy with one ``expm`` per segment and resolution."""
+
+    def side(origin, axis):
+        total = np.eye(4, dtype=np.complex128)
+        for k in range(r):
+            point = np.array(origin, dtype=np.float64)
+            point[axis] += size[axis] * k / r
+            total = expm(size[axis] / r * generator(point[None], axis)[0]) @ total
+        return total
+
+    corner = np.asarray(corner, dtype=np.float64)
+    bottom = side(corner, 0)
+    top = side(corner + [0.0, size[1]], 0)
+    left = side(corner, 1)
+    right = side(corner + [size[0], 0.0], 1)
+    return np.linalg.norm(right @ bottom - top @ left)
+
+
+def test_lindblad_generator_matches_amplitude_damping_kraus():
+    t, kappa = 0.7, 1.3
+    gamma = 1.0 - np.exp(-kappa * t)
+    kraus = np.array(
+        [
+            [[1.0, 0.0], [0.0, np.sqrt(1.0 - gamma)]],
+            [[0.0, np.sqrt(gamma)], [0.0, 0.0]],
+        ]
+    )
+    lower = np.array([[0.0, 1.0], [0.0, 0.0]])
+    np.testing.assert_allclose(
+        expm(t * kappa * dissipator_generator(lower)), kraus_to_liouville(kraus), atol=1e-12
+    )
+
+
+def test_loop_holonomy_detects_noncommuting_channels():
+    rng = np.random.default_rng(0)
+    corners = rng.uniform(0.0, 1.0, size=(500, 2))
+
+    def kappa(p):
+        return 1.0 + p[:, 1]
+
+    def omega(p):
+        return 2.0 + p[:, 0]
+
+    flat = loop_holonomy(
+        damping_rotation_generator(lambda p: np.ones(len(p)), lambda p: np.ones(len(p)), rotation_axis="z"),
+        corners,
+        [0.2, 0.3],
+    )
+    assert np.max(flat.holonomy) < 1e-12
+    curved = loop_holonomy(damping_rotation_generator(kappa, omega), corners, [0.2, 0.3])
+    assert curved.holonomy.shape == (500, 3)
+    assert np.all(curved.holonomy > 1e-3)
+
+    obs = curved.observables()
+    assert obs["H_times"] == [1.0, 2.0, 4.0]
+    meta = StageMeta(seed=0, commit="test", thresholds_sha256="x")
+    state = {"id": "h", "observables": {}}
+    row = htop.evaluate(state, {}, meta, {"aux": {}}, {"aux": {}}, holonomy=curved)
+    assert row["aux"]["H_obs"] == obs["H_obs"]
+    assert row["aux"]["plateau_details"]["series_count"] == 3
+
+
+def test_htop_builds_holonomy_from_state_loops():
+    loops = {
+        "corners": [[0.1, 0.2], [0.5, 0.4]],
+        "sizes": [0.2, 0.3],
+        "kappa": [1.0, 0.0, 1.0],
+        "omega": [2.0, 1.0, 0.0],
+    }
+    cfg = {"temporal_gauge": {"loops": {"shapes": ["time-rect"], "multi_resolution": [1, 2]}}}
+    batch = holonomy_from_observables(loops, cfg)
+    assert batch.generator_calls == 2
+    assert list(batch.resolutions) == [1, 2]
+
+    meta = StageMeta(seed=0, commit="test", thresholds_sha256="x")
+    state = {"id": "h", "observables": {"holonomy_loops": loops}}
+    row = htop.evaluate(state, cfg, meta, {"aux": {}}, {"aux": {}})
+    assert row["aux"]["H_obs"] == batch.observables()["H_obs"]
+    assert row["aux"]["holonomy"] == {"loops": 2, "resolutions": [1, 2], "generator_calls": 2}
+
+    bad = {"temporal_gauge": {"loops": {"shapes": ["space-rect"]}}}
+    row = htop.evaluate(state, bad, meta, {"aux": {}}, {"aux": {}})
+    assert row["status"] == "FAIL"
+    assert "holonomy_error" in row["aux"]
+
+
+def test_shared_propagators_match_direct_segments():
+    generator = damping_rotation_generator(lambda p: 1.0 + p[:, 1], lambda p: 2.0 + p[:, 0])
+    corners = [[0.1, 0.2], [0.6, 0.3]]
+    batch = loop_holonomy(generator, corners, [0.2, 0.3], resolutions=(1, 2, 3, 4))
+    for i, corner in enumerate(corners):
+        for j, r in enumerate(batch.resolutions):
+            direct = _direct_holonomy(generator, corner, [0.2, 0.3], int(r))
+            assert np.isclose(batch.holonomy[i, j], direct, rtol=1e-10, atol=1e-14)
+
+
+def test_run_pipeline_reaches_holonomy_loops(tmp_path):
+    loops = {
+        "corners": [[0.1, 0.2], [0.5, 0.4]],
+        "sizes": [0.2, 0.3],
+        "kappa": [1.0, 0.0, 1.0],
+        "omega": [2.0, 1.0, 0.0],
+    }
+    state = {
+        "id": "loop_anchor",
+        "system_class": "spin",
+        "params": {},
+        "ground_truth": {},
+        "observables": {"Delta": 0.05, "deltaN": 0.01, "H_obs": 0.0, "holonomy_loops": loops},
+    }
+    data = tmp_path / "states.jsonl"
+    data.write_text(json.dumps(state) + "\n", encoding="utf-8")
+    rows = run_pipeline(Path("thresholds/thresholds.json"), data, tmp_path / "out.jsonl")
+
+    by_stage = {r["stage"]: r for r in rows}
+    assert by_stage["SG-0"]["status"] == "PASS"
+    holonomy = by_stage["htop"]["aux"]["holonomy"]
+    assert holonomy["loops"] == 2 and holonomy["generator_calls"] == 2
+    expected = holonomy_from_observables(loops, {}).observables()["H_obs"]
+    assert by_stage["htop"]["aux"]["H_obs"] == expected
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import numpy as np
+from scipy import sparse
+
+from atlas.stages import kms
+from atlas.utils.kms_compat import commutator_bound, spectral_radius
+from atlas.utils.logging import StageMeta
+
+
+def test_sparse_spectral_radius_and_commutator_match_dense():
+    rng = np.random.default_rng(4)
+    n = 300
+    a = sparse.random(n, n, density=0.02, random_state=1, format="csr") + sparse.eye(n) * 2.0
+    b = sparse.diags(rng.normal(size=n), format="csr")
+    dense_a, dense_b = a.toarray(), b.toarray()
+    radius = spectral_radius(a)
+    assert radius["method"] == "arpack"
+    assert np.isclose(radius["value"], np.max(np.abs(np.linalg.eigvals(dense_a))), rtol=1e-6)
+    comm = commutator_bound(a, b, max_iters=500, tol=1e-10)
+    exact = np.linalg.norm(dense_a @ dense_b - dense_b @ dense_a, ord=2)
+    assert np.isclose(comm["value"], exact, rtol=1e-4)
+
+    early = commutator_bound(a, b, limit=1e-3)
+    assert early["short_circuit"] is True
+    assert early["iterations"] <= 2
+
+
+def test_kms_stage_computes_bound_from_operators():
+    meta = StageMeta(seed=0, commit="test", thresholds_sha256="x")
+    diag = np.diag([1.0, 2.0, 3.0])
+    state = {
+        "id": "k",
+        "observables": {"modular_operator": diag.tolist(), "connection_generator": (2 * diag).tolist()},
+    }
+    row = kms.evaluate(state, {"kms": {"policy": "geometric_only"}}, meta)
+    assert row["status"] == "PASS"
+    assert row["aux"]["commutator_bound"] == 0.0
+    assert np.isclose(row["aux"]["spectral_radius"], 3.0)
+    assert row["aux"]["policy"] == "geometric_only"
+
+
+def test_unsupported_compat_method_is_inconclusive():
+    meta = StageMeta(seed=0, commit="test", thresholds_sha256="x")
+    diag = np.diag([1.0, 2.0])
+    state = {"id": "k", "observables": {"modular_operator": diag.tolist(), "connection_generator": diag.tolist()}}
+    row = kms.evaluate(state, {"kms": {"compat_test": {"method": "spectral_gap"}}}, meta)
+    assert row["status"] == "INCONCLUSIVE"
+    assert "spectral_gap" in row["notes"]
+
+
+def test_kms_stage_does_not_pass_unconverged_or_drop_complex_parts():
+    meta = StageMeta(seed=0, commit="test", thresholds_sha256="x")
+    rng = np.random.default_rng(2)
+    a, b = rng.normal(size=(2, 30, 30)) * 0.02
+    state = {"id": "k", "observables": {"modular_operator": a.tolist(), "connection_generator": b.tolist()}}
+    cfg = {"kms": {"commutator_max": 1.0, "compat_test": {"max_iters": 1}}}
+    row = kms.evaluate(state, cfg, meta)
+    assert row["aux"]["compat_test"]["commutator"]["converged"] is False
+    assert row["status"] == "INCONCLUSIVE"
+
+    pauli_y = np.array([[0.0, -1.0j], [1.0j, 0.0]])
+    pauli_z = np.diag([1.0, -1.0])
+    state = {"id": "k", "observables": {"modular_operator": pauli_y, "connection_generator": 0.1 * pauli_z}}
+    row = kms.evaluate(state, {}, meta)
+    assert np.isclose(row["aux"]["commutator_bound"], 0.2)
+    assert row["status"] == "WARN"
+
+    state = {"id": "k", "observables": {"modular_operator": [[1.0, 0.0]], "connection_generator": [[1.0, 0.0]]}}
+    row = kms.evaluate(state, {}, meta)
+    assert row["status"] == "INCONCLUSIVE" and "malformed" in row["notes"]
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import numpy as np
+
+from atlas.stages import delta
+from atlas.utils.logging import StageMeta
+from atlas.utils.op_norm import OpNormProbe, probe_op_norm
+
+
+def test_probe_matches_dense_norm_and_warm_start_helps():
+    rng = np.random.default_rng(3)
+    a = rng.normal(size=(200, 150))
+    cold = probe_op_norm(a, max_iters=500, tol=1e-10)
+    assert cold.converged
+    assert np.isclose(cold.estimate, np.linalg.norm(a, ord=2), rtol=1e-8)
+
+    neighbour = a + 1e-4 * rng.normal(size=a.shape)
+    warm = probe_op_norm(neighbour, max_iters=500, tol=1e-10, warm_start=cold.vector)
+    assert warm.converged
+    assert warm.iterations < cold.iterations
+
+
+def test_delta_reports_probe_and_flags_nonconvergence():
+    meta = StageMeta(seed=0, commit="test", thresholds_sha256="x")
+    rng = np.random.default_rng(5)
+    operator = rng.normal(size=(40, 40)) * 1e-3
+    state = {"id": "p", "observables": {"Delta": 0.05, "Delta_operator": operator.tolist()}}
+    row = delta.evaluate(state, {}, meta)
+    assert row["status"] == "PASS"
+    assert np.isclose(row["aux"]["op_norm_proxy"], np.linalg.norm(operator, ord=2), rtol=1e-6)
+
+    cfg = {"delta_chart": {"op_probe": {"max_iters": 1}}}
+    row = delta.evaluate(state, cfg, meta, probe=OpNormProbe(cfg))
+    assert row["aux"]["op_probe"]["converged"] is False
+    assert row["status"] == "INCONCLUSIVE"
+
+
+def test_probe_replaces_nonfinite_delta_only_when_enabled():
+    meta = StageMeta(seed=0, commit="test", thresholds_sha256="x")
+    operator = np.diag([0.02, 0.01])
+    state = {"id": "p", "observables": {"Delta": float("nan"), "Delta_operator": operator.tolist()}}
+    row = delta.evaluate(state, {}, meta)
+    assert row["status"] == "FAIL"
+    assert np.isnan(row["aux"]["delta_chart"])
+    assert np.isclose(row["aux"]["op_norm_proxy"], 0.02)
+
+    cfg = {"delta_chart": {"op_norm_fallback": True}}
+    row = delta.evaluate(state, cfg, meta)
+    assert row["status"] == "PASS"
+    assert row["aux"]["delta_source"] == "op_norm_proxy"
+    assert "operator-norm probe" in row["notes"]
+
+
+def test_delta_probe_does_not_depend_on_earlier_anchors():
+    meta = StageMeta(seed=0, commit="test", thresholds_sha256="x")
+    rng = np.random.default_rng(11)
+    a, b = rng.normal(size=(2, 30, 30)) * 1e-3
+    cfg = {"delta_chart": {"op_probe": {"max_iters": 6}}}
+    state = {"id": "b", "observables": {"Delta": 0.05, "Delta_operator": b.tolist()}}
+    alone = delta.evaluate(state, cfg, meta, probe=OpNormProbe(cfg))
+    probe = OpNormProbe(cfg)
+    delta.evaluate({"id": "a", "observables": {"Delta": 0.05, "Delta_operator": a.tolist()}}, cfg, meta, probe=probe)
+    after = delta.evaluate(state, cfg, meta, probe=probe)
+    assert after["aux"]["op_probe"] == alone["aux"]["op_probe"]
+    assert after["status"] == alone["status"]
+
+    chained = OpNormProbe({}).run_all([a, a + 1e-6 * b])
+    assert chained[1].iterations <= chained[0].iterations
@@ -1,8 +1,14 @@
 from __future__ import annotations
 
+import json
 from pathlib import Path
 
+import codex
+import numpy as np
+
 from atlas.cli.run_pipeline import run_pipeline
+from atlas.io.jsonl import read_jsonl
+from atlas.utils.finite_diff import DEFAULT_H_REL_GRID, stencil_offsets
 
 
 def test_pipeline_smoke(tmp_path):
@@ -23,3 +29,114 @@ def test_pipeline_smoke(tmp_path):
     for row in triage_rows:
         confidence = row["aux"].get("confidence")
         assert 0.0 <= confidence <= 1.0
+
+
+def test_stage_filtered_reader_matches_full_decode(tmp_path):
+    output = tmp_path / "results.jsonl"
+    rows = run_pipeline(Path("thresholds/thresholds.json"), Path("data/toy.jsonl"), output)
+    odd = [
+        '{"stage":"triage","aux":{"confidence":0.5},"anchor_id":"compact"}',
+        '{"stage": "\\u0074riage", "aux": {}, "anchor_id": "escaped"}',
+        '{"stage": "delta", "notes": "mentions \\"triage\\" in text", "anchor_id": "decoy"}',
+        "",
+    ]
+    with output.open("a", encoding="utf-8") as f:
+        f.write("\n".join(odd))
+    expected = [r for r in read_jsonl(str(output)) if r.get("stage") in ("triage", "htop")]
+    assert len(expected) == sum(r["stage"] in ("triage", "htop") for r in rows) + 2
+    for block_size in (1 << 20, 97):
+        assert list(read_jsonl(str(output), stages=("triage", "htop"), block_size=block_size)) == expected
+
+
+def test_failed_sanity_gate_skips_expensive_stages(tmp_path):
+    states = list(read_jsonl("data/toy.jsonl"))
+    broken = {state["id"] for state in states[::5]}
+    for state in states:
+        if state["id"] in broken:
+            del state["observables"]["H_obs"]
+    data = tmp_path / "states.jsonl"
+    data.write_text("\n".join(json.dumps(s) for s in states) + "\n", encoding="utf-8")
+    cfg = json.loads(Path("thresholds/thresholds.json").read_text(encoding="utf-8"))
+    eager = run_pipeline(Path("thresholds/thresholds.json"), data, tmp_path / "eager.jsonl")
+    cfg["gating"] = {"lazy_pruning": True}
+    thresholds = tmp_path / "thresholds.json"
+    thresholds.write_text(json.dumps(cfg), encoding="utf-8")
+    lazy = run_pipeline(thresholds, data, tmp_path / "lazy.jsonl")
+
+    summary = lazy[-1]
+    assert summary["stage"] == "gating"
+    assert summary["aux"]["pruned_anchors"] == len(broken)
+    assert summary["aux"]["by_stage"]["kms"] == {"computed": 60 - len(broken), "skipped": len(broken)}
+
+    eager_rows = {(r["anchor_id"], r["stage"]): r for r in eager}
+    for row in lazy[:-1]:
+        before = eager_rows[(row["anchor_id"], row["stage"])]
+        if row["stage"] == "cost_reporting":
+            continue
+        if row["anchor_id"] not in broken or row["stage"] not in ("htop", "tg_ind", "kms", "SG-2", "triage"):
+            assert row["status"] == before["status"]
+            assert row["aux"].get("class") == before["aux"].get("class")
+            assert not row["aux"].get("skipped")
+            continue
+        assert row["status"] == "INCONCLUSIVE"
+        if row["stage"] == "triage":
+            assert row["aux"]["class"] == "skipped" and row["aux"]["confidence"] is None
+        elif row["stage"] != "SG-2":
+            assert row["aux"]["skipped"]
+
+    codex.reset_dynamic_profiles()
+    codex.clear_store()
+    codex.reload()
+    result = codex.validate("atlas.figures.inputs", {"log_jsonl": str(tmp_path / "lazy.jsonl"), "profile": "default"})
+    assert not [error for error in result["errors"] if "F1_dashboard" in error]
+    sg3 = [r for r in lazy if r["stage"] == "SG-3" and r["anchor_id"] in broken]
+    assert all(r["status"] == "FAIL" for r in sg3)
+
+
+def test_pipeline_accepts_series_and_operator_observables(tmp_path):
+    sidecar = tmp_path / "delta_series.npy"
+    np.save(sidecar, np.array([0.05, 0.06, 0.055]))
+    x = 0.5
+    offsets = stencil_offsets(DEFAULT_H_REL_GRID)
+    base = {"Delta": 0.05, "deltaN": 0.01, "H_obs": 0.04}
+    extras = {
+        "Delta_series": [0.1, 0.2, 0.15],
+        "Delta_series_file": str(sidecar),
+        "Delta_operator": [[0.02, 0.0], [0.0, 0.01]],
+        "deltaN_grid": {"x": x, "values": [0.02 * (x + x * o) ** 2 for o in offsets]},
+        "holonomy_loops": {
+            "corners": [[0.1, 0.2]],
+            "sizes": [0.2, 0.3],
+            "kappa": [1.0, 0.0, 1.0],
+            "omega": [2.0, 1.0, 0.0],
+        },
+        "modular_operator": [[1.0, 0.0], [0.0, 0.5]],
+        "TG_matrix": [[1.0, 0.0], [0.0, 1.0]],
+    }
+    states = [
+        {
+            "id": f"obs_{key}",
+            "system_class": "spin",
+            "params": {},
+            "ground_truth": {},
+            "observables": {**base, key: value},
+        }
+        for key, value in extras.items()
+    ]
+    states[-2]["observables"]["connection_generator"] = [[0.0, 0.01], [0.01, 0.0]]
+    states.append({**states[0], "id": "obs_string", "observables": {**base, "H_obs": "n/a"}})
+    data = tmp_path / "states.jsonl"
+    data.write_text("\n".join(json.dumps(s) for s in states) + "\n", encoding="utf-8")
+    rows = run_pipeline(Path("thresholds/thresholds.json"), data, tmp_path / "out.jsonl")
+
+    by = {(r["anchor_id"], r["stage"]): r for r in rows}
+    for key in extras:
+        assert by[(f"obs_{key}", "SG-0")]["status"] == "PASS"
+    assert by[("obs_string", "SG-0")]["status"] == "FAIL"
+    assert by[("obs_Delta_series", "delta")]["aux"]["series_stats"]["count"] == 3
+    assert by[("obs_Delta_series_file", "delta")]["aux"]["series_stats"]["count"] == 3
+    assert "op_probe" in by[("obs_Delta_operator", "delta")]["aux"]
+    assert by[("obs_deltaN_grid", "nmod")]["aux"]["guard_source"] == "finite_diff"
+    assert by[("obs_holonomy_loops", "htop")]["aux"]["holonomy"]["loops"] == 1
+    assert "compat_test" in by[("obs_modular_operator", "kms")]["aux"]
+    assert by[("obs_TG_matrix", "tg_ind")]["aux"]["frobenius_resid"] == 0.0
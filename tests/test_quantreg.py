@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from scipy.optimize import linprog
+
+from atlas.utils.quantreg import PREPROCESS_MIN, bootstrap_quantreg, check_loss, quantile_regression
+
+
+def _data(n, seed=0):
+    rng = np.random.default_rng(seed)
+    X = np.abs(rng.normal(size=(n, 2)))
+    y = X @ np.array([0.7, 2.0]) + 0.3 * rng.exponential(size=n) - 0.1
+    return X, y
+
+
+@pytest.mark.parametrize("tau", [0.1, 0.5])
+def test_interior_point_matches_linear_program(tau):
+    X, y = _data(300)
+    n = y.size
+    cost = np.r_[np.zeros(2), tau * np.ones(n), (1 - tau) * np.ones(n)]
+    lp = linprog(
+        cost,
+        A_eq=np.hstack([X, np.eye(n), -np.eye(n)]),
+        b_eq=y,
+        bounds=[(None, None)] * 2 + [(0, None)] * (2 * n),
+        method="highs",
+    )
+    fit = quantile_regression(X, y, tau)
+    assert fit.converged
+    assert fit.loss == pytest.approx(lp.fun, rel=1e-9)
+    np.testing.assert_allclose(fit.coef, lp.x[:2], atol=1e-6)
+
+
+def test_preprocessing_reaches_the_same_optimum():
+    X, y = _data(PREPROCESS_MIN + 20_000, seed=1)
+    fit = quantile_regression(X, y, 0.1)
+    assert fit.converged
+    # Perturbing the optimum in any direction cannot lower the check loss.
+    for step in ([1e-5, 0], [-1e-5, 0], [0, 1e-5], [0, -1e-5]):
+        assert check_loss(y - X @ (fit.coef + step), 0.1) >= fit.loss - 1e-9
+
+
+def test_bootstrap_is_independent_of_workers():
+    X, y = _data(2_000, seed=2)
+    serial = bootstrap_quantreg(X, y, 0.1, bootstraps=8, subsample=500, seed=3)
+    pooled = bootstrap_quantreg(X, y, 0.1, bootstraps=8, subsample=500, seed=3, workers=2)
+    assert serial == pooled
+    fit = quantile_regression(X, y, 0.1)
+    for (lo, hi), c in zip(serial["ci95"], fit.coef):
+        assert lo < c < hi
+
+
+def test_empty_input_gives_zero_coefficients():
+    fit = quantile_regression(np.empty((0, 2)), np.empty(0), 0.1)
+    assert fit.coef.tolist() == [0.0, 0.0] and fit.samples == 0
+    assert bootstrap_quantreg(np.empty((0, 2)), np.empty(0), 0.1)["B"] == 0
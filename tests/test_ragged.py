@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+from atlas.cli.run_pipeline import run_pipeline
+from atlas.stages import delta, nmod
+from atlas.utils.logging import StageMeta
+from atlas.utils.ragged import RaggedArray, series_block
+
+
+SERIES = [[], [0.5], [1.0, -2.0], [0.1, 0.3, 0.2, 0.4, 0.35], None, [3.0, 3.0, 3.0]]
+
+
+def test_batch_reductions_match_per_anchor_helpers():
+    ragged = RaggedArray.from_lists(SERIES)
+    assert len(ragged) == len(SERIES)
+    stats = delta.series_stats_batch(ragged)
+    guards = nmod.guard_metrics_batch(ragged)
+    for i, series in enumerate(SERIES):
+        expected_stats = delta._series_stats(series or [])
+        assert stats[i].keys() == expected_stats.keys()
+        for key, value in expected_stats.items():
+            assert np.isclose(stats[i][key], value)
+        assert guards[i] == nmod._guard_metrics(series or [])
+
+
+def test_tail_and_sidecar_roundtrip(tmp_path):
+    ragged = RaggedArray.from_lists(SERIES)
+    tail = ragged.tail(2)
+    assert [tail.tolist(i) for i in range(len(tail))] == [
+        [], [0.5], [1.0, -2.0], [0.4, 0.35], [], [3.0, 3.0]
+    ]
+    ragged.save(tmp_path / "delta")
+    loaded = RaggedArray.load(tmp_path / "delta")
+    np.testing.assert_array_equal(loaded.values, ragged.values)
+    np.testing.assert_array_equal(loaded.offsets, ragged.offsets)
+
+
+def test_series_block_uses_stage_aliases():
+    states = [
+        {"observables": {"Delta_samples": [0.1, 0.2], "H_series": [1.0]}},
+        {"observables": {"deltaN_series": [0.3]}},
+    ]
+    block = series_block(states)
+    assert block["Delta_series"].tolist(0) == [0.1, 0.2]
+    assert block["deltaN_series"].lengths.tolist() == [0, 1]
+    assert block["H_times"].values.size == 0
+
+
+def test_pipeline_blocks_match_per_anchor_stages(tmp_path):
+    states = [
+        {
+            "id": f"r{i}",
+            "system_class": "spin",
+            "params": {},
+            "ground_truth": {},
+            "observables": {"Delta": 0.05, "deltaN": 0.01, "H_obs": 0.04, "Delta_series": s, "deltaN_series": s},
+        }
+        for i, s in enumerate(SERIES)
+    ]
+    data = tmp_path / "states.jsonl"
+    data.write_text("\n".join(json.dumps(s) for s in states) + "\n", encoding="utf-8")
+    thresholds = Path("thresholds/thresholds.json")
+    rows = run_pipeline(thresholds, data, tmp_path / "out.jsonl", block_size=4)
+    by = {(r["anchor_id"], r["stage"]): r for r in rows}
+    cfg = json.loads(thresholds.read_text(encoding="utf-8"))
+    meta = StageMeta(seed=0, commit="test", thresholds_sha256="x")
+    for state in states:
+        expected = delta.evaluate(state, cfg, meta)
+        got = by[(state["id"], "delta")]
+        assert got["status"] == expected["status"]
+        assert got["aux"].get("series_stats", {}).keys() == expected["aux"].get("series_stats", {}).keys()
+        for key, value in expected["aux"].get("series_stats", {}).items():
+            assert np.isclose(got["aux"]["series_stats"][key], value)
+        expected = nmod.evaluate(state, cfg, meta)
+        got = by[(state["id"], "nmod")]
+        assert (got["status"], got["aux"]["guard_metrics"]) == (expected["status"], expected["aux"]["guard_metrics"])
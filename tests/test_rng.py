@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import numpy as np
+
+from atlas.utils.rng import SubstreamPool, anchor_rng
+
+
+def test_substreams_are_order_independent_and_disjoint():
+    ids = [f"anchor_{i}" for i in range(50)]
+    forward = np.empty((len(ids), 3, 8))
+    backward = np.empty((len(ids), 3, 8))
+    SubstreamPool(42, "sensitivity", 1000).normal(ids, forward)
+    SubstreamPool(42, "sensitivity", 1000).normal(ids[::-1], backward)
+    np.testing.assert_array_equal(forward, backward[::-1])
+    np.testing.assert_array_equal(forward[7], anchor_rng(42, ids[7], "sensitivity", 1000).normal((3, 8)))
+    other_stage = anchor_rng(42, ids[7], "bootstrap", 1000).normal(24)
+    other_offset = anchor_rng(42, ids[7], "sensitivity", 1001).normal(24)
+    other_seed = anchor_rng(43, ids[7], "sensitivity", 1000).normal(24)
+    for draws in (other_stage, other_offset, other_seed):
+        assert not np.allclose(draws, forward[7].ravel())
+
+
+def test_out_draws_fill_in_place_and_skip_matches_drawing():
+    out = np.empty(16)
+    rng = anchor_rng(1, "a", "stage")
+    assert rng.uniform(out=out, low=2.0, high=5.0) is out
+    assert np.all((out >= 2.0) & (out < 5.0))
+    np.testing.assert_array_equal(out, anchor_rng(1, "a", "stage").uniform(16, low=2.0, high=5.0))
+
+    drawn = anchor_rng(1, "a", "stage")
+    drawn.uniform(8)  # 8 doubles = 2 Philox blocks of four 64-bit words
+    skipped = anchor_rng(1, "a", "stage").skip(2)
+    np.testing.assert_array_equal(drawn.uniform(4), skipped.uniform(4))
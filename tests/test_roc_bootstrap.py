@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pytest
+
+from eval import roc_external_bootstrap as roc
+
+
+def _data(n, seed=0, decimals=1):
+    rng = np.random.default_rng(seed)
+    labels = rng.integers(0, 2, n)
+    scores = np.round(rng.normal(size=n) + labels, decimals)
+    return scores, labels
+
+
+def test_weighted_mann_whitney_matches_midrank_with_ties():
+    scores, labels = _data(400)
+    pairs = list(zip(scores.tolist(), labels.tolist()))
+    n_neg, lo, hi = roc.rank_layout(scores, labels)
+    assert np.isclose(roc.weighted_auc(np.ones(scores.size), n_neg, lo, hi)[0], roc.auc_midrank(pairs))
+
+    counts = np.random.default_rng(1).integers(0, 3, scores.size)
+    neg = np.flatnonzero(labels != 1)
+    layout = np.r_[neg[np.argsort(scores[neg], kind="stable")], np.flatnonzero(labels == 1)]
+    replicated = [pairs[i] for i in range(scores.size) for _ in range(counts[i])]
+    assert np.isclose(roc.weighted_auc(counts[layout], n_neg, lo, hi)[0], roc.auc_midrank(replicated))
+
+
+def test_bootstrap_ci_is_seeded_and_worker_independent():
+    scores, labels = _data(600, seed=2)
+    auc = roc.auc_midrank(list(zip(scores.tolist(), labels.tolist())))
+    serial = roc.bootstrap_auc_ci_np(scores, labels, 700, seed=5, workers=1)
+    pooled = roc.bootstrap_auc_ci_np(scores, labels, 700, seed=5, workers=2)
+    assert serial == pooled
+    assert serial[2] == 700
+    assert serial[0] < auc < serial[1]
+    assert roc.bootstrap_auc_ci_np(scores, labels, 700, seed=6)[:2] != serial[:2]
+
+
+def test_degenerate_resamples_are_skipped():
+    scores = np.arange(12, dtype=np.float64)
+    labels = np.zeros(12, dtype=np.int64)
+    labels[-1] = 1
+    lo, hi, eff_b = roc.bootstrap_auc_ci_np(scores, labels, 200, seed=1)
+    assert eff_b == 200 and lo == 1.0 and hi == 1.0
+    assert roc.bootstrap_auc_ci_np(scores, np.zeros(12), 50, seed=1, max_tries_factor=2) == (0.0, 1.0, 0)
+
+
+def test_sorted_youden_matches_reference_with_ties():
+    scores, labels = _data(500, seed=3)
+    pairs = list(zip(scores.tolist(), labels.tolist()))
+    best_j, best_th = roc.youden_best_j_np(scores, labels)
+    ref_j, ref_th = roc.youden_best_j(pairs)
+    assert np.isclose(best_j, ref_j) and best_th == ref_th
+    assert np.isclose(roc.auc_np(scores, labels), roc.auc_midrank(pairs))
+
+
+@pytest.mark.parametrize("label", [0, 1])
+def test_sorted_youden_matches_reference_for_a_single_class(label):
+    scores = np.array([0.9, 0.4, 0.4, 0.1])
+    labels = np.full(scores.size, label)
+    pairs = list(zip(scores.tolist(), labels.tolist()))
+    assert roc.youden_best_j_np(scores, labels) == roc.youden_best_j(pairs)
+
+
+def test_bulk_readers_and_join_match_csv_reference(tmp_path):
+    labels_csv = tmp_path / "labels.csv"
+    scores_csv = tmp_path / "scores.csv"
+    labels_csv.write_bytes(b"id,label\r\na,1\r\n b ,0\r\nc,1\r\nmissing,0\r\nd,zz\r\ne,0")
+    scores_csv.write_text("id,score\nc,0.3\na,0.9\nb,0.1\na,0.7\ne,-2\nlonely,0.5\n", encoding="utf-8")
+    expected = roc.make_pairs(roc.read_labels(labels_csv), roc.read_scores(scores_csv))
+
+    scores, labels = roc.join_on_ids(*roc.read_labels_np(labels_csv), *roc.read_scores_np(scores_csv))
+    assert list(zip(scores.tolist(), labels.tolist())) == expected
+
+    quoted = tmp_path / "quoted.csv"
+    quoted.write_text('id,score\n"a",0.25\n"b,x",0.5\n', encoding="utf-8")
+    ids, values = roc.read_scores_np(quoted)
+    assert ids.tolist() == [b"a", b"b,x"] and values.tolist() == [0.25, 0.5]
+
+
+def test_main_appends_roc_record(tmp_path):
+    scores, labels = _data(300, seed=4)
+    labels_csv = tmp_path / "labels.csv"
+    scores_csv = tmp_path / "scores.csv"
+    labels_csv.write_text("".join(f"id{i},{y}\n" for i, y in enumerate(labels)), encoding="utf-8")
+    scores_csv.write_text("".join(f"id{i},{s}\n" for i, s in enumerate(scores)), encoding="utf-8")
+    out = tmp_path / "roc.jsonl"
+    argv = ["--labels", str(labels_csv), "--scores", str(scores_csv), "--out", str(out), "--bootstraps", "200"]
+    assert roc.main(argv + ["--workers", "1"]) == 0
+    rec = json.loads(out.read_text(encoding="utf-8").splitlines()[-1])
+    pairs = list(zip(scores.tolist(), labels.tolist()))
+    assert np.isclose(rec["value"], roc.auc_midrank(pairs))
+    assert rec["aux"]["B"] == 200 and rec["aux"]["ci95"][0] <= rec["value"] <= rec["aux"]["ci95"][1]
+
+
+def test_adaptive_bootstrap_stops_early_and_respects_cap():
+    scores, labels = _data(800, seed=7)
+    lo, hi, eff_b, diag = roc.adaptive_bootstrap_auc_ci_np(scores, labels, 5000, seed=3, tol=0.01, batch=250)
+    assert diag["converged"] and 1000 <= eff_b < 5000
+    assert max(diag["mcse"] + diag["delta"]) <= 0.01
+    ref_lo, ref_hi, _ = roc.bootstrap_auc_ci_np(scores, labels, 5000, seed=3)
+    assert abs(lo - ref_lo) < 0.02 and abs(hi - ref_hi) < 0.02
+    assert roc.adaptive_bootstrap_auc_ci_np(scores, labels, 5000, seed=3, tol=0.01, batch=250, workers=2) == (
+        lo, hi, eff_b, diag,
+    )
+
+    capped = roc.adaptive_bootstrap_auc_ci_np(scores, labels, 600, seed=3, tol=1e-6, batch=250)
+    assert capped[2] == 600 and not capped[3]["converged"] and capped[3]["batches"] == 3
+
+
+def test_quantile_mcse_shrinks_with_more_resamples():
+    rng = np.random.default_rng(0)
+    small = roc.quantile_mcse(rng.normal(size=500), 0.025)
+    large = roc.quantile_mcse(rng.normal(size=50000), 0.025)
+    assert 0 < large < small
+
+
+def test_main_adaptive_reports_convergence(tmp_path):
+    scores, labels = _data(300, seed=4)
+    labels_csv = tmp_path / "labels.csv"
+    scores_csv = tmp_path / "scores.csv"
+    labels_csv.write_text("".join(f"id{i},{y}\n" for i, y in enumerate(labels)), encoding="utf-8")
+    scores_csv.write_text("".join(f"id{i},{s}\n" for i, s in enumerate(scores)), encoding="utf-8")
+    out = tmp_path / "roc.jsonl"
+    argv = ["--labels", str(labels_csv), "--scores", str(scores_csv), "--out", str(out), "--workers", "1"]
+    assert roc.main(argv + ["--adaptive", "--ci-tol", "0.02", "--batch", "200"]) == 0
+    aux = json.loads(out.read_text(encoding="utf-8"))["aux"]
+    assert aux["convergence"]["converged"] and aux["B"] < 5000
+    assert aux["convergence"]["B_cap"] == 5000
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from atlas.cli import compute_roc, run_pipeline as run_pipeline_cli
+from atlas.cli.run_pipeline import run_pipeline
+from atlas.io.jsonl import read_jsonl
+from atlas.utils.sampling import SAMPLE_WEIGHT_KEY, StratifiedSampler, stratum_of
+
+THRESHOLDS = Path("thresholds/thresholds.json")
+MIXTURE = Path("data/synthetic_real_mixture.jsonl")
+
+
+def _selected(states, fraction, seed=42):
+    sampler = StratifiedSampler(fraction, seed)
+    picked = [s["id"] for s in states if sampler.offer(s)]
+    return picked + [s["id"] for s in sampler.backfill()], sampler
+
+
+def test_sample_is_order_independent_nested_and_covers_every_stratum():
+    states = list(read_jsonl(str(MIXTURE)))
+    forward, sampler = _selected(states, 0.1)
+    backward, _ = _selected(states[::-1], 0.1)
+    assert set(forward) == set(backward)
+    assert {stratum_of(s) for s in states} == set(sampler.sampled)
+    # Hash-selected anchors of a smaller fraction are a subset of a larger one.
+    small = [s["id"] for s in states if StratifiedSampler(0.05).offer(s)]
+    assert set(small) <= {s["id"] for s in states if StratifiedSampler(0.1).offer(s)}
+    with pytest.raises(ValueError):
+        StratifiedSampler(0.0)
+
+
+def test_scaled_counts_bracket_the_full_run(tmp_path):
+    full = run_pipeline(THRESHOLDS, MIXTURE, tmp_path / "full.jsonl")
+    out = tmp_path / "sample.jsonl"
+    rows = run_pipeline(THRESHOLDS, MIXTURE, out, sample=0.3)
+    (summary,) = [r for r in rows if r["stage"] == "sample"]
+    aux = summary["aux"]
+    assert aux["population"] == 160
+    assert aux["sampled"] == len([r for r in rows if r["stage"] == "triage"]) < 160
+    assert all(stratum["sampled"] >= 1 for stratum in aux["strata"])
+
+    truth = {}
+    for r in full:
+        if r["stage"] == "triage":
+            truth[r["aux"]["class"]] = truth.get(r["aux"]["class"], 0) + 1
+    for label, count in truth.items():
+        lo, hi = aux["triage_classes"][label]["ci95"]
+        assert lo <= count <= hi
+    weights = [r["aux"][SAMPLE_WEIGHT_KEY] for r in rows if r["stage"] == "triage"]
+    assert sum(weights) == pytest.approx(160)
+
+    roc_out = tmp_path / "roc.json"
+    compute_roc.main([str(out), str(roc_out), "--weight-key", SAMPLE_WEIGHT_KEY, "--positives", "true_tear"])
+    assert 0.0 <= json.loads(roc_out.read_text())["auc"] <= 1.0
+
+
+def test_full_fraction_matches_unsampled_run(tmp_path):
+    full = run_pipeline(THRESHOLDS, Path("data/toy.jsonl"), tmp_path / "full.jsonl")
+    out = tmp_path / "sample.jsonl"
+    run_pipeline_cli.main([str(THRESHOLDS), "data/toy.jsonl", str(out), "--sample", "1"])
+    rows = list(read_jsonl(str(out)))
+    assert rows[-1]["stage"] == "sample"
+    sampled = rows[:-1]
+    assert [(r["anchor_id"], r["stage"], r["status"]) for r in sampled] == [
+        (r["anchor_id"], r["stage"], r["status"]) for r in full
+    ]
+    for label, scaled in rows[-1]["aux"]["triage_classes"].items():
+        assert scaled["ci95"] == [scaled["estimate"], scaled["estimate"]]
+    with pytest.raises(SystemExit):
+        run_pipeline_cli.parse_args([str(THRESHOLDS), "data/toy.jsonl", str(out), "--sample", "1.5"])
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from atlas.cli.run_pipeline import run_pipeline
+
+CONFIG = Path("configs/ATLAS_thresholds_v2.4R2.json")
+
+
+def _with_ci(tmp_path, ci):
+    lines = Path("data/toy.jsonl").read_text(encoding="utf-8").splitlines()
+    states = [json.loads(line) for line in lines if line.strip()]
+    for state in states:
+        state["provenance"] = {"ci_95": ci(state)}
+    path = tmp_path / "toy_ci.jsonl"
+    path.write_text("".join(json.dumps(s) + "\n" for s in states), encoding="utf-8")
+    return path
+
+
+def _by_stage(rows):
+    out = {}
+    for row in rows:
+        out.setdefault(row["anchor_id"], {})[row["stage"]] = row
+    return out
+
+
+def test_baseline_decisions_match_pipeline_rows(tmp_path):
+    data = _with_ci(tmp_path, lambda s: {"Delta": 0.02, "deltaN": 0.01})
+    rows = _by_stage(run_pipeline(CONFIG, data, tmp_path / "out.jsonl"))
+    assert rows
+    for stages in rows.values():
+        base = stages["sensitivity"]["aux"]["baseline"]
+        for stage in ("delta", "nmod", "SG-1", "SG-3"):
+            assert base[stage] == stages[stage]["status"]
+        assert base["triage"] == stages["triage"]["aux"]["class"]
+
+
+def test_flip_rates_track_distance_to_threshold(tmp_path):
+    def ci(state):
+        delta = state["observables"]["Delta"]
+        return {"Delta": [delta - 0.05, delta + 0.05]}
+
+    data = _with_ci(tmp_path, ci)
+    first = _by_stage(run_pipeline(CONFIG, data, tmp_path / "a.jsonl", seed=7))
+    second = _by_stage(run_pipeline(CONFIG, data, tmp_path / "b.jsonl", seed=7))
+    sigma = 0.05 / 1.959963984540054
+    for anchor_id, stages in first.items():
+        sens = stages["sensitivity"]
+        assert sens["aux"]["flip_rates"] == second[anchor_id]["sensitivity"]["aux"]["flip_rates"]
+        assert abs(sens["aux"]["sigma"]["Delta"] - sigma) < 1e-12
+        gap = abs(stages["delta"]["aux"]["delta_chart"] - 0.15)
+        rate = sens["aux"]["flip_rates"]["delta"]
+        if gap > 5 * sigma:
+            assert rate == 0.0
+        if gap < 0.1 * sigma:
+            assert rate > 0.3
+        assert sens["status"] == ("WARN" if sens["value"] > 0.1 else "PASS")
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import codex
+from atlas.cli import compute_roc
+from atlas.cli.run_pipeline import run_pipeline
+from atlas.io.jsonl import write_jsonl
+from atlas.utils.stats import (
+    TRIAGE_CLASSES,
+    RocSketch,
+    fold_ids,
+    kfold_roc,
+    roc_arrays,
+    roc_curve,
+    roc_one_vs_rest,
+    triage_arrays,
+)
+
+
+def _legacy_roc(rows, positives=("true_tear",)):
+    """The pre-vectorisation list/loop implementation, kept as the exactness reference."""
+    pairs = []
+    for r in rows:
+        try:
+            pairs.append((float(r["aux"]["confidence"]), r["aux"]["class"] in positives))
+        except (TypeError, ValueError):
+            continue
+    pairs.sort(key=lambda x: -x[0])
+    P = sum(p for _, p in pairs)
+    N = len(pairs) - P
+    fpr, tpr, thresholds = [0.0], [0.0], [pairs[0][0] + 1e-9]
+    tp = fp = 0
+    prev = None
+    for score, label in pairs:
+        tp += label
+        fp += 1 - label
+        if prev is None or score != prev:
+            fpr.append(fp / N)
+            tpr.append(tp / P)
+            thresholds.append(score)
+            prev = score
+    auc = 0.0
+    for i in range(1, len(fpr)):
+        auc += (fpr[i] - fpr[i - 1]) * (tpr[i] + tpr[i - 1]) * 0.5
+    youden = np.array(tpr) - np.array(fpr)
+    idx = int(np.argmax(youden))
+    return {"fpr": fpr, "tpr": tpr, "auc": auc, "best_J": float(youden[idx]), "threshold": thresholds[idx]}
+
+
+def _rows(n, seed=0, decimals=2):
+    rng = np.random.default_rng(seed)
+    classes = rng.choice(TRIAGE_CLASSES, size=n)
+    conf = np.round(rng.uniform(size=n) + 0.3 * (classes == "true_tear"), decimals)
+    rows = [{"aux": {"class": str(c), "confidence": float(s), "w": float(w)}} for c, s, w in zip(classes, conf, rng.uniform(0.5, 2.0, n))]
+    rows.append({"aux": {"class": "fake", "confidence": "n/a"}})
+    return rows
+
+
+def test_single_class_roc_matches_legacy_exactly():
+    rows = _rows(700)
+    for positives in (("true_tear",), ("true_tear", "hard_spot")):
+        assert roc_curve(rows, positives) == _legacy_roc(rows, positives)
+    assert roc_curve([]) == {"fpr": [0.0, 1.0], "tpr": [0.0, 1.0], "auc": 0.5, "best_J": 0.0, "threshold": 1.0}
+    assert roc_curve(rows, ("missing",))["auc"] == 0.0
+
+
+def test_one_vs_rest_and_weights():
+    rows = _rows(500, seed=1, decimals=12)
+    scores, classes, weights = triage_arrays(rows, weight_key="w")
+    curves = roc_one_vs_rest(scores, classes)
+    assert set(curves) == set(TRIAGE_CLASSES)
+    for label in TRIAGE_CLASSES:
+        assert curves[label] == roc_curve(rows, (label,))
+
+    # Without ties the weighted AUC is the weighted Mann-Whitney statistic.
+    weighted = roc_one_vs_rest(scores, classes, weights=weights)
+    for label in TRIAGE_CLASSES:
+        pos = classes == label
+        wins = (scores[pos][:, None] > scores[~pos][None, :]) * weights[pos][:, None] * weights[~pos][None, :]
+        expected = wins.sum() / (weights[pos].sum() * weights[~pos].sum())
+        assert np.isclose(weighted[label]["auc"], expected)
+    assert roc_one_vs_rest(scores, classes, weights=weights)["true_tear"]["auc"] > 0.6
+
+
+def test_roc_sketch_merges_shards_and_bounds_error():
+    rows = _rows(3000, seed=4, decimals=6)
+    scores, classes, _ = triage_arrays(rows)
+    exact = roc_one_vs_rest(scores, classes)
+
+    whole = RocSketch(bins=512).update(scores, classes)
+    shards = [RocSketch(bins=512).update_rows(rows[i::3], chunk_size=256) for i in range(3)]
+    merged = RocSketch.from_dict(json.loads(json.dumps(shards[0].to_dict())))
+    merged.merge(shards[2]).merge(shards[1])
+    assert np.array_equal(merged.counts, whole.counts)
+    for label in TRIAGE_CLASSES:
+        approx = merged.roc((label,))
+        assert abs(approx["auc"] - exact[label]["auc"]) <= approx["auc_error_bound"] + 1e-12
+        assert exact[label]["best_J"] - approx["best_J"] <= approx["best_J_error_bound"] + 1e-12
+    with pytest.raises(ValueError):
+        merged.merge(RocSketch(bins=256))
+
+
+def test_compute_roc_cli_binned_mode(tmp_path):
+    rows = [dict(r, stage="triage") for r in _rows(400, seed=5, decimals=6)]
+    results = tmp_path / "results.jsonl"
+    write_jsonl(str(results), rows[:200])
+    other = tmp_path / "other.jsonl"
+    write_jsonl(str(other), rows[200:])
+    shard = tmp_path / "shard.json"
+    compute_roc.main([str(other), str(tmp_path / "unused.json"), "--sketch-out", str(shard)])
+    out = tmp_path / "roc.json"
+    compute_roc.main([str(results), str(out), "--merge", str(shard), "--one-vs-rest"])
+    metrics = json.loads(out.read_text(encoding="utf-8"))
+    assert metrics["sketch"]["count"] == 400
+    assert set(metrics["one_vs_rest"]) == set(TRIAGE_CLASSES)
+    assert abs(metrics["auc"] - roc_curve(rows)["auc"]) <= metrics["auc_error_bound"] + 1e-12
+
+
+def test_kfold_roc_is_anchor_grouped_and_deterministic():
+    rows = _rows(2000, seed=6, decimals=9)
+    scores, classes, _ = triage_arrays(rows)
+    anchors = np.asarray([f"anchor-{i // 3}" for i in range(scores.size)], dtype=object)
+    folds = fold_ids(anchors, 5)
+    assert all(np.unique(folds[anchors == a]).size == 1 for a in anchors[:30])
+    assert np.array_equal(folds[::-1], fold_ids(anchors[::-1], 5))
+
+    result = kfold_roc(scores, classes, anchors, 5)
+    assert result["folds_used"] == 5 and len(result["folds"]) == 5
+    assert sum(f["n"] for f in result["folds"]) == scores.size
+    for entry in result["folds"]:
+        held = folds == entry["fold"]
+        assert np.isclose(entry["AUC"], roc_arrays(scores[held], classes[held])["auc"])
+    assert result["ci95"][0] <= result["AUC"] <= result["ci95"][1]
+    assert np.isclose(result["best_J"], result["TPR"] - result["FPR"])
+
+
+def test_kfold_record_passes_stage_schema_and_f6(tmp_path):
+    codex.reset_dynamic_profiles()
+    codex.clear_store()
+    codex.reload()
+    log = tmp_path / "results.jsonl"
+    run_pipeline(Path("thresholds/thresholds.json"), Path("data/toy.jsonl"), log)
+    triage_rows = [dict(r, stage="triage", anchor_id=f"a{i}") for i, r in enumerate(_rows(300, seed=7))]
+    extra = tmp_path / "triage.jsonl"
+    write_jsonl(str(extra), triage_rows)
+    compute_roc.main(
+        [
+            str(extra),
+            str(tmp_path / "roc.json"),
+            "--thresholds",
+            "configs/ATLAS_thresholds_v2.4R2.json",
+            "--record-out",
+            str(log),
+        ]
+    )
+    record = [r for r in map(json.loads, log.read_text(encoding="utf-8").splitlines()) if r["stage"] == "roc"][-1]
+    assert record["metric"] == "kfold_auc" and record["aux"]["kfold"] == 5
+    assert {"TPR", "FPR", "AUC", "best_J", "ci95"} <= set(record["aux"])
+    result = codex.validate("atlas.figures.inputs", {"log_jsonl": str(log), "profile": "default"})
+    assert not any("F6_roc" in e for e in result["errors"])
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+from atlas.cli.run_pipeline import run_pipeline
+from atlas.stages import delta
+from atlas.utils.logging import StageMeta
+from atlas.utils.streaming import QuantileSketch, RunningStats, iter_chunks
+
+
+def _reference(arr):
+    return {
+        "count": arr.size,
+        "min": arr.min(),
+        "max": arr.max(),
+        "mean": arr.mean(),
+        "std": arr.std(ddof=1),
+    }
+
+
+def test_chunked_generator_and_merge_match_numpy():
+    rng = np.random.default_rng(7)
+    arr = 1e6 + rng.normal(size=10_001)
+    streamed = RunningStats.from_values((float(x) for x in arr), chunk_size=997).as_series_stats()
+    left = RunningStats.from_values(arr[:3000], chunk_size=128)
+    right = RunningStats.from_values(arr[3000:], chunk_size=4096)
+    merged = left.merge(right).as_series_stats()
+    for stats in (streamed, merged):
+        for key, value in _reference(arr).items():
+            assert np.isclose(stats[key], value, rtol=1e-12, atol=0.0)
+
+
+def test_delta_reads_memmapped_sidecar(tmp_path):
+    arr = np.linspace(-1.0, 2.0, 5000)
+    sidecar = tmp_path / "delta_series.npy"
+    np.save(sidecar, arr)
+    state = {"id": "a", "observables": {"Delta": 0.1, "Delta_series_file": str(sidecar)}}
+    meta = StageMeta(seed=0, commit="test", thresholds_sha256="x")
+    row = delta.evaluate(state, {}, meta)
+    assert row["aux"]["series_available"] is True
+    for key, value in _reference(arr).items():
+        assert np.isclose(row["aux"]["series_stats"][key], value)
+
+
+def test_delta_unreadable_sidecar_is_inconclusive(tmp_path):
+    corrupt = tmp_path / "corrupt.npy"
+    corrupt.write_bytes(b"not an npy file")
+    meta = StageMeta(seed=0, commit="test", thresholds_sha256="x")
+    for sidecar in (tmp_path / "missing.npy", corrupt):
+        state = {"id": "a", "observables": {"Delta": 0.1, "Delta_series_file": str(sidecar)}}
+        row = delta.evaluate(state, {}, meta)
+        assert row["status"] == "INCONCLUSIVE"
+        assert row["aux"]["series_available"] is False
+        assert "series_error" in row["aux"]
+
+
+def test_relative_sidecar_resolves_against_input_file(tmp_path):
+    (tmp_path / "series").mkdir()
+    np.save(tmp_path / "series" / "a.npy", np.array([0.1, 0.2, 0.3]))
+    state = {
+        "id": "a",
+        "system_class": "spin",
+        "params": {},
+        "ground_truth": {},
+        "observables": {"Delta": 0.1, "deltaN": 0.01, "H_obs": 0.05, "Delta_series_file": "series/a.npy"},
+    }
+    data = tmp_path / "states.jsonl"
+    data.write_text(json.dumps(state) + "\n", encoding="utf-8")
+    rows = run_pipeline(Path("thresholds/thresholds.json"), data, tmp_path / "out.jsonl")
+    (row,) = [r for r in rows if r["stage"] == "delta"]
+    assert "series_error" not in row["aux"]
+    assert row["aux"]["series_stats"]["count"] == 3
+
+
+def test_npz_sidecar_needs_a_named_array(tmp_path):
+    meta = StageMeta(seed=0, commit="test", thresholds_sha256="x")
+    np.savez(tmp_path / "single.npz", np.arange(4.0))
+    np.savez(tmp_path / "multi.npz", delta=np.arange(5.0), other=np.zeros(2))
+    cases = [("single.npz", None, 4), ("multi.npz", "delta", 5)]
+    for name, key, count in cases:
+        observables = {"Delta": 0.1, "Delta_series_file": name, "Delta_series_key": key}
+        row = delta.evaluate({"id": "a", "observables": observables}, {}, meta, base_dir=tmp_path)
+        assert row["status"] == "PASS"
+        assert row["aux"]["series_stats"]["count"] == count
+
+    state = {"id": "a", "observables": {"Delta": 0.1, "Delta_series_file": "multi.npz"}}
+    row = delta.evaluate(state, {}, meta, base_dir=tmp_path)
+    assert row["status"] == "INCONCLUSIVE"
+    assert "Delta_series_key" in row["aux"]["series_error"]
+
+
+def _rank_gap(arr, value, q):
+    return abs(np.mean(arr <= value) - q)
+
+
+def test_quantile_sketch_bounds_and_shard_merge():
+    rng = np.random.default_rng(3)
+    arr = 5.0 + 2.0 * rng.standard_t(3, size=200_000)
+    whole = QuantileSketch(k=128, seed=1)
+    for chunk in iter_chunks(arr, 4096):
+        whole.update(chunk)
+    shards = [QuantileSketch(k=128, seed=s).update(part) for s, part in enumerate(np.array_split(arr, 4))]
+    merged = QuantileSketch.from_dict(shards[0].to_dict())
+    for shard in shards[1:]:
+        merged.merge(QuantileSketch.from_dict(shard.to_dict()))
+    assert merged.count == whole.count == arr.size
+    median = np.median(arr)
+    mad = np.median(np.abs(arr - median))
+    for sketch in (whole, merged):
+        bound = sketch.rank_error()
+        assert 0.0 < bound < 0.1
+        for q, value in zip((0.1, 0.5, 0.9), sketch.quantiles([0.1, 0.5, 0.9])):
+            assert _rank_gap(arr, value, q) <= bound
+        m, d = sketch.median_mad()
+        assert _rank_gap(np.abs(arr - median), d, 0.5) <= 3.0 * bound
+        assert _rank_gap(arr, m, 0.5) <= bound and abs(d - mad) < 0.2
+
+
+def test_quantile_sketch_is_exact_before_compaction():
+    arr = np.array([3.0, np.nan, 1.0, 10.0, 2.0, 4.0])
+    sketch = QuantileSketch(k=64).update(arr)
+    assert sketch.count == 5 and sketch.rank_error() == 0.0
+    assert sketch.median_mad() == (3.0, 1.0)
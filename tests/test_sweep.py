@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import copy
+import itertools
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from atlas.cli import sweep_thresholds
+from atlas.cli.run_pipeline import run_pipeline
+from atlas.io.jsonl import read_jsonl
+from atlas.utils.rules import compile_triage
+from atlas.utils.sensitivity import PASS, decide, triage_labels
+from atlas.utils.stats import RocSketch
+from atlas.utils.sweep import SWEPT, SweepCache, sweep_grid
+
+RULED = json.loads(Path("configs/ATLAS_thresholds_v2.4R2.json").read_text(encoding="utf-8"))["default"]
+MINIMAL = json.loads(Path("thresholds/thresholds.json").read_text(encoding="utf-8"))
+GRID = {
+    "tau_delta": [0.3, 0.05, 0.15],
+    "tau_n": [0.02, 0.05, 0.1],
+    "order_agreement_tol": [0.001, 0.01, 0.1],
+    "oscillation_max": [1, 3],
+}
+POSITIVES = ("true_tear", "anomaly")
+
+
+def _cache(n: int = 800) -> SweepCache:
+    rng = np.random.default_rng(4)
+    return SweepCache(
+        ids=[str(i) for i in range(n)],
+        delta_chart=np.where(rng.random(n) < 0.03, np.nan, rng.exponential(0.15, n)),
+        delta_inconclusive=rng.random(n) < 0.1,
+        abs_delta_n=np.where(rng.random(n) < 0.03, np.nan, rng.exponential(0.05, n)),
+        guard_pass=np.zeros(n, dtype=bool),
+        plateau=rng.random(n) < 0.5,
+        sg0=rng.choice([0, 0, 0, 1], n).astype(np.int8),
+        sg2=rng.choice([0, 0, 0, 2], n).astype(np.int8),
+        guard_available=rng.random(n) < 0.8,
+        order_disagreement=np.where(rng.random(n) < 0.2, 0.0, rng.exponential(0.01, n)),
+        oscillations=rng.integers(0, 6, n),
+    )
+
+
+def _point_cfg(cfg, values):
+    point = copy.deepcopy(cfg)
+    point["tau_delta"], point["tau_n"] = values[0], values[1]
+    guard = point.setdefault("N_mod", {}).setdefault("extrapolation_guard", {})
+    guard["order_agreement_tol"], guard["oscillation_max"] = values[2], values[3]
+    return point
+
+
+@pytest.mark.parametrize("cfg", [RULED, MINIMAL], ids=["rules", "fallback"])
+def test_grid_matches_per_point_decisions(cfg):
+    cache = _cache()
+    result = sweep_grid(cache, cfg, GRID, POSITIVES, bins=64)
+    assert list(result.axes["tau_delta"]) == [0.05, 0.15, 0.3]
+    cols = {"delta_chart": cache.delta_chart, "abs_delta_N": cache.abs_delta_n, "H_plateau": cache.plateau}
+    for cell in itertools.product(*(range(result.axes[name].size) for name in SWEPT)):
+        values = [float(result.axes[name][i]) for name, i in zip(SWEPT, cell)]
+        point = _point_cfg(cfg, values)
+        cached = copy.copy(cache)
+        cached.guard_pass = cache.guard_at(values[2], values[3])
+        decided = decide(cached, cache.delta_chart, cache.abs_delta_n, point)
+        confidence = compile_triage(point).evaluate(cols)["confidence"]
+        labels = np.asarray(triage_labels(point), dtype=object)[decided["triage"]]
+        roc = RocSketch(bins=64).update(confidence, labels).roc(POSITIVES)
+        assert result.metrics["AUC"][cell] == pytest.approx(roc["auc"], abs=1e-12)
+        assert result.metrics["best_J"][cell] == pytest.approx(roc["best_J"], abs=1e-12)
+        assert result.metrics["threshold"][cell] == pytest.approx(roc["threshold"], abs=1e-12)
+        assert result.metrics["pass_rate"][cell] == pytest.approx(np.mean(decided["SG-3"] == PASS), abs=1e-12)
+
+    front = result.pareto()
+    best_auc = max(p["AUC"] for p in front)
+    assert best_auc == pytest.approx(result.metrics["AUC"].max())
+    for a, b in itertools.permutations(front, 2):
+        assert not (a["AUC"] >= b["AUC"] and a["best_J"] >= b["best_J"] and (a["AUC"], a["best_J"]) != (b["AUC"], b["best_J"]))
+
+
+def test_cli_reproduces_the_pipeline_at_profile_thresholds(tmp_path):
+    results = tmp_path / "results.jsonl"
+    run_pipeline(Path("thresholds/thresholds.json"), Path("data/toy.jsonl"), results)
+    out = tmp_path / "sweep.json"
+    cache = tmp_path / "cache.npz"
+    args = [
+        "thresholds/thresholds.json",
+        str(results),
+        str(out),
+        "--tau-delta", "0.05:0.25:5",
+        "--tau-n", "0.05", "0.1",
+        "--positives", "true_tear", "anomaly",
+        "--cache", str(cache),
+    ]
+    sweep_thresholds.main(args)
+    report = json.loads(out.read_text())
+    assert report["anchors"] == 60
+    assert report["grid"]["tau_delta"] == pytest.approx([0.05, 0.1, 0.15, 0.2, 0.25])
+    assert report["grid"]["order_agreement_tol"] == [0.01]
+    assert report["pareto"]["points"]
+
+    rows = list(read_jsonl(str(results)))
+    triage = [r["aux"] for r in rows if r["stage"] == "triage"]
+    sketch = RocSketch(bins=report["bins"]).update(
+        [t["confidence"] for t in triage], [t["class"] for t in triage]
+    )
+    at_profile = (2, 0, 0, 0)
+    metrics = {name: np.asarray(value)[at_profile] for name, value in report["metrics"].items()}
+    assert metrics["AUC"] == pytest.approx(sketch.roc(["true_tear", "anomaly"])["auc"], abs=1e-12)
+    sg3 = [r["status"] == "PASS" for r in rows if r["stage"] == "SG-3"]
+    assert metrics["pass_rate"] == pytest.approx(np.mean(sg3))
+
+    # The second run reads the extracted values back instead of the log.
+    assert cache.exists()
+    results.write_text("", encoding="utf-8")
+    sweep_thresholds.main(args)
+    assert json.loads(out.read_text()) == report
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+from atlas.cli import verify_tg_ind
+from atlas.cli.run_pipeline import run_pipeline
+from atlas.io.jsonl import read_jsonl
+from atlas.stages import tg_ind
+from atlas.utils.logging import StageMeta
+
+
+def _dense(arr):
+    frob = np.linalg.norm(arr.T @ arr - np.eye(arr.shape[1]), ord="fro")
+    orth = np.linalg.norm(arr @ arr.T - np.eye(arr.shape[0]), ord="fro")
+    return frob, orth
+
+
+def test_small_gram_residuals_match_dense_products():
+    rng = np.random.default_rng(11)
+    for shape in [(50, 8), (8, 50), (6, 6)]:
+        arr = rng.normal(size=shape)
+        np.testing.assert_allclose(tg_ind.gram_residuals(arr), _dense(arr), rtol=1e-10)
+    q, _ = np.linalg.qr(rng.normal(size=(64, 64)))
+    frob, orth = tg_ind.gram_residuals(q)
+    assert frob < 1e-12 and orth < 1e-12
+
+
+def test_evaluate_block_matches_per_anchor_rows():
+    rng = np.random.default_rng(2)
+    states = [
+        {"id": "a", "observables": {"TG_matrix": rng.normal(size=(10, 4)).tolist()}},
+        {"id": "b", "observables": {}},
+        {"id": "c", "observables": {"TG_matrix": np.eye(4).tolist()}},
+        {"id": "d", "observables": {"TG_matrix": rng.normal(size=(10, 4)).tolist()}},
+    ]
+    meta = StageMeta(seed=0, commit="test", thresholds_sha256="x")
+    block = tg_ind.evaluate_block(states, {}, meta)
+    single = [tg_ind.evaluate(s, {}, meta) for s in states]
+    for b, s in zip(block, single):
+        assert b["status"] == s["status"]
+        for key in ("frobenius_resid", "orthogonality_resid"):
+            if s["aux"][key] is None:
+                assert b["aux"][key] is None
+            else:
+                assert np.isclose(b["aux"][key], s["aux"][key])
+    assert block[2]["status"] == "PASS"
+
+
+def test_protocol_passes_level_sets_and_fails_contact_distribution():
+    meta = StageMeta(seed=0, commit="test", thresholds_sha256="x")
+    points = np.array([[0.6, 0.8, 0.0], [0.0, 0.6, 0.8]])
+    radial = points / np.linalg.norm(points, axis=1, keepdims=True)
+
+    def sphere(pts):
+        return np.sum(pts * pts, axis=1, keepdims=True)
+
+    rows = tg_ind.evaluate_protocol(["s0", "s1"], sphere, points, radial, {}, meta)
+    assert [r["status"] for r in rows] == ["PASS", "PASS"]
+    assert rows[0]["aux"]["basis_rank"] == 2
+
+    def contact(pts):
+        frame = np.zeros((pts.shape[0], 3, 2))
+        frame[:, 0, 0] = 1.0
+        frame[:, 2, 0] = pts[:, 1]
+        frame[:, 1, 1] = 1.0
+        return frame
+
+    rows = tg_ind.evaluate_protocol(["c0"], None, points[:1], np.zeros((1, 3)), {}, meta, frame=contact)
+    assert rows[0]["status"] == "FAIL"
+    assert rows[0]["aux"]["frobenius_resid"] > 0.5
+    assert rows[0]["aux"]["frobenius_resid"] == max(rows[0]["aux"]["frobenius_by_step"])
+    assert "D_basis" not in rows[0]["aux"]
+
+
+def test_pipeline_batches_gauge_matrices_of_unpruned_anchors(tmp_path, monkeypatch):
+    rng = np.random.default_rng(5)
+    matrices = [rng.normal(size=(6, 3)), np.eye(3), rng.normal(size=(6, 3)), rng.normal(size=(3, 6))]
+    states = [
+        {
+            "id": f"g{i}",
+            "system_class": "spin",
+            "params": {},
+            "ground_truth": {},
+            "observables": {"Delta": 0.05, "deltaN": 0.01, "H_obs": 0.04, "TG_matrix": m.tolist()},
+        }
+        for i, m in enumerate(matrices)
+    ]
+    del states[2]["observables"]["H_obs"]
+    data = tmp_path / "states.jsonl"
+    data.write_text("\n".join(json.dumps(s) for s in states) + "\n", encoding="utf-8")
+    cfg = json.loads(Path("thresholds/thresholds.json").read_text(encoding="utf-8"))
+    cfg["gating"] = {"lazy_pruning": True}
+    thresholds = tmp_path / "thresholds.json"
+    thresholds.write_text(json.dumps(cfg), encoding="utf-8")
+
+    batched = []
+    block = tg_ind.gram_residuals_block
+
+    def spy(block_states):
+        batched.extend(s["id"] for s in block_states)
+        return block(block_states)
+
+    monkeypatch.setattr(tg_ind, "gram_residuals_block", spy)
+    rows = run_pipeline(thresholds, data, tmp_path / "out.jsonl")
+    assert batched == ["g0", "g1", "g3"]
+
+    meta = StageMeta(seed=0, commit="test", thresholds_sha256="x")
+    for row in rows:
+        if row["stage"] != "tg_ind" or row["anchor_id"] == "g2":
+            continue
+        state = states[int(row["anchor_id"][1:])]
+        expected = tg_ind.evaluate(state, cfg, meta)
+        assert row["status"] == expected["status"]
+        assert np.isclose(row["aux"]["frobenius_resid"], expected["aux"]["frobenius_resid"])
+        assert np.isclose(row["aux"]["orthogonality_resid"], expected["aux"]["orthogonality_resid"])
+
+
+def test_tg_protocol_states_reach_the_protocol(tmp_path):
+    sphere = {"quadratic": np.eye(3)[None].tolist()}
+    contact_linear = np.zeros((3, 2, 3))
+    contact_linear[2, 0, 1] = 1.0
+    contact = {"constant": [[1.0, 0.0], [0.0, 1.0], [0.0, 0.0]], "linear": contact_linear.tolist()}
+    protocols = {
+        "s0": {"point": [0.6, 0.8, 0.0], "x_t": [0.6, 0.8, 0.0], "invariants": sphere},
+        "s1": {"point": [0.0, 0.6, 0.8], "x_t": [0.0, 0.6, 0.8], "invariants": sphere},
+        "c0": {"point": [0.6, 0.8, 0.0], "x_t": [0.0, 0.0, 0.0], "frame": contact},
+        "bad": {"point": [0.6, 0.8], "x_t": [0.0, 0.0], "frame": contact},
+    }
+    states = [
+        {
+            "id": anchor_id,
+            "system_class": "spin",
+            "params": {},
+            "ground_truth": {},
+            "observables": {"Delta": 0.05, "deltaN": 0.01, "H_obs": 0.04, "TG_protocol": spec},
+        }
+        for anchor_id, spec in protocols.items()
+    ]
+    data = tmp_path / "states.jsonl"
+    data.write_text("\n".join(json.dumps(s) for s in states) + "\n", encoding="utf-8")
+    out = tmp_path / "tg.jsonl"
+    verify_tg_ind.main(["thresholds/thresholds.json", str(data), str(out)])
+    cli_rows = {r["anchor_id"]: r for r in read_jsonl(str(out))}
+    pipeline_rows = {
+        r["anchor_id"]: r
+        for r in run_pipeline(Path("thresholds/thresholds.json"), data, tmp_path / "out.jsonl")
+        if r["stage"] == "tg_ind"
+    }
+    for rows in (cli_rows, pipeline_rows):
+        assert [rows[k]["status"] for k in protocols] == ["PASS", "PASS", "FAIL", "INCONCLUSIVE"]
+        assert rows["s0"]["aux"]["protocol"] == "verify_TG_Ind"
+        assert "protocol_error" in rows["bad"]["aux"]
+
+    cfg = json.loads(Path("thresholds/thresholds.json").read_text(encoding="utf-8"))
+    meta = StageMeta(seed=0, commit="test", thresholds_sha256="x")
+    (direct,) = tg_ind.evaluate_protocol(
+        ["s1"], lambda p: np.sum(p * p, axis=1, keepdims=True), np.array([[0.0, 0.6, 0.8]]),
+        np.array([[0.0, 0.6, 0.8]]), cfg, meta,
+    )
+    assert np.isclose(cli_rows["s1"]["aux"]["frobenius_resid"], direct["aux"]["frobenius_resid"], atol=1e-12)
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from atlas.stages import triage
+from atlas.utils.logging import StageMeta
+from atlas.utils.rules import RuleCompileError, compile_expression, compile_triage
+
+CONFIG = json.loads(Path("configs/ATLAS_thresholds_v2.4R2.json").read_text(encoding="utf-8"))["default"]
+
+
+def test_compiled_rules_match_hardcoded_triage_for_finite_metrics():
+    rng = np.random.default_rng(9)
+    delta_chart = rng.uniform(0.0, 0.3, size=200)
+    abs_delta_n = rng.uniform(0.0, 0.1, size=200)
+    plateau = rng.uniform(size=200) > 0.5
+    block = triage.classify_block(delta_chart, abs_delta_n, plateau, CONFIG)
+
+    meta = StageMeta(seed=0, commit="test", thresholds_sha256="x")
+    legacy_cfg = {k: v for k, v in CONFIG.items() if k != "triage"}
+    for i in range(200):
+        d_status = "WARN" if delta_chart[i] > CONFIG["tau_delta"] else "PASS"
+        n_status = "WARN" if abs_delta_n[i] > CONFIG["tau_n"] else "PASS"
+        rows = (
+            {"status": d_status, "aux": {"delta_chart": delta_chart[i]}},
+            {"status": n_status, "aux": {"abs_delta_N": abs_delta_n[i]}},
+            {"aux": {"plateau_detected": bool(plateau[i])}},
+            {"status": "PASS"},
+            {"status": "PASS"},
+        )
+        legacy = triage.evaluate({"id": str(i)}, legacy_cfg, meta, *rows)["aux"]
+        rule_row = triage.evaluate({"id": str(i)}, CONFIG, meta, *rows)["aux"]
+        assert block["class"][i] == legacy["class"] == rule_row["class"]
+        assert block["priority_index"][i] == legacy["priority_index"]
+        assert np.isclose(block["confidence"][i], legacy["confidence"])
+
+
+def test_nonfinite_metric_trips_rules_like_a_stage_fail():
+    meta = StageMeta(seed=0, commit="test", thresholds_sha256="x")
+    legacy_cfg = {k: v for k, v in CONFIG.items() if k != "triage"}
+    block = triage.classify_block([np.nan, 0.01, np.nan], [0.01, np.inf, 0.01], [True, False, False], CONFIG)
+    assert list(block["class"]) == ["true_tear", "anomaly", "anomaly"]
+    for i, (d, n, plateau) in enumerate([(np.nan, 0.01, True), (0.01, np.inf, False)]):
+        rows = (
+            {"status": "FAIL" if not np.isfinite(d) else "PASS", "aux": {"delta_chart": d}},
+            {"status": "FAIL" if not np.isfinite(n) else "PASS", "aux": {"abs_delta_N": n}},
+            {"aux": {"plateau_detected": plateau}},
+            {"status": "PASS"},
+            {"status": "PASS"},
+        )
+        legacy = triage.evaluate({"id": str(i)}, legacy_cfg, meta, *rows)["aux"]
+        assert block["class"][i] == legacy["class"]
+        assert np.isclose(block["confidence"][i], legacy["confidence"])
+
+
+def test_custom_rules_and_rejected_syntax():
+    cfg = {
+        "tau_delta": 0.1,
+        "triage": {
+            "rules": {"flagged": {"any_of": ["delta_chart > 2*tau_delta"]}},
+            "priority": ["flagged", "fake"],
+            "default_class": "fake",
+            "confidence": "max(0.0, delta_chart - tau_delta)",
+        },
+    }
+    out = triage.classify_block([0.05, 0.5], [0.0, 0.0], [False, False], cfg)
+    assert out["class"].tolist() == ["fake", "flagged"]
+    assert out["priority_index"].tolist() == [1, 0]
+    assert np.allclose(out["confidence"], [0.0, 0.4])
+    with pytest.raises(RuleCompileError):
+        compile_expression("__import__('os').getcwd()", {})
+
+
+def test_unknown_rule_names_fail_at_compile_time():
+    typo = {"triage": {"rules": {"flagged": {"any_of": ["delta_chrat > tau_delta"]}}}}
+    with pytest.raises(RuleCompileError, match="delta_chrat"):
+        compile_triage(typo)
+    confidence = {"triage": {"rules": {"flagged": {"H_plateau": True}}, "confidence": "abs_deltaN / tau_n"}}
+    with pytest.raises(RuleCompileError, match="abs_deltaN"):
+        compile_triage(confidence)
+    # Swept symbols are columns, not constants, and stay legal.
+    compile_triage({"triage": {"rules": {"flagged": {"any_of": ["delta_chart > tau_delta"]}}}}, symbols=("tau_delta",))
@@ -15,7 +15,11 @@ if str(ROOT) not in sys.path:
 
 from atlas.cli.run_pipeline import run_pipeline
 from atlas.io.jsonl import read_jsonl
-from atlas.utils.stats import roc_curve
+from atlas.utils.stats import TRIAGE_CLASSES, roc_arrays, roc_one_vs_rest, triage_arrays
+
+
+# Stages the panels read; other rows are skipped before JSON decoding.
+PANEL_STAGES = ("delta", "nmod", "htop", "triage")
 
 
 def stage_lookup(rows: List[Dict[str, object]], stage_name: str) -> Dict[str, Dict[str, object]]:
@@ -45,7 +49,7 @@ def main() -> None:
             out_rows = run_pipeline(thresholds_path, input_path, output_path)
         st.success(f"Pipeline completed with {len(out_rows)} StageResult rows.")
     elif output_path.exists():
-        out_rows = list(read_jsonl(str(output_path)))
+        out_rows = list(read_jsonl(str(output_path), stages=PANEL_STAGES))
 
     if not out_rows:
         st.info("Run the pipeline or point to an existing results JSONL to view panels.")
@@ -99,9 +103,14 @@ def main() -> None:
     fig_h.savefig(fig_dir / "htop_panel.png", dpi=150, bbox_inches="tight")
 
     # ROC
-    roc = roc_curve(triage_rows)
+    scores, classes, _ = triage_arrays(triage_rows)
+    roc = roc_arrays(scores, classes)
+    per_class = roc_one_vs_rest(scores, classes)
     fig_roc, ax_roc = plt.subplots(figsize=(4, 4))
     ax_roc.plot(roc["fpr"], roc["tpr"], marker="o", label="ROC")
+    for label in TRIAGE_CLASSES[1:]:
+        curve = per_class[label]
+        ax_roc.plot(curve["fpr"], curve["tpr"], alpha=0.6, label=f"{label} (AUC={curve['auc']:.3f})")
     ax_roc.plot([0, 1], [0, 1], linestyle="--", color="gray", label="Chance")
     ax_roc.set_xlabel("False Positive Rate")
     ax_roc.set_ylabel("True Positive Rate")
@@ -110,7 +119,7 @@ def main() -> None:
     st.pyplot(fig_roc)
     fig_roc.savefig(fig_dir / "roc_curve.png", dpi=150, bbox_inches="tight")
 
-    st.json(roc)
+    st.json({**roc, "one_vs_rest": per_class})
 
 
 if __name__ == "__main__":